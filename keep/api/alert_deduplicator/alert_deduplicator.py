@@ -1,43 +1,120 @@
-import copy
+import dataclasses
 import hashlib
 import json
 import logging
+import threading
+import time
 
 import celpy
 
+from keep.api.alert_deduplicator.alert_hash_cache import AlertHashCache
+from keep.api.core.config import config
 from keep.api.core.db import get_all_filters, get_last_alert_hash_by_fingerprint
 from keep.api.models.alert import AlertDto
+from keep.rulesengine.cel_program_cache import CELProgramCache
+
+
+@dataclasses.dataclass
+class CompiledDeduplicationFilter:
+    id: str
+    matcher_cel: str
+    program: celpy.Runner
+    # the fields to remove, already split to their path parts (e.g. ("labels", "foo"))
+    fields: list[tuple[str, ...]]
+
+
+class DeduplicationFilterRegistry:
+    """
+    Keeps the deduplication filters of each tenant in memory, with their CEL
+    matchers compiled and their fields split to removal paths.
+
+    The filters of a tenant are reloaded after `ttl` seconds (filters can be
+    changed by other workers) or when `invalidate` is called.
+    """
+
+    @staticmethod
+    def get_instance() -> "DeduplicationFilterRegistry":
+        if not hasattr(DeduplicationFilterRegistry, "_instance"):
+            DeduplicationFilterRegistry._instance = DeduplicationFilterRegistry()
+        return DeduplicationFilterRegistry._instance
+
+    def __init__(
+        self, ttl: int = config("KEEP_DEDUPLICATION_FILTERS_TTL", default=60, cast=int)
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        # tenant_id -> (filters, loaded_at)
+        self._filters: dict[str, tuple[list[CompiledDeduplicationFilter], float]] = {}
+        self._lock = threading.Lock()
+
+    def get_filters(self, tenant_id: str) -> list[CompiledDeduplicationFilter]:
+        with self._lock:
+            entry = self._filters.get(tenant_id)
+            if entry and time.monotonic() - entry[1] <= self.ttl:
+                return entry[0]
+        filters = [self._compile(filt) for filt in get_all_filters(tenant_id)]
+        with self._lock:
+            self._filters[tenant_id] = (filters, time.monotonic())
+        return filters
+
+    def invalidate(self, tenant_id: str | None = None):
+        with self._lock:
+            if tenant_id is None:
+                self._filters.clear()
+            else:
+                self._filters.pop(tenant_id, None)
+
+    def _compile(self, filt) -> CompiledDeduplicationFilter:
+        # the programs are shared, so reloading the filters doesn't recompile them
+        return CompiledDeduplicationFilter(
+            id=str(filt.id),
+            matcher_cel=filt.matcher_cel,
+            program=CELProgramCache.get_instance().get_program(filt.matcher_cel),
+            fields=[tuple(field.split(".")) for field in filt.fields],
+        )
 
 
-# decide whether this should be a singleton so that we can keep the filters in memory
 class AlertDeduplicator:
     # this fields will be removed from the alert before hashing
     # TODO: make this configurable
-    DEFAULT_FIELDS = ["lastReceived"]
+    DEFAULT_FIELDS = [("lastReceived",)]
 
     def __init__(self, tenant_id):
-        self.filters = get_all_filters(tenant_id)
+        self.filters = DeduplicationFilterRegistry.get_instance().get_filters(tenant_id)
         self.logger = logging.getLogger(__name__)
         self.tenant_id = tenant_id
+        self.alert_hash_cache = AlertHashCache.get_instance()
 
     def is_deduplicated(self, alert: AlertDto) -> bool:
+        # a single projection of the alert, filters remove fields from it in place
+        payload = alert.dict()
         # Apply all deduplication filters
         for filt in self.filters:
-            alert = self._apply_deduplication_filter(filt, alert)
+            self._apply_deduplication_filter(filt, payload)
 
         # Remove default fields
         for field in AlertDeduplicator.DEFAULT_FIELDS:
-            alert = self._remove_field(field, alert)
+            self._remove_field(field, payload)
 
         # Calculate the hash
         alert_hash = hashlib.sha256(
-            json.dumps(alert.dict(), default=str).encode()
+            json.dumps(payload, default=str).encode()
         ).hexdigest()
 
-        # Check if the hash is already in the database
-        last_alert_hash_by_fingerprint = get_last_alert_hash_by_fingerprint(
+        # Check if the hash is already in the cache, a hit is the last hash of
+        #   the fingerprint as of at most the cache ttl ago, so repeated alerts
+        #   are deduplicated without querying the database
+        last_alert_hash_by_fingerprint = self.alert_hash_cache.get(
             self.tenant_id, alert.fingerprint
         )
+        # On a miss (or an expired entry), the database is the source of truth
+        if last_alert_hash_by_fingerprint is None:
+            last_alert_hash_by_fingerprint = get_last_alert_hash_by_fingerprint(
+                self.tenant_id, alert.fingerprint
+            )
+            self.alert_hash_cache.set(
+                self.tenant_id, alert.fingerprint, last_alert_hash_by_fingerprint
+            )
         alert_deduplicate = (
             True
             if last_alert_hash_by_fingerprint
@@ -49,16 +126,11 @@ class AlertDeduplicator:
 
         return alert_hash, alert_deduplicate
 
-    def _run_matcher(self, matcher, alert: AlertDto) -> bool:
+    def _run_matcher(self, program: celpy.Runner, payload: dict) -> bool:
         # run the CEL matcher
-        env = celpy.Environment()
-        ast = env.compile(matcher)
-        prgm = env.program(ast)
-        activation = celpy.json_to_cel(
-            json.loads(json.dumps(alert.dict(), default=str))
-        )
+        activation = celpy.json_to_cel(json.loads(json.dumps(payload, default=str)))
         try:
-            r = prgm.evaluate(activation)
+            r = program.evaluate(activation)
         except celpy.evaluation.CELEvalError as e:
             # this is ok, it means that the subrule is not relevant for this event
             if "no such member" in str(e):
@@ -67,37 +139,28 @@ class AlertDeduplicator:
             raise
         return True if r else False
 
-    def _apply_deduplication_filter(self, filt, alert: AlertDto) -> AlertDto:
+    def _apply_deduplication_filter(
+        self, filt: CompiledDeduplicationFilter, payload: dict
+    ):
         # check if the matcher applies
-        filter_apply = self._run_matcher(filt.matcher_cel, alert)
+        filter_apply = self._run_matcher(filt.program, payload)
         if not filter_apply:
             self.logger.debug(f"Filter {filt.id} did not match")
-            return alert
+            return
 
         # remove the fields
         for field in filt.fields:
-            alert = self._remove_field(field, alert)
-
-        return alert
-
-    def _remove_field(self, field, alert: AlertDto) -> AlertDto:
-        # remove the field from the alert
-        alert = copy.deepcopy(alert)
-        field_parts = field.split(".")
-        # if its not a nested field
-        if len(field_parts) == 1:
-            try:
-                delattr(alert, field)
-            except AttributeError:
-                self.logger.warning("Failed to delete attribute {field} from alert")
-                pass
-        # if its a nested field, copy the dictionaty and remove the field
-        # this is for cases such as labels/tags
-        else:
-            alert_attr = field_parts[0]
-            d = copy.deepcopy(getattr(alert, alert_attr))
-            for part in field_parts[1:-1]:
-                d = d[part]
-            del d[field_parts[-1]]
-            setattr(alert, field_parts[0], d)
-        return alert
+            self._remove_field(field, payload)
+
+    def _remove_field(self, field_parts: tuple[str, ...], payload: dict):
+        # remove the field from the alert projection
+        # nested fields are for cases such as labels/tags
+        d = payload
+        for part in field_parts[:-1]:
+            d = d.get(part) if isinstance(d, dict) else None
+        if not isinstance(d, dict) or field_parts[-1] not in d:
+            self.logger.warning(
+                f"Failed to delete attribute {'.'.join(field_parts)} from alert"
+            )
+            return
+        del d[field_parts[-1]]
@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from keep.api.core.config import config
+from keep.api.core.db import get_last_alert_hashes
+
+
+class AlertHashCache:
+    """
+    A tenant scoped, bounded LRU index of fingerprint -> last alert hash.
+
+    The DB stays the source of truth, but the cache is per process: an alert
+    inserted by another worker is not seen until the cached hash of its
+    fingerprint expires. Entries expire after `ttl` seconds, which bounds the
+    staleness: within `ttl` seconds of another worker changing a fingerprint
+    (e.g. firing -> resolved), an alert equal to the hash this worker cached
+    (e.g. firing again) is deduplicated. Set KEEP_ALERT_HASH_CACHE_TTL to the
+    window that's acceptable, or KEEP_ALERT_HASH_CACHE_SIZE=0 to always
+    check the DB.
+    """
+
+    @staticmethod
+    def get_instance() -> "AlertHashCache":
+        if not hasattr(AlertHashCache, "_instance"):
+            AlertHashCache._instance = AlertHashCache()
+        return AlertHashCache._instance
+
+    def __init__(
+        self,
+        max_size: int = config("KEEP_ALERT_HASH_CACHE_SIZE", default=100000, cast=int),
+        ttl: int = config("KEEP_ALERT_HASH_CACHE_TTL", default=60, cast=int),
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.max_size = max_size
+        self.ttl = ttl
+        # (tenant_id, fingerprint) -> (alert_hash, inserted_at)
+        self._cache: OrderedDict[tuple[str, str], tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, tenant_id: str, fingerprint: str) -> str | None:
+        if not self.enabled:
+            return None
+        key = (tenant_id, fingerprint)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            alert_hash, inserted_at = entry
+            if time.monotonic() - inserted_at > self.ttl:
+                del self._cache[key]
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return alert_hash
+
+    def set(self, tenant_id: str, fingerprint: str, alert_hash: str | None):
+        if not self.enabled:
+            return
+        if not alert_hash:
+            self.invalidate(tenant_id, fingerprint)
+            return
+        key = (tenant_id, fingerprint)
+        with self._lock:
+            self._cache[key] = (alert_hash, time.monotonic())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, tenant_id: str, fingerprint: str):
+        with self._lock:
+            self._cache.pop((tenant_id, fingerprint), None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def warm(self):
+        """
+        Load the latest alert hashes from the DB (up to max_size fingerprints).
+        """
+        if not self.enabled:
+            return
+        self.logger.info("Warming alert hash cache")
+        last_alert_hashes = get_last_alert_hashes(limit=self.max_size)
+        # the rows are ordered from the newest to the oldest, so insert them in
+        #   reverse order to keep the newest fingerprints as most recently used
+        for tenant_id, fingerprint, alert_hash in reversed(last_alert_hashes):
+            self.set(tenant_id, fingerprint, alert_hash)
+        self.logger.info(
+            "Alert hash cache warmed",
+            extra={"number_of_fingerprints": len(self._cache)},
+        )
+
+    def __len__(self) -> int:
+        return len(self._cache)
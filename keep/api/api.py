@@ -218,6 +218,13 @@ def get_app(
         logger.info("Loading providers into cache")
         ProvidersFactory.get_all_providers()
         logger.info("Providers loaded successfully")
+        # warm the deduplication cache so repeated alerts won't hit the DB
+        from keep.api.alert_deduplicator.alert_hash_cache import AlertHashCache
+
+        try:
+            AlertHashCache.get_instance().warm()
+        except Exception:
+            logger.exception("Failed to warm the alert hash cache")
         # Start the services
         logger.info("Starting the services")
         # Start the scheduler
@@ -0,0 +1,343 @@
+import dataclasses
+import datetime
+import functools
+import logging
+import threading
+import time
+import typing
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from keep.api.core.config import config
+from keep.api.models.alert import AlertDto
+from keep.api.models.provider import Provider
+from keep.contextmanager.contextmanager import ContextManager
+from keep.providers.base.base_provider import BaseProvider
+from keep.providers.providers_factory import ProvidersFactory
+
+
+class PullTimeoutError(Exception):
+    pass
+
+
+class PullInProgressError(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class ProviderPullResult:
+    provider: Provider
+    # the last alert of each fingerprint
+    alerts: list[AlertDto] = dataclasses.field(default_factory=list)
+    error: Exception | None = None
+    elapsed: float = 0.0
+    # the provider was pulled less than `min_interval` seconds ago, these are the alerts of that pull
+    cached: bool = False
+
+
+@dataclasses.dataclass
+class ProviderPullState:
+    # epoch time of the last pull (successful or not)
+    last_pulled_at: float
+    # the alerts of the last successful pull
+    alerts: list[AlertDto]
+
+
+@dataclasses.dataclass
+class TenantPull:
+    """
+    A pull of a tenant's providers that is in progress, concurrent callers
+    join it instead of starting another one.
+    """
+
+    results: list[ProviderPullResult] = dataclasses.field(default_factory=list)
+    done: threading.Event = dataclasses.field(default_factory=threading.Event)
+
+    def wait(self, timeout: float | None = None) -> list[ProviderPullResult]:
+        self.done.wait(timeout)
+        return list(self.results)
+
+
+def can_pull_alerts(provider_type: str) -> bool:
+    """
+    Whether the provider implements pulling alerts, the others would raise
+    NotImplementedError anyway.
+    """
+    try:
+        provider_class = ProvidersFactory.get_provider_class(provider_type)
+    except Exception:
+        return False
+    return any(
+        getattr(provider_class, method) is not getattr(BaseProvider, method)
+        for method in ("_get_alerts", "get_alerts", "get_alerts_by_fingerprint")
+    )
+
+
+class AlertsPuller:
+    """
+    Pulls the alerts of a tenant's installed providers concurrently.
+
+    At most `max_workers` providers are pulled at the same time (by all the
+    pulls of the worker), a provider that didn't finish `provider_timeout`
+    seconds after it started is given up on (its thread is left to finish in
+    the background and the provider is not pulled again until it does), and
+    providers that didn't finish within `budget` seconds of the pull are given
+    up on too. The results are yielded as each provider finishes, so a slow
+    provider doesn't delay the alerts of the fast ones.
+
+    There is a single pull per tenant at a time (see `start`), and a provider
+    is pulled from its upstream API at most once every `min_interval`
+    seconds, in between its last alerts are used (this keeps us under the
+    upstream rate limits when many users have the alerts feed open). Both are
+    per process, with several workers a provider is pulled at most once every
+    `min_interval` seconds by each of them.
+    """
+
+    @staticmethod
+    def get_instance() -> "AlertsPuller":
+        if not hasattr(AlertsPuller, "_instance"):
+            AlertsPuller._instance = AlertsPuller()
+        return AlertsPuller._instance
+
+    def __init__(
+        self,
+        max_workers: int = config("KEEP_PULL_MAX_WORKERS", default=5, cast=int),
+        provider_timeout: float = config(
+            "KEEP_PULL_PROVIDER_TIMEOUT", default=30, cast=float
+        ),
+        budget: float = config("KEEP_PULL_BUDGET", default=60, cast=float),
+        min_interval: float = config("KEEP_PULL_MIN_INTERVAL", default=30, cast=float),
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers
+        self.provider_timeout = provider_timeout
+        self.budget = budget
+        self.min_interval = min_interval
+        # (tenant_id, provider_id) -> the last pull of the provider
+        self._provider_states: dict[tuple[str, str], ProviderPullState] = {}
+        # (tenant_id, sync) -> the pull in progress
+        self._tenant_pulls: dict[tuple[str, bool], TenantPull] = {}
+        # (tenant_id, provider_id) -> the pull of the provider that didn't finish yet
+        self._provider_pulls: dict[tuple[str, str], Future] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="alerts-puller"
+        )
+        self._lock = threading.Lock()
+
+    def start(self, tenant_id: str, sync: bool) -> tuple[TenantPull, bool]:
+        """
+        Start a pull of the tenant or join the one in progress, sync and async
+        pulls are separate (only async pulls send the alerts to the tenant's
+        channel).
+
+        Returns:
+            tuple[TenantPull, bool]: the pull and whether the caller started it,
+                the caller that started it must `finish` it.
+        """
+        with self._lock:
+            tenant_pull = self._tenant_pulls.get((tenant_id, sync))
+            if tenant_pull is not None:
+                return tenant_pull, False
+            tenant_pull = TenantPull()
+            self._tenant_pulls[(tenant_id, sync)] = tenant_pull
+            return tenant_pull, True
+
+    def finish(self, tenant_id: str, sync: bool, tenant_pull: TenantPull):
+        with self._lock:
+            if self._tenant_pulls.get((tenant_id, sync)) is tenant_pull:
+                del self._tenant_pulls[(tenant_id, sync)]
+        tenant_pull.done.set()
+
+    def get_last_pulled(self, tenant_id: str) -> dict[str, datetime.datetime]:
+        """
+        Get the time of the last pull of each of the tenant's providers.
+        """
+        with self._lock:
+            return {
+                provider_id: datetime.datetime.fromtimestamp(
+                    state.last_pulled_at, tz=datetime.timezone.utc
+                )
+                for (
+                    state_tenant_id,
+                    provider_id,
+                ), state in self._provider_states.items()
+                if state_tenant_id == tenant_id
+            }
+
+    def invalidate(self, tenant_id: str | None = None):
+        with self._lock:
+            for key in list(self._provider_states):
+                if tenant_id in (None, key[0]):
+                    del self._provider_states[key]
+
+    def pull(
+        self, tenant_id: str, providers: list[Provider]
+    ) -> typing.Iterator[ProviderPullResult]:
+        """
+        Pull the alerts of the providers, the results are yielded in the order
+        the providers finish, the results of providers that were pulled less
+        than `min_interval` seconds ago are yielded first (with `cached`).
+
+        Args:
+            tenant_id (str): the tenant id.
+            providers (list[Provider]): the installed providers (with their details).
+        """
+        providers_to_pull = []
+        for provider in providers:
+            if not can_pull_alerts(provider.type):
+                continue
+            with self._lock:
+                state = self._provider_states.get((tenant_id, provider.id))
+            if state and time.time() - state.last_pulled_at < self.min_interval:
+                yield ProviderPullResult(
+                    provider=provider, alerts=list(state.alerts), cached=True
+                )
+                continue
+            providers_to_pull.append(provider)
+        for result in self._pull(tenant_id, providers_to_pull):
+            self._set_provider_state(tenant_id, result)
+            yield result
+
+    def _set_provider_state(self, tenant_id: str, result: ProviderPullResult):
+        key = (tenant_id, result.provider.id)
+        with self._lock:
+            state = self._provider_states.get(key)
+            if result.error is None:
+                self._provider_states[key] = ProviderPullState(
+                    last_pulled_at=time.time(), alerts=result.alerts
+                )
+            elif state:
+                # a failed pull is an attempt too, don't hammer a failing API
+                state.last_pulled_at = time.time()
+            else:
+                self._provider_states[key] = ProviderPullState(
+                    last_pulled_at=time.time(), alerts=[]
+                )
+
+    def _pull(
+        self, tenant_id: str, providers: list[Provider]
+    ) -> typing.Iterator[ProviderPullResult]:
+        if not providers:
+            return
+        deadline = time.monotonic() + self.budget
+        # provider index -> the time the provider started pulling
+        started: dict[int, float] = {}
+        # future -> (provider index, provider)
+        pending: dict[Future, tuple[int, Provider]] = {}
+        in_progress = []
+        try:
+            with self._lock:
+                for index, provider in enumerate(providers):
+                    key = (tenant_id, provider.id)
+                    # a provider that hangs would take another thread on every pull
+                    if key in self._provider_pulls:
+                        in_progress.append(provider)
+                        continue
+                    future = self._executor.submit(
+                        self._pull_provider, tenant_id, provider, index, started
+                    )
+                    self._provider_pulls[key] = future
+                    pending[future] = (index, provider)
+            # outside the lock, the callback runs right away if the future is done
+            for future, (_, provider) in pending.items():
+                future.add_done_callback(
+                    functools.partial(
+                        self._provider_pull_done, (tenant_id, provider.id)
+                    )
+                )
+            for provider in in_progress:
+                yield ProviderPullResult(
+                    provider=provider,
+                    error=PullInProgressError(
+                        "The previous pull of the provider didn't finish yet"
+                    ),
+                )
+            while pending:
+                now = time.monotonic()
+                timeouts = [
+                    started[index] + self.provider_timeout
+                    for index, _ in pending.values()
+                    if index in started
+                ]
+                # providers that start while waiting time out after now + provider_timeout
+                wait_until = min(deadline, now + self.provider_timeout, *timeouts)
+                done, _ = wait(
+                    pending,
+                    timeout=max(0, wait_until - now),
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    index, provider = pending.pop(future)
+                    yield self._get_result(future, provider, started.get(index))
+                now = time.monotonic()
+                for future, (index, provider) in list(pending.items()):
+                    if (
+                        index in started
+                        and now - started[index] >= self.provider_timeout
+                    ):
+                        del pending[future]
+                        yield ProviderPullResult(
+                            provider=provider,
+                            error=PullTimeoutError(
+                                f"Pulling alerts took more than {self.provider_timeout} seconds"
+                            ),
+                            elapsed=now - started[index],
+                        )
+                if pending and now >= deadline:
+                    for future, (_, provider) in pending.items():
+                        future.cancel()
+                        yield ProviderPullResult(
+                            provider=provider,
+                            error=PullTimeoutError(
+                                f"Pulling alerts didn't finish within the budget of {self.budget} seconds"
+                            ),
+                        )
+                    pending.clear()
+        finally:
+            # don't wait for the providers that were given up on, the ones
+            #   that didn't start yet are not started at all
+            for future in pending:
+                future.cancel()
+
+    def _provider_pull_done(self, key: tuple[str, str], future: Future):
+        with self._lock:
+            if self._provider_pulls.get(key) is future:
+                del self._provider_pulls[key]
+
+    def _pull_provider(
+        self,
+        tenant_id: str,
+        provider: Provider,
+        index: int,
+        started: dict[int, float],
+    ) -> list[AlertDto]:
+        started[index] = time.monotonic()
+        context_manager = ContextManager(tenant_id=tenant_id, workflow_id=None)
+        provider_instance = ProvidersFactory.get_provider(
+            context_manager=context_manager,
+            provider_id=provider.id,
+            provider_type=provider.type,
+            provider_config=provider.details,
+        )
+        self.logger.info(
+            f"Pulling alerts from provider {provider.type} ({provider.id})",
+            extra={
+                "provider_type": provider.type,
+                "provider_id": provider.id,
+                "tenant_id": tenant_id,
+            },
+        )
+        sorted_provider_alerts_by_fingerprint = (
+            provider_instance.get_alerts_by_fingerprint(tenant_id=tenant_id)
+        )
+        return [alerts[0] for alerts in sorted_provider_alerts_by_fingerprint.values()]
+
+    def _get_result(
+        self, future: Future, provider: Provider, started_at: float | None
+    ) -> ProviderPullResult:
+        elapsed = time.monotonic() - started_at if started_at else 0.0
+        try:
+            return ProviderPullResult(
+                provider=provider, alerts=future.result(), elapsed=elapsed
+            )
+        except Exception as e:
+            return ProviderPullResult(provider=provider, error=e, elapsed=elapsed)
@@ -1,11 +1,15 @@
-import json
 import logging
-import re
 
 import celpy
 import chevron
 from sqlmodel import Session
 
+from keep.api.bl.extraction_rules_engine import (
+    CompiledExtractionRule,
+    ExtractionRulesEngine,
+    to_json_value,
+)
+from keep.api.bl.mapping_rules_index import MappingRulesIndex
 from keep.api.core.db import enrich_alert, get_mapping_rule_by_id
 from keep.api.models.alert import AlertDto
 from keep.api.models.db.extraction import ExtractionRule
@@ -37,6 +41,37 @@ class EnrichmentsBl:
         self.logger = logging.getLogger(__name__)
         self.tenant_id = tenant_id
         self.db_session = db
+        # rules are loaded once per instance so a batch of events shares them
+        self._mapping_rules: list[MappingRule] | None = None
+
+    def _get_extraction_rules(self, is_alert_dto: bool) -> list[CompiledExtractionRule]:
+        return ExtractionRulesEngine.get_instance().get_rules(
+            self.tenant_id,
+            is_alert_dto,
+            lambda: (
+                self.db_session.query(ExtractionRule)
+                .filter(ExtractionRule.tenant_id == self.tenant_id)
+                .filter(ExtractionRule.disabled == False)
+                .filter(ExtractionRule.pre == False if is_alert_dto else True)
+                .order_by(ExtractionRule.priority.desc())
+                .all()
+            ),
+        )
+
+    def _get_mapping_rules(self) -> list[MappingRule]:
+        if self._mapping_rules is None:
+            self._mapping_rules = (
+                self.db_session.query(MappingRule)
+                .filter(MappingRule.tenant_id == self.tenant_id)
+                .filter(MappingRule.disabled == False)
+                .order_by(MappingRule.priority.desc())
+                .all()
+            )
+            # enriching commits the session, detach the rules so they won't be
+            #   expired (and re-selected) after every enriched alert
+            for rule in self._mapping_rules:
+                self.db_session.expunge(rule)
+        return self._mapping_rules
 
     def run_extraction_rules(self, event: AlertDto | dict) -> AlertDto | dict:
         """
@@ -51,16 +86,7 @@ class EnrichmentsBl:
             "Running extraction rules for incoming event",
             extra={"tenant_id": self.tenant_id, "fingerprint": fingerprint},
         )
-        rules: list[ExtractionRule] = (
-            self.db_session.query(ExtractionRule)
-            .filter(ExtractionRule.tenant_id == self.tenant_id)
-            .filter(ExtractionRule.disabled == False)
-            .filter(
-                ExtractionRule.pre == False if isinstance(event, AlertDto) else True
-            )
-            .order_by(ExtractionRule.priority.desc())
-            .all()
-        )
+        rules = self._get_extraction_rules(isinstance(event, AlertDto))
 
         if not rules:
             self.logger.debug("No extraction rules found for tenant")
@@ -69,17 +95,12 @@ class EnrichmentsBl:
         is_alert_dto = False
         if isinstance(event, AlertDto):
             is_alert_dto = True
-            event = json.loads(json.dumps(event.dict(), default=str))
+            event = to_json_value(event.dict())
 
+        # the event changes only when a rule matches, so all the conditions share it
+        activation = None
         for rule in rules:
-            attribute = rule.attribute
-            if (
-                attribute.startswith("{{") is False
-                and attribute.endswith("}}") is False
-            ):
-                # Wrap the attribute in {{ }} to make it a valid chevron template
-                attribute = f"{{{{ {attribute} }}}}"
-            attribute_value = chevron.render(attribute, event)
+            attribute_value = chevron.render(rule.attribute_tokens, event)
 
             if not attribute_value:
                 self.logger.info(
@@ -88,7 +109,7 @@ class EnrichmentsBl:
                 )
                 continue
 
-            if rule.condition is None or rule.condition == "*" or rule.condition == "":
+            if rule.program is None:
                 self.logger.info(
                     "No condition specified for the rule, enriching...",
                     extra={
@@ -98,18 +119,16 @@ class EnrichmentsBl:
                     },
                 )
             else:
-                env = celpy.Environment()
-                ast = env.compile(rule.condition)
-                prgm = env.program(ast)
-                activation = celpy.json_to_cel(event)
-                relevant = prgm.evaluate(activation)
+                if activation is None:
+                    activation = celpy.json_to_cel(event)
+                relevant = rule.program.evaluate(activation)
                 if not relevant:
                     self.logger.debug(
                         "Condition did not match, skipping extraction",
                         extra={"rule_id": rule.id},
                     )
                     continue
-            match_result = re.match(rule.regex, attribute_value)
+            match_result = rule.regex.match(attribute_value)
             if match_result:
                 match_dict = match_result.groupdict()
 
@@ -156,16 +175,18 @@ class EnrichmentsBl:
             self.logger.warning("Mapping rule not found", extra={"rule_id": rule_id})
             return []
 
+        index = MappingRulesIndex.get_instance().get_index(
+            mapping_rule, [matcher], wildcard=None
+        )
         result = []
         for entry in lst:
             entry_key_value = entry.get(entry_key)
             if entry_key_value is None:
                 self.logger.warning("Entry key not found", extra={"entry": entry})
                 continue
-            for row in mapping_rule.rows:
-                if row.get(matcher) == entry_key_value:
-                    result.append(row.get(key))
-                    break
+            row = index.get((entry_key_value,))
+            if row is not None:
+                result.append(row.get(key))
         self.logger.info(
             "Mapping rule executed", extra={"rule_id": rule_id, "result": result}
         )
@@ -179,65 +200,52 @@ class EnrichmentsBl:
             "Running mapping rules for incoming alert",
             extra={"fingerprint": alert.fingerprint, "tenant_id": self.tenant_id},
         )
-        rules: list[MappingRule] = (
-            self.db_session.query(MappingRule)
-            .filter(MappingRule.tenant_id == self.tenant_id)
-            .filter(MappingRule.disabled == False)
-            .order_by(MappingRule.priority.desc())
-            .all()
-        )
+        rules = self._get_mapping_rules()
 
         if not rules:
             self.logger.debug("No mapping rules found for tenant")
             return alert
 
         for rule in rules:
-            # Check if the alert has all the required attributes from matchers
-            if not all(
+            values = tuple(
                 get_nested_attribute(alert, attribute) for attribute in rule.matchers
-            ):
+            )
+            # Check if the alert has all the required attributes from matchers
+            if not all(values):
                 self.logger.debug(
                     "Alert does not have all the required attributes for the rule",
                     extra={"fingerprint": alert.fingerprint},
                 )
                 continue
 
-            # Check if the alert matches any of the rows
-            for row in rule.rows:
-                if all(
-                    get_nested_attribute(alert, attribute) == row.get(attribute)
-                    or row.get(attribute) == "*"  # Wildcard
-                    for attribute in rule.matchers
-                ):
-                    self.logger.info(
-                        "Alert matched a mapping rule, enriching...",
-                        extra={
-                            "fingerprint": alert.fingerprint,
-                            "tenant_id": self.tenant_id,
-                        },
-                    )
-                    # This is where you match the row, add your enrichment logic here
-                    # For example: alert.enrich(row)
-                    # Remember to break if you only need the first match or adjust logic as needed
-                    enrichments = {
-                        key: value
-                        for key, value in row.items()
-                        if key not in rule.matchers
-                    }
-
-                    # Enrich the alert with the matched row
-                    for key, value in enrichments.items():
-                        setattr(alert, key, value)
-
-                    # Save the enrichments to the database
-                    enrich_alert(
-                        self.tenant_id, alert.fingerprint, enrichments, self.db_session
-                    )
-                    self.logger.info(
-                        "Alert enriched",
-                        extra={
-                            "fingerprint": alert.fingerprint,
-                            "tenant_id": self.tenant_id,
-                        },
-                    )
-                    break
+            # Find the first row that matches the alert (a "*" value matches any value)
+            row = MappingRulesIndex.get_instance().get_index(rule).get(values)
+            if row is None:
+                continue
+
+            self.logger.info(
+                "Alert matched a mapping rule, enriching...",
+                extra={
+                    "fingerprint": alert.fingerprint,
+                    "tenant_id": self.tenant_id,
+                },
+            )
+            enrichments = {
+                key: value for key, value in row.items() if key not in rule.matchers
+            }
+
+            # Enrich the alert with the matched row
+            for key, value in enrichments.items():
+                setattr(alert, key, value)
+
+            # Save the enrichments to the database
+            enrich_alert(
+                self.tenant_id, alert.fingerprint, enrichments, self.db_session
+            )
+            self.logger.info(
+                "Alert enriched",
+                extra={
+                    "fingerprint": alert.fingerprint,
+                    "tenant_id": self.tenant_id,
+                },
+            )
@@ -0,0 +1,175 @@
+import dataclasses
+import json
+import logging
+import re
+import threading
+import time
+import typing
+
+import celpy
+import chevron.tokenizer
+
+from keep.api.core.config import config
+from keep.api.models.db.extraction import ExtractionRule
+from keep.rulesengine.cel_program_cache import CELProgramCache
+
+
+def get_attribute_template(attribute: str) -> str:
+    """
+    Get the chevron template of the attribute of an extraction rule.
+    """
+    if attribute.startswith("{{") is False and attribute.endswith("}}") is False:
+        # Wrap the attribute in {{ }} to make it a valid chevron template
+        attribute = f"{{{{ {attribute} }}}}"
+    return attribute
+
+
+def validate_extraction_rule(regex: str, attribute: str, condition: str | None):
+    """
+    Validate the regex, attribute and condition of an extraction rule.
+
+    Raises:
+        ValueError: If one of them can't be compiled.
+    """
+    try:
+        re.compile(regex)
+    except re.error as e:
+        raise ValueError(f"Invalid regex: {e}")
+    try:
+        list(chevron.tokenizer.tokenize(get_attribute_template(attribute or "")))
+    except chevron.tokenizer.ChevronError as e:
+        raise ValueError(f"Invalid attribute: {e}")
+    if condition and condition != "*":
+        try:
+            CELProgramCache.get_instance().get_program(condition)
+        except Exception as e:
+            raise ValueError(f"Invalid condition: {e}")
+
+
+def _to_json_key(key) -> str:
+    if isinstance(key, str):
+        return str.__str__(key)
+    if key is None or isinstance(key, (bool, int, float)):
+        return json.dumps(key)
+    raise TypeError(
+        f"keys must be str, int, float, bool or None, not {type(key).__name__}"
+    )
+
+
+def to_json_value(value):
+    """
+    Get the value as `json.loads(json.dumps(value, default=str))` would return
+    it, without serializing it.
+    """
+    value_type = type(value)
+    if value is None or value_type in (str, int, float, bool):
+        return value
+    if isinstance(value, dict):
+        return {_to_json_key(key): to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    # str and int subclasses (e.g. enums) are serialized by their value
+    if isinstance(value, str):
+        return str.__str__(value)
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    return str(value)
+
+
+@dataclasses.dataclass
+class CompiledExtractionRule:
+    id: int
+    attribute_tokens: list[tuple[str, str]]
+    # None when the rule has no condition
+    program: celpy.Runner | None
+    regex: re.Pattern
+
+    @staticmethod
+    def compile(rule: ExtractionRule) -> "CompiledExtractionRule":
+        program = None
+        if rule.condition is not None and rule.condition not in ("*", ""):
+            program = CELProgramCache.get_instance().get_program(rule.condition)
+        return CompiledExtractionRule(
+            id=rule.id,
+            attribute_tokens=list(
+                chevron.tokenizer.tokenize(get_attribute_template(rule.attribute))
+            ),
+            program=program,
+            regex=re.compile(rule.regex),
+        )
+
+
+@dataclasses.dataclass
+class TenantExtractionRules:
+    rules: list[CompiledExtractionRule]
+    loaded_at: float
+
+
+class ExtractionRulesEngine:
+    """
+    A per tenant cache of the compiled extraction rules (the attribute
+    template, the CEL condition and the regex of every rule, by priority), so
+    events are matched against the rules without querying or compiling them.
+
+    The rules are loaded on the first use and again after `ttl` seconds (rules
+    can be changed by other workers), changing a rule invalidates its tenant.
+    """
+
+    @staticmethod
+    def get_instance() -> "ExtractionRulesEngine":
+        if not hasattr(ExtractionRulesEngine, "_instance"):
+            ExtractionRulesEngine._instance = ExtractionRulesEngine()
+        return ExtractionRulesEngine._instance
+
+    def __init__(
+        self, ttl: int = config("KEEP_EXTRACTION_RULES_TTL", default=30, cast=int)
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        # (tenant_id, is_alert_dto) -> the compiled rules
+        self._tenants: dict[tuple[str, bool], TenantExtractionRules] = {}
+        self._lock = threading.Lock()
+
+    def get_rules(
+        self,
+        tenant_id: str,
+        is_alert_dto: bool,
+        load_rules: typing.Callable[[], list[ExtractionRule]],
+    ) -> list[CompiledExtractionRule]:
+        """
+        Get the compiled rules of the tenant.
+
+        Args:
+            tenant_id (str): the tenant id.
+            is_alert_dto (bool): the rules of formatted events (AlertDto) or of raw events.
+            load_rules (Callable): loads the enabled rules, by priority.
+        """
+        key = (tenant_id, is_alert_dto)
+        with self._lock:
+            tenant_rules = self._tenants.get(key)
+            if tenant_rules and time.monotonic() - tenant_rules.loaded_at <= self.ttl:
+                return tenant_rules.rules
+        rules = []
+        for rule in load_rules():
+            try:
+                rules.append(CompiledExtractionRule.compile(rule))
+            except Exception:
+                # rules are validated when they are saved, this is a rule from before that
+                self.logger.warning(
+                    "Failed to compile extraction rule, skipping it",
+                    extra={"rule_id": rule.id, "tenant_id": tenant_id},
+                    exc_info=True,
+                )
+        with self._lock:
+            self._tenants[key] = TenantExtractionRules(
+                rules=rules, loaded_at=time.monotonic()
+            )
+        return rules
+
+    def invalidate(self, tenant_id: str | None = None):
+        with self._lock:
+            for key in list(self._tenants):
+                if tenant_id in (None, key[0]):
+                    del self._tenants[key]
@@ -0,0 +1,142 @@
+import datetime
+import logging
+import threading
+import typing
+
+from keep.api.core.db import get_mapping_rule_rows
+from keep.api.models.db.mapping import MappingRule
+
+WILDCARD = "*"
+
+
+class MappingRowsIndex:
+    """
+    A hash index of the rows of a mapping rule over its matchers, so finding
+    the row of an alert doesn't scan the rows.
+
+    The rows are grouped by which of their matchers are wildcards, each group
+    maps the values of its other matchers to the first row with them, and the
+    match is the first of these rows, which is the row a scan would match.
+    Rows with values that can't be hashed are scanned.
+    """
+
+    def __init__(
+        self,
+        rows: list[dict],
+        matchers: list[str],
+        wildcard: str | None = WILDCARD,
+    ):
+        self.rows = rows
+        self.matchers = list(matchers)
+        self.wildcard = wildcard
+        # wildcard positions -> the values of the other positions -> the first row index
+        self._groups: dict[tuple[bool, ...], dict[tuple, int]] = {}
+        # indexes of rows with unhashable values
+        self._unindexed: list[int] = []
+        for index, row in enumerate(rows):
+            values = tuple(row.get(matcher) for matcher in self.matchers)
+            mask = tuple(
+                wildcard is not None and isinstance(value, str) and value == wildcard
+                for value in values
+            )
+            key = self._get_key(values, mask)
+            try:
+                self._groups.setdefault(mask, {}).setdefault(key, index)
+            except TypeError:
+                self._unindexed.append(index)
+
+    @staticmethod
+    def _get_key(values: tuple, mask: tuple[bool, ...]) -> tuple:
+        return tuple(
+            value for value, is_wildcard in zip(values, mask) if not is_wildcard
+        )
+
+    def _matches(self, row: dict, values: tuple) -> bool:
+        return all(
+            row.get(matcher) == value
+            or (self.wildcard is not None and row.get(matcher) == self.wildcard)
+            for matcher, value in zip(self.matchers, values)
+        )
+
+    def get(self, values: tuple) -> dict | None:
+        """
+        Get the first row that matches the values (in the order of the matchers).
+        """
+        first_index = None
+        try:
+            for mask, keys in self._groups.items():
+                index = keys.get(self._get_key(values, mask))
+                if index is not None and (first_index is None or index < first_index):
+                    first_index = index
+        except TypeError:
+            # the values can't be hashed, fall back to scanning the rows
+            return next((row for row in self.rows if self._matches(row, values)), None)
+        for index in self._unindexed:
+            if first_index is not None and index > first_index:
+                break
+            if self._matches(self.rows[index], values):
+                first_index = index
+                break
+        return self.rows[first_index] if first_index is not None else None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class MappingRulesIndex:
+    """
+    A process wide cache of the rows indexes of the mapping rules, keyed by
+    the rule id and the matchers, an index is rebuilt when its rule was
+    updated since it was built (by `last_updated_at`).
+    """
+
+    @staticmethod
+    def get_instance() -> "MappingRulesIndex":
+        if not hasattr(MappingRulesIndex, "_instance"):
+            MappingRulesIndex._instance = MappingRulesIndex()
+        return MappingRulesIndex._instance
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        # (rule id, matchers, wildcard) -> (the rule's last_updated_at, index)
+        self._indexes: dict[
+            tuple[int, tuple[str, ...], str | None],
+            tuple[datetime.datetime, MappingRowsIndex],
+        ] = {}
+        self._lock = threading.Lock()
+
+    def get_index(
+        self,
+        rule: MappingRule,
+        matchers: typing.Sequence[str] | None = None,
+        wildcard: str | None = WILDCARD,
+    ) -> MappingRowsIndex:
+        """
+        Get the index of the rule's rows, building it if the rule is new or was updated.
+
+        Args:
+            rule (MappingRule): the rule.
+            matchers (list[str], optional): the attributes to index, defaults to the rule's matchers.
+            wildcard (str | None, optional): the value that matches any value, None for exact matches.
+        """
+        matchers = tuple(rule.matchers if matchers is None else matchers)
+        key = (rule.id, matchers, wildcard)
+        with self._lock:
+            cached = self._indexes.get(key)
+        if cached is not None and cached[0] == rule.last_updated_at:
+            return cached[1]
+        index = MappingRowsIndex(get_mapping_rule_rows(rule), list(matchers), wildcard)
+        self.logger.debug(
+            "Built mapping rule index",
+            extra={"rule_id": rule.id, "rows_count": len(index)},
+        )
+        if rule.id is not None:
+            with self._lock:
+                self._indexes[key] = (rule.last_updated_at, index)
+        return index
+
+    def invalidate(self, rule_id: int | None = None):
+        with self._lock:
+            for key in list(self._indexes):
+                if rule_id in (None, key[0]):
+                    del self._indexes[key]
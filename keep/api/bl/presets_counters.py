@@ -0,0 +1,313 @@
+import dataclasses
+import logging
+import threading
+import time
+
+from keep.api.core.config import config
+from keep.api.core.db import get_last_alerts
+from keep.api.models.alert import AlertDto, AlertStatus
+from keep.api.models.db.preset import PresetDto, StaticPresetsId
+from keep.rulesengine.rulesengine import RulesEngine
+
+
+@dataclasses.dataclass
+class TenantPresetsState:
+    # fingerprint -> last alert of the fingerprint
+    alerts: dict[str, AlertDto]
+    # preset id -> (cel query, fingerprints of the matching alerts)
+    presets: dict[str, tuple[str, set[str]]]
+    # fingerprints of not deleted/dismissed alerts
+    active: set[str]
+    dismissed: set[str]
+    groups: set[str]
+    # fingerprints of firing active alerts (and those that are also noisy)
+    firing: set[str]
+    noisy: set[str]
+    loaded_at: float
+    lock: threading.Lock = dataclasses.field(default_factory=threading.Lock)
+
+
+class PresetsCounters:
+    """
+    Keeps, per tenant, the fingerprints of the alerts that match each preset,
+    so the preset counters are updated with the changed alerts only instead of
+    filtering all the alerts with every preset.
+
+    The state of a tenant is loaded from the DB on the first use and reloaded
+    after `ttl` seconds (alerts can be ingested or enriched by other workers).
+    The state is per worker, so the counters pushed to the clients are the
+    changes made by this worker only (the clients add them to the counts they
+    got from the API), never the totals of a possibly stale state.
+    """
+
+    @staticmethod
+    def get_instance() -> "PresetsCounters":
+        if not hasattr(PresetsCounters, "_instance"):
+            PresetsCounters._instance = PresetsCounters()
+        return PresetsCounters._instance
+
+    def __init__(
+        self, ttl: int = config("KEEP_PRESETS_COUNTERS_TTL", default=60, cast=int)
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        self._states: dict[str, TenantPresetsState] = {}
+        # tenant id -> lock held while the state of the tenant is (re)loaded
+        self._loading_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_presets_dto(self, tenant_id: str, presets: list) -> list[PresetDto]:
+        """
+        Get the presets with their counters, followed by the static presets
+        (feed, dismissed and groups).
+
+        Args:
+            tenant_id (str): the tenant id.
+            presets (list[Preset]): the presets to count.
+        """
+        state = self.get_state(tenant_id)
+        with state.lock:
+            self._sync_presets(state, presets)
+            presets_dto = [self._to_dto(state, preset) for preset in presets]
+            presets_dto.extend(self._static_presets_dto(state))
+        return presets_dto
+
+    def update_alerts(
+        self,
+        tenant_id: str,
+        alerts: list[AlertDto],
+        presets: list,
+        state: TenantPresetsState | None = None,
+    ) -> list[PresetDto]:
+        """
+        Update the counters with new or changed alerts (ingested, enriched,
+        dismissed or deleted).
+
+        Args:
+            tenant_id (str): the tenant id.
+            alerts (list[AlertDto]): the changed alerts.
+            presets (list[Preset]): all the presets of the tenant.
+            state (TenantPresetsState, optional): the state to update, got with
+                `get_state` before the alerts were written to the DB (a state
+                loaded after that already has the changes, so they would be lost).
+
+        Returns:
+            list[PresetDto]: the presets whose alerts were changed, with the
+                change of their counts (the UI adds them to the counts it has).
+        """
+        state = state or self.get_state(tenant_id)
+        # the last alert of each fingerprint wins
+        alerts = list({alert.fingerprint: alert for alert in alerts}.values())
+        fingerprints = {alert.fingerprint for alert in alerts}
+        with state.lock:
+            self._sync_presets(state, presets, prune=True)
+            for alert in alerts:
+                self._set_alert(state, alert)
+            updated_presets = []
+            for preset in presets:
+                preset_dto = PresetDto(**preset.dict())
+                if not preset_dto.cel_query:
+                    continue
+                cel_query, matches = state.presets[str(preset.id)]
+                matched = {
+                    alert.fingerprint
+                    for alert in RulesEngine.filter_alerts(alerts, cel_query)
+                }
+                # the preset is updated if the changed alerts matched it before or now
+                if not matched and matches.isdisjoint(fingerprints):
+                    continue
+                count_before = len(matches)
+                matches.difference_update(fingerprints)
+                matches.update(matched)
+                preset_dto = self._to_dto(state, preset)
+                preset_dto.alerts_count -= count_before
+                updated_presets.append(preset_dto)
+        return updated_presets
+
+    def get_pulled_presets_dto(
+        self, alerts: list[AlertDto], presets: list
+    ) -> list[PresetDto]:
+        """
+        Get the presets matched by alerts pulled from the providers, so the
+        clients make noise for them.
+
+        The pulled alerts are not persisted (nor counted by the API), so they
+        are not added to the state and the counts of the presets don't change.
+        """
+        presets_dto = []
+        for preset in presets:
+            preset_dto = PresetDto(**preset.dict())
+            if not preset_dto.cel_query:
+                continue
+            filtered_alerts = RulesEngine.filter_alerts(alerts, preset_dto.cel_query)
+            if not filtered_alerts:
+                continue
+            preset_dto.alerts_count = 0
+            # noisy presets make noise when any of their alerts is firing, other
+            #   presets make noise when any of their firing alerts is noisy
+            preset_dto.should_do_noise_now = any(
+                alert.status == AlertStatus.FIRING.value
+                and (preset.is_noisy or alert.isNoisy)
+                for alert in filtered_alerts
+            )
+            presets_dto.append(preset_dto)
+        return presets_dto
+
+    def invalidate(self, tenant_id: str | None = None):
+        with self._lock:
+            if tenant_id is None:
+                self._states.clear()
+            else:
+                self._states.pop(tenant_id, None)
+
+    def get_state(self, tenant_id: str) -> TenantPresetsState:
+        """
+        Get the state of the tenant, (re)loading it from the DB if needed.
+        Concurrent callers wait for a single reload instead of loading it too.
+        """
+        with self._lock:
+            state = self._states.get(tenant_id)
+            if self._is_fresh(state):
+                return state
+            loading_lock = self._loading_locks.setdefault(tenant_id, threading.Lock())
+        with loading_lock:
+            # the state may have been reloaded while waiting for the lock
+            with self._lock:
+                state = self._states.get(tenant_id)
+                if self._is_fresh(state):
+                    return state
+            state = self._load_state(tenant_id)
+            with self._lock:
+                self._states[tenant_id] = state
+        return state
+
+    def _is_fresh(self, state: TenantPresetsState | None) -> bool:
+        return state is not None and time.monotonic() - state.loaded_at <= self.ttl
+
+    def _load_state(self, tenant_id: str) -> TenantPresetsState:
+        # avoid circular import, the alerts route uses the counters
+        from keep.api.routes.alerts import convert_db_alerts_to_dto_alerts
+
+        self.logger.info("Loading presets counters", extra={"tenant_id": tenant_id})
+        state = TenantPresetsState(
+            alerts={},
+            presets={},
+            active=set(),
+            dismissed=set(),
+            groups=set(),
+            firing=set(),
+            noisy=set(),
+            loaded_at=time.monotonic(),
+        )
+        alerts = get_last_alerts(tenant_id=tenant_id)
+        for alert_dto in convert_db_alerts_to_dto_alerts(alerts):
+            # shahar: this is backward compatibility for before we had milliseconds in the timestamp
+            #          the alerts are ordered so we keep the first alert of each fingerprint
+            if alert_dto.fingerprint in state.alerts:
+                self.logger.info(
+                    "Skipping fingerprint", extra={"alert_id": alert_dto.id}
+                )
+                continue
+            self._set_alert(state, alert_dto)
+        self.logger.info(
+            "Loaded presets counters",
+            extra={"tenant_id": tenant_id, "number_of_alerts": len(state.alerts)},
+        )
+        return state
+
+    def _sync_presets(
+        self, state: TenantPresetsState, presets: list, prune: bool = False
+    ):
+        if prune:
+            # presets that are not in all the presets of the tenant were deleted
+            preset_ids = {str(preset.id) for preset in presets}
+            for preset_id in set(state.presets) - preset_ids:
+                del state.presets[preset_id]
+        # filter all the alerts only with new presets or presets whose query changed
+        for preset in presets:
+            preset_id = str(preset.id)
+            cel_query = PresetDto(**preset.dict()).cel_query
+            if preset_id in state.presets and state.presets[preset_id][0] == cel_query:
+                continue
+            matches = set()
+            if cel_query:
+                start = time.time()
+                filtered_alerts = RulesEngine.filter_alerts(
+                    list(state.alerts.values()), cel_query
+                )
+                self.logger.info(
+                    "Filtered alerts",
+                    extra={"preset_id": preset_id, "time": time.time() - start},
+                )
+                matches = {alert.fingerprint for alert in filtered_alerts}
+            state.presets[preset_id] = (cel_query, matches)
+
+    def _set_alert(self, state: TenantPresetsState, alert: AlertDto):
+        fingerprint = alert.fingerprint
+        state.alerts[fingerprint] = alert
+        for fingerprints in (
+            state.active,
+            state.dismissed,
+            state.groups,
+            state.firing,
+            state.noisy,
+        ):
+            fingerprints.discard(fingerprint)
+        if alert.dismissed:
+            state.dismissed.add(fingerprint)
+        if alert.group:
+            state.groups.add(fingerprint)
+        if alert.deleted or alert.dismissed:
+            return
+        state.active.add(fingerprint)
+        if alert.status == AlertStatus.FIRING.value:
+            state.firing.add(fingerprint)
+            if alert.isNoisy:
+                state.noisy.add(fingerprint)
+
+    def _to_dto(self, state: TenantPresetsState, preset) -> PresetDto:
+        preset_dto = PresetDto(**preset.dict())
+        if not preset_dto.cel_query:
+            self.logger.warning("No CEL query found in preset options")
+            return preset_dto
+        _, matches = state.presets[str(preset.id)]
+        preset_dto.alerts_count = len(matches)
+        # noisy presets make noise when any of their alerts is firing, other
+        #   presets make noise when any of their firing alerts is noisy
+        noise_makers = state.firing if preset.is_noisy else state.noisy
+        if not matches.isdisjoint(noise_makers):
+            preset_dto.should_do_noise_now = True
+        return preset_dto
+
+    def _static_presets_dto(self, state: TenantPresetsState) -> list[PresetDto]:
+        feed_preset = PresetDto(
+            id=StaticPresetsId.FEED_PRESET_ID.value,
+            name="feed",
+            options=[],
+            created_by=None,
+            is_private=False,
+            is_noisy=False,
+            should_do_noise_now=bool(state.noisy),
+            alerts_count=len(state.active),
+        )
+        dismissed_preset = PresetDto(
+            id=StaticPresetsId.DISMISSED_PRESET_ID.value,
+            name="dismissed",
+            options=[],
+            created_by=None,
+            is_private=False,
+            is_noisy=False,
+            should_do_noise_now=False,
+            alerts_count=len(state.dismissed),
+        )
+        groups_preset = PresetDto(
+            id=StaticPresetsId.GROUPS_PRESET_ID.value,
+            name="groups",
+            options=[],
+            created_by=None,
+            is_private=False,
+            is_noisy=False,
+            should_do_noise_now=False,
+            alerts_count=len(state.groups),
+        )
+        return [feed_preset, dismissed_preset, groups_preset]
@@ -5,7 +5,7 @@ import os
 import random
 import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 from uuid import uuid4
 
 import pymysql
@@ -100,6 +100,10 @@ load_dotenv(find_dotenv())
 db_connection_string = config("DATABASE_CONNECTION_STRING", default=None)
 pool_size = config("DATABASE_POOL_SIZE", default=5, cast=int)
 max_overflow = config("DATABASE_MAX_OVERFLOW", default=10, cast=int)
+# the mapping rules rows are inserted and read in chunks of this size
+MAPPING_RULE_ROWS_CHUNK_SIZE = config(
+    "KEEP_MAPPING_RULE_ROWS_CHUNK_SIZE", default=1000, cast=int
+)
 
 
 def dumps(_json) -> str:
@@ -162,6 +166,10 @@ def create_db_and_tables():
         pass
 
     SQLModel.metadata.create_all(engine)
+    try:
+        migrate_mapping_rules_rows()
+    except Exception:
+        logger.exception("Failed to move the mapping rules rows")
 
 
 def get_session() -> Session:
@@ -272,6 +280,136 @@ def create_workflow_execution(
             raise
 
 
+def enqueue_workflow_run(
+    tenant_id: str,
+    workflow_id: str,
+    triggered_by: str,
+    event: dict,
+    workflow_execution_id: str = None,
+    triggered_by_user: str = None,
+) -> str:
+    with Session(engine) as session:
+        queued_run = QueuedWorkflowRun(
+            tenant_id=tenant_id,
+            workflow_id=workflow_id,
+            triggered_by=triggered_by,
+            event=event,
+            workflow_execution_id=workflow_execution_id,
+            triggered_by_user=triggered_by_user,
+        )
+        session.add(queued_run)
+        session.commit()
+        return queued_run.id
+
+
+def claim_workflow_runs(
+    worker_id: str, limit: int, lease_seconds: int
+) -> List[QueuedWorkflowRun]:
+    """
+    Claim the oldest queued runs that are not claimed (or whose lease expired).
+
+    Args:
+        worker_id (str): the id of the claiming worker.
+        limit (int): the maximum number of runs to claim.
+        lease_seconds (int): how long the runs are owned by the worker.
+
+    Returns:
+        List[QueuedWorkflowRun]: the claimed runs.
+    """
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        query = (
+            select(QueuedWorkflowRun)
+            .where(
+                or_(
+                    QueuedWorkflowRun.lease_expires_at == None,
+                    QueuedWorkflowRun.lease_expires_at < now,
+                )
+            )
+            .order_by(QueuedWorkflowRun.created_at)
+            .limit(limit)
+        )
+        # skip the runs that other workers are claiming right now
+        if session.bind.dialect.name in ["mysql", "postgresql"]:
+            query = query.with_for_update(skip_locked=True)
+        queued_runs = session.exec(query).all()
+        claimed_ids = []
+        for queued_run in queued_runs:
+            # without row locking (sqlite) two workers can select the same run,
+            #   only the one that updates the lease it has seen claims it
+            result = session.execute(
+                update(QueuedWorkflowRun)
+                .where(QueuedWorkflowRun.id == queued_run.id)
+                .where(
+                    QueuedWorkflowRun.lease_expires_at == queued_run.lease_expires_at
+                )
+                .values(
+                    claimed_by=worker_id,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                )
+            )
+            if result.rowcount == 1:
+                claimed_ids.append(queued_run.id)
+        session.commit()
+        if not claimed_ids:
+            return []
+        return session.exec(
+            select(QueuedWorkflowRun)
+            .where(QueuedWorkflowRun.id.in_(claimed_ids))
+            .order_by(QueuedWorkflowRun.created_at)
+        ).all()
+
+
+def renew_workflow_runs_lease(
+    worker_id: str, queued_run_ids: List[str], lease_seconds: int
+) -> int:
+    """
+    Extend the lease of the runs the worker claimed and didn't finish yet.
+
+    Args:
+        worker_id (str): the id of the worker that claimed the runs.
+        queued_run_ids (List[str]): the runs to renew.
+        lease_seconds (int): how long the runs are owned by the worker from now.
+
+    Returns:
+        int: the number of renewed runs (runs claimed by another worker are not renewed).
+    """
+    if not queued_run_ids:
+        return 0
+    with Session(engine) as session:
+        result = session.execute(
+            update(QueuedWorkflowRun)
+            .where(QueuedWorkflowRun.id.in_(queued_run_ids))
+            .where(QueuedWorkflowRun.claimed_by == worker_id)
+            .values(
+                lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds)
+            )
+        )
+        session.commit()
+        return result.rowcount
+
+
+def release_workflow_run(queued_run_id: str, retry: bool = False):
+    """
+    Put a claimed run back in the queue.
+    """
+    with Session(engine) as session:
+        session.execute(
+            update(QueuedWorkflowRun)
+            .where(QueuedWorkflowRun.id == queued_run_id)
+            .values(claimed_by=None, lease_expires_at=None, retry=retry)
+        )
+        session.commit()
+
+
+def delete_workflow_run(queued_run_id: str):
+    with Session(engine) as session:
+        queued_run = session.get(QueuedWorkflowRun, queued_run_id)
+        if queued_run:
+            session.delete(queued_run)
+            session.commit()
+
+
 def get_mapping_rule_by_id(tenant_id: str, rule_id: str) -> MappingRule | None:
     rule = None
     with Session(engine) as session:
@@ -284,6 +422,85 @@ def get_mapping_rule_by_id(tenant_id: str, rule_id: str) -> MappingRule | None:
     return rule
 
 
+def get_mapping_rule_rows(rule: MappingRule) -> list[dict]:
+    """
+    Get the rows of a mapping rule, in their order.
+    """
+    # rules created before MappingRuleRow keep their rows in the rule
+    if rule.rows:
+        return rule.rows
+    with Session(engine) as session:
+        return [
+            data
+            for (data,) in session.query(MappingRuleRow.data)
+            .filter(MappingRuleRow.rule_id == rule.id)
+            .order_by(MappingRuleRow.row_index)
+            .yield_per(MAPPING_RULE_ROWS_CHUNK_SIZE)
+        ]
+
+
+def set_mapping_rule_rows(
+    session: Session, rule: MappingRule, rows: Iterable[dict]
+) -> tuple[int, dict | None]:
+    """
+    Replace the rows of a mapping rule (without committing), the rows are
+    inserted in chunks so a streamed file is never loaded as a whole.
+
+    Returns:
+        tuple[int, dict | None]: the number of rows and the first row.
+    """
+    session.query(MappingRuleRow).filter(MappingRuleRow.rule_id == rule.id).delete(
+        synchronize_session=False
+    )
+    rule.rows = []
+    rows_count = 0
+    first_row = None
+    chunk = []
+    for row in rows:
+        if first_row is None:
+            first_row = row
+        chunk.append({"rule_id": rule.id, "row_index": rows_count, "data": row})
+        rows_count += 1
+        if len(chunk) >= MAPPING_RULE_ROWS_CHUNK_SIZE:
+            session.execute(MappingRuleRow.__table__.insert(), chunk)
+            chunk = []
+    if chunk:
+        session.execute(MappingRuleRow.__table__.insert(), chunk)
+    return rows_count, first_row
+
+
+def get_mapping_rules_first_rows(
+    session: Session, rules: list[MappingRule]
+) -> dict[int, dict]:
+    """
+    Get the first row of each of the rules (its keys are the rule's columns)
+    without reading the other rows.
+    """
+    first_rows = {rule.id: rule.rows[0] for rule in rules if rule.rows}
+    rule_ids = [rule.id for rule in rules if not rule.rows]
+    if rule_ids:
+        first_rows.update(
+            session.query(MappingRuleRow.rule_id, MappingRuleRow.data)
+            .filter(MappingRuleRow.rule_id.in_(rule_ids))
+            .filter(MappingRuleRow.row_index == 0)
+            .all()
+        )
+    return first_rows
+
+
+def migrate_mapping_rules_rows():
+    """
+    Move the rows of the mapping rules created before MappingRuleRow out of the rules.
+    """
+    with Session(engine) as session:
+        for rule in session.query(MappingRule).all():
+            if not rule.rows:
+                continue
+            logger.info("Moving mapping rule rows", extra={"rule_id": rule.id})
+            set_mapping_rule_rows(session, rule, rule.rows)
+            session.commit()
+
+
 def get_last_completed_execution(
     session: Session, workflow_id: str
 ) -> WorkflowExecution:
@@ -734,22 +951,16 @@ def get_workflow_id(tenant_id, workflow_name):
             return workflow.id
 
 
-def push_logs_to_db(log_entries):
-    db_log_entries = [
-        WorkflowExecutionLog(
-            workflow_execution_id=log_entry["workflow_execution_id"],
-            timestamp=datetime.strptime(log_entry["asctime"], "%Y-%m-%d %H:%M:%S,%f"),
-            message=log_entry["message"][0:255],  # limit the message to 255 chars
-            context=json.loads(
-                json.dumps(log_entry.get("context", {}), default=str)
-            ),  # workaround to serialize any object
-        )
-        for log_entry in log_entries
-    ]
+def push_logs_to_db(log_entries: List[dict]):
+    """
+    Bulk insert workflow execution logs.
 
-    # Add the LogEntry instances to the database session
+    Args:
+        log_entries (List[dict]): the logs, with workflow_execution_id,
+            timestamp, message and context.
+    """
     with Session(engine) as session:
-        session.add_all(db_log_entries)
+        session.bulk_insert_mappings(WorkflowExecutionLog, log_entries)
         session.commit()
 
 
@@ -1475,6 +1686,26 @@ def get_last_alert_hash_by_fingerprint(tenant_id, fingerprint):
     return alert_hash
 
 
+def get_last_alert_hashes(limit=100000) -> List[Tuple[str, str, str]]:
+    """
+    Get the (tenant_id, fingerprint, alert_hash) of the most recent alerts.
+
+    Args:
+        limit (int, optional): The maximum number of alerts to return. Defaults to 100000.
+
+    Returns:
+        List[Tuple[str, str, str]]: The alert hashes ordered from the newest to the oldest.
+    """
+    with Session(engine) as session:
+        alert_hashes = session.exec(
+            select(Alert.tenant_id, Alert.fingerprint, Alert.alert_hash)
+            .where(Alert.alert_hash != None)
+            .order_by(Alert.timestamp.desc())
+            .limit(limit)
+        ).all()
+    return alert_hashes
+
+
 def update_key_last_used(
     tenant_id: str,
     reference_id: str,
@@ -1,33 +1,158 @@
 import copy
+import datetime
 import inspect
+import json
 import logging
 import logging.config
 import os
+import queue
+import threading
+import time
 
 # tb: small hack to avoid the InsecureRequestWarning logs
 import urllib3
 
 from keep.api.consts import RUNNING_IN_CLOUD_RUN
+from keep.api.core.config import config
 from keep.api.core.db import push_logs_to_db
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+logger = logging.getLogger(__name__)
+
 
 class WorkflowDBHandler(logging.Handler):
-    def __init__(self):
+    """
+    Buffers the logs of each workflow execution and writes them to the DB in
+    batches from a background thread, so the workflows don't wait for the DB.
+
+    The logs of an execution are written once `batch_size` logs are buffered,
+    every `flush_interval` seconds, and when the execution is dumped.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = config(
+            "KEEP_WORKFLOW_LOGS_BATCH_SIZE", default=100, cast=int
+        ),
+        flush_interval: float = config(
+            "KEEP_WORKFLOW_LOGS_FLUSH_INTERVAL", default=1.0, cast=float
+        ),
+        max_message_length: int = config(
+            "KEEP_WORKFLOW_LOGS_MAX_MESSAGE_LENGTH", default=16000, cast=int
+        ),
+    ):
         super().__init__()
-        self.records = []
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_message_length = max_message_length
+        # workflow execution id -> buffered log entries
+        self._buffers: dict[str, list[dict]] = {}
+        # batches that are waiting to be written, with an event to set once written
+        self._batches = queue.Queue()
+        self._buffers_lock = threading.Lock()
+        self._writer = None
+        self._writer_pid = None
 
     def emit(self, record):
         # we want to push only workflow logs to the DB
-        if hasattr(record, "workflow_execution_id") and record.workflow_execution_id:
-            self.records.append(record)
+        if not getattr(record, "workflow_execution_id", None):
+            return
+        try:
+            log_entry = self._to_log_entry(record)
+        except Exception:
+            self.handleError(record)
+            return
+        batch = None
+        with self._buffers_lock:
+            buffer = self._buffers.setdefault(record.workflow_execution_id, [])
+            buffer.append(log_entry)
+            if len(buffer) >= self.batch_size:
+                batch = self._buffers.pop(record.workflow_execution_id)
+        if batch:
+            self._write(batch)
+
+    def push_logs_to_db(self, workflow_execution_id=None, wait=False):
+        """
+        Write the buffered logs of an execution (or of all the executions).
 
-    def push_logs_to_db(self):
-        # Convert log records to a list of dictionaries and clean the self.records buffer
-        log_entries, self.records = [record.__dict__ for record in self.records], []
-        # Push log entries to the database
-        push_logs_to_db(log_entries)
+        Args:
+            workflow_execution_id (str, optional): the execution to write.
+            wait (bool, optional): wait until the logs are written.
+        """
+        # the batches are written in order, so once this one is written the
+        #   previous logs of the execution are written too
+        written = self._write(self._take_buffered_logs(workflow_execution_id))
+        if wait:
+            written.wait()
+
+    def flush(self):
+        # called on shutdown, don't wait forever if the writer is gone
+        written = self._write(self._take_buffered_logs())
+        written.wait(timeout=5)
+
+    def _take_buffered_logs(self, workflow_execution_id=None) -> list[dict]:
+        with self._buffers_lock:
+            if workflow_execution_id:
+                return self._buffers.pop(workflow_execution_id, [])
+            buffers, self._buffers = self._buffers, {}
+        return [log for buffer in buffers.values() for log in buffer]
+
+    def _to_log_entry(self, record) -> dict:
+        message = record.getMessage()
+        # the message column is TEXT, keep it within its limit (64kb on mysql)
+        if len(message) > self.max_message_length:
+            message = message[: self.max_message_length]
+        return {
+            "workflow_execution_id": record.workflow_execution_id,
+            "timestamp": datetime.datetime.fromtimestamp(record.created),
+            "message": message,
+            # the context is serialized now since the steps context keeps changing
+            "context": json.loads(
+                json.dumps(getattr(record, "context", {}), default=str)
+            ),  # workaround to serialize any object
+        }
+
+    def _write(self, batch: list[dict]) -> threading.Event:
+        written = threading.Event()
+        self._ensure_writer()
+        self._batches.put((batch, written))
+        return written
+
+    def _ensure_writer(self):
+        # the writer is started on the first log of each process (e.g. after a fork)
+        with self._buffers_lock:
+            if self._writer_pid == os.getpid() and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(
+                target=self._write_batches, name="workflow-logs-writer", daemon=True
+            )
+            self._writer_pid = os.getpid()
+            self._writer.start()
+
+    def _write_batches(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                batch, written = self._batches.get(timeout=self.flush_interval)
+            except queue.Empty:
+                batch, written = [], None
+            if time.monotonic() - last_flush >= self.flush_interval:
+                # time to write the logs that are still buffered
+                batch = batch + self._take_buffered_logs()
+                last_flush = time.monotonic()
+            try:
+                if batch:
+                    push_logs_to_db(batch)
+            except Exception:
+                # this logger has no workflow execution id, so it doesn't get here
+                logger.exception(
+                    "Failed to push workflow logs to the DB",
+                    extra={"number_of_logs": len(batch)},
+                )
+            finally:
+                if written:
+                    written.set()
 
 
 class WorkflowLoggerAdapter(logging.LoggerAdapter):
@@ -79,7 +204,7 @@ class WorkflowLoggerAdapter(logging.LoggerAdapter):
             None,
         )
         if workflow_db_handler:
-            workflow_db_handler.push_logs_to_db()
+            workflow_db_handler.push_logs_to_db(self.workflow_execution_id)
         else:
             self.logger.warning("No WorkflowDBHandler found")
         self.logger.info("Workflow logs dumped")
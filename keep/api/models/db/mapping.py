@@ -21,6 +21,7 @@ class MappingRule(SQLModel, table=True):
     # The attributes to match against (e.g. ["service","region"])
     matchers: list[str] = Field(sa_column=Column(JSON), nullable=False)
     # The rows of the CSV file [{service: "service1", region: "region1", ...}, ...]
+    # tb: rules created before MappingRuleRow have their rows here, new rules keep it empty
     rows: list[dict] = Field(
         sa_column=Column(JSON),
         nullable=False,
@@ -29,6 +30,19 @@ class MappingRule(SQLModel, table=True):
     last_updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class MappingRuleRow(SQLModel, table=True):
+    """
+    A row of a mapping rule, rows are stored out of the rule so reading the
+    rule (e.g. listing the rules) doesn't read its rows.
+    """
+
+    id: Optional[int] = Field(primary_key=True, default=None)
+    rule_id: int = Field(foreign_key="mappingrule.id", index=True)
+    # the position of the row in the CSV file, the first matching row wins
+    row_index: int = Field(nullable=False)
+    data: dict = Field(sa_column=Column(JSON), nullable=False)
+
+
 class MappRuleDtoBase(BaseModel):
     name: str
     description: Optional[str] = None
@@ -47,7 +61,8 @@ class MappingRuleDtoOut(MappRuleDtoBase, extra="ignore"):
 
 
 class MappingRuleDtoIn(MappRuleDtoBase):
-    rows: list[dict]
+    # large files can be uploaded after the rule is created (POST /mapping/{rule_id}/csv)
+    rows: list[dict] = []
 
 
 class MappingRuleDtoUpdate(MappRuleDtoBase):
@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import List, Optional
+from uuid import uuid4
 
 from sqlalchemy import TEXT
 from sqlmodel import JSON, Column, Field, Relationship, SQLModel, UniqueConstraint
@@ -78,3 +79,24 @@ class WorkflowExecutionLog(SQLModel, table=True):
 
     class Config:
         orm_mode = True
+
+
+class QueuedWorkflowRun(SQLModel, table=True):
+    """
+    An event triggered workflow run that waits to be claimed by a scheduler,
+    the run stays in the queue until it's done, so if the worker that claimed
+    it dies the run is claimed again once its lease expires.
+    """
+
+    id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
+    tenant_id: str = Field(foreign_key="tenant.id")
+    workflow_id: str = Field(foreign_key="workflow.id")
+    # manual runs are created with an execution so the caller can track them
+    workflow_execution_id: Optional[str]
+    triggered_by: str = Field(sa_column=Column(TEXT))
+    triggered_by_user: Optional[str]
+    event: dict = Field(sa_column=Column(JSON))
+    retry: bool = Field(default=False)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    claimed_by: Optional[str]
+    lease_expires_at: Optional[datetime] = Field(index=True)
@@ -18,7 +18,10 @@ from pusher import Pusher
 from sqlmodel import Session
 
 from keep.api.alert_deduplicator.alert_deduplicator import AlertDeduplicator
+from keep.api.alert_deduplicator.alert_hash_cache import AlertHashCache
+from keep.api.bl.alerts_puller import AlertsPuller, TenantPull
 from keep.api.bl.enrichments import EnrichmentsBl
+from keep.api.bl.presets_counters import PresetsCounters, TenantPresetsState
 from keep.api.core.config import config
 from keep.api.core.db import enrich_alert as enrich_alert_db
 from keep.api.core.db import (
@@ -26,6 +29,7 @@ from keep.api.core.db import (
     get_alerts_with_filters,
     get_all_presets,
     get_enrichment,
+    get_enrichments,
     get_last_alerts,
     get_session,
 )
@@ -36,7 +40,6 @@ from keep.api.core.dependencies import (
 )
 from keep.api.models.alert import (
     AlertDto,
-    AlertStatus,
     DeleteRequestBody,
     EnrichAlertRequestBody,
     SearchAlertsRequest,
@@ -45,7 +48,7 @@ from keep.api.models.db.alert import Alert, AlertRaw
 from keep.api.models.db.preset import PresetDto
 from keep.api.utils.email_utils import EmailTemplates, send_email
 from keep.api.utils.enrichment_helpers import parse_and_enrich_deleted_and_assignees
-from keep.contextmanager.contextmanager import ContextManager
+from keep.api.utils.pusher_utils import trigger_batches
 from keep.providers.providers_factory import ProvidersFactory
 from keep.rulesengine.rulesengine import RulesEngine
 from keep.workflowmanager.workflowmanager import WorkflowManager
@@ -93,6 +96,59 @@ def convert_db_alerts_to_dto_alerts(alerts: list[Alert]) -> list[AlertDto]:
     return alerts_dto
 
 
+def get_presets_state(tenant_id: str) -> TenantPresetsState | None:
+    """
+    Gets the presets counters state of the tenant, to be called before writing
+    alerts to the DB so `update_presets_counters` counts the change they make.
+    """
+    try:
+        return PresetsCounters.get_instance().get_state(tenant_id)
+    except Exception:
+        logger.exception(
+            "Failed to load presets counters", extra={"tenant_id": tenant_id}
+        )
+        return None
+
+
+def update_presets_counters(
+    tenant_id: str,
+    alerts_dto: list[AlertDto],
+    pusher_client: Pusher | None,
+    presets_state: TenantPresetsState | None = None,
+):
+    """
+    Updates the presets counters with new or enriched (e.g. dismissed or deleted)
+    alerts, and pushes the updated presets with the change of their counts to the client.
+    """
+    if not alerts_dto:
+        return
+    try:
+        presets_do_update = PresetsCounters.get_instance().update_alerts(
+            tenant_id, alerts_dto, get_all_presets(tenant_id), presets_state
+        )
+    except Exception:
+        logger.exception(
+            "Failed to update presets counters", extra={"tenant_id": tenant_id}
+        )
+        return
+    push_presets(tenant_id, presets_do_update, pusher_client)
+
+
+def push_presets(
+    tenant_id: str, presets_dto: list[PresetDto], pusher_client: Pusher | None
+):
+    # send with pusher
+    if pusher_client and presets_dto:
+        try:
+            pusher_client.trigger(
+                f"private-{tenant_id}",
+                "async-presets",
+                json.dumps([p.dict() for p in presets_dto], default=str),
+            )
+        except Exception:
+            logger.exception("Failed to send presets via pusher")
+
+
 def pull_alerts_from_providers(
     tenant_id: str, pusher_client: Pusher | None, sync: bool = False
 ) -> list[AlertDto]:
@@ -114,56 +170,82 @@ def pull_alerts_from_providers(
     if pusher_client is None and sync is False:
         raise HTTPException(500, "Cannot pull alerts async when pusher is disabled.")
 
-    context_manager = ContextManager(
-        tenant_id=tenant_id,
-        workflow_id=None,
-    )
-
     logger.info(
         f"{'Asynchronously' if sync is False else 'Synchronously'} pulling alerts from installed providers"
     )
 
-    sync_alerts = []  # if we're running in sync mode
-    for provider in ProvidersFactory.get_installed_providers(tenant_id=tenant_id):
-        provider_class = ProvidersFactory.get_provider(
-            context_manager=context_manager,
-            provider_id=provider.id,
-            provider_type=provider.type,
-            provider_config=provider.details,
+    alerts_puller = AlertsPuller.get_instance()
+    tenant_pull, started = alerts_puller.start(tenant_id, sync)
+    if not started:
+        logger.info(
+            "Joining the pull in progress", extra={"tenant_id": tenant_id, "sync": sync}
         )
-        try:
-            logger.info(
-                f"Pulling alerts from provider {provider.type} ({provider.id})",
+        # the pull in progress sends the alerts to the tenant's channel as
+        #   each provider finishes, so resend the ones that were sent before
+        #   the caller (e.g. a client that just opened the feed) joined
+        if sync is False:
+            pulled_alerts = [
+                alert.dict()
+                for pull_result in list(tenant_pull.results)
+                for alert in pull_result.alerts
+            ]
+            if pulled_alerts:
+                trigger_batches(
+                    pusher_client,
+                    f"private-{tenant_id}",
+                    "async-alerts",
+                    pulled_alerts,
+                )
+            return []
+        return [
+            alert
+            for pull_result in tenant_pull.wait(timeout=alerts_puller.budget)
+            for alert in pull_result.alerts
+        ]
+    try:
+        return _pull_alerts_from_providers(tenant_id, pusher_client, sync, tenant_pull)
+    finally:
+        alerts_puller.finish(tenant_id, sync, tenant_pull)
+
+
+def _pull_alerts_from_providers(
+    tenant_id: str, pusher_client: Pusher | None, sync: bool, tenant_pull: TenantPull
+) -> list[AlertDto]:
+    sync_alerts = []  # if we're running in sync mode
+    installed_providers = ProvidersFactory.get_installed_providers(tenant_id=tenant_id)
+    # the providers are pulled concurrently, each one is handled as soon as it's done
+    for pull_result in AlertsPuller.get_instance().pull(tenant_id, installed_providers):
+        tenant_pull.results.append(pull_result)
+        provider = pull_result.provider
+        if pull_result.error:
+            logger.warning(
+                f"Could not fetch alerts from provider due to {pull_result.error}",
                 extra={
-                    "provider_type": provider.type,
                     "provider_id": provider.id,
+                    "provider_type": provider.type,
                     "tenant_id": tenant_id,
+                    "elapsed": pull_result.elapsed,
                 },
             )
-            sorted_provider_alerts_by_fingerprint = (
-                provider_class.get_alerts_by_fingerprint(tenant_id=tenant_id)
-            )
+            continue
+        try:
+            last_alerts = pull_result.alerts
             logger.info(
                 f"Pulled alerts from provider {provider.type} ({provider.id})",
                 extra={
                     "provider_type": provider.type,
                     "provider_id": provider.id,
                     "tenant_id": tenant_id,
-                    "number_of_fingerprints": len(
-                        sorted_provider_alerts_by_fingerprint.keys()
-                    ),
+                    "number_of_fingerprints": len(last_alerts),
+                    "elapsed": pull_result.elapsed,
                 },
             )
 
-            if sorted_provider_alerts_by_fingerprint:
-                last_alerts = [
-                    alerts[0]
-                    for alerts in sorted_provider_alerts_by_fingerprint.values()
-                ]
+            if last_alerts:
                 if sync:
                     sync_alerts.extend(last_alerts)
                     logger.info(
-                        f"Pulled alerts from provider {provider.type} ({provider.id}) (alerts: {len(sorted_provider_alerts_by_fingerprint)})",
+                        f"Pulled alerts from provider {provider.type} ({provider.id}) (alerts: {len(last_alerts)})",
                         extra={
                             "provider_type": provider.type,
                             "provider_id": provider.id,
@@ -173,100 +255,30 @@ def pull_alerts_from_providers(
                     continue
 
                 logger.info("Batch sending pulled alerts via pusher")
-                batch_send = []
-                previous_compressed_batch = ""
-                new_compressed_batch = ""
-                number_of_alerts_in_batch = 0
-                # tb: this might be too slow in the future and we might need to refactor
-                for alert in last_alerts:
-                    alert_dict = alert.dict()
-                    batch_send.append(alert_dict)
-                    new_compressed_batch = json.dumps(batch_send)
-                    if len(new_compressed_batch) <= 10240:
-                        number_of_alerts_in_batch += 1
-                        previous_compressed_batch = new_compressed_batch
-                    elif pusher_client:
-                        pusher_client.trigger(
-                            f"private-{tenant_id}",
-                            "async-alerts",
-                            previous_compressed_batch,
-                        )
-                        batch_send = [alert_dict]
-                        new_compressed_batch = ""
-                        number_of_alerts_in_batch = 1
-
-                # this means we didn't get to this ^ else statement and loop ended
-                #   so we need to send the rest of the alerts
-                if (
-                    new_compressed_batch
-                    and len(new_compressed_batch) < 10240
-                    and pusher_client
-                ):
-                    pusher_client.trigger(
+                if pusher_client:
+                    trigger_batches(
+                        pusher_client,
                         f"private-{tenant_id}",
                         "async-alerts",
-                        new_compressed_batch,
+                        [alert.dict() for alert in last_alerts],
                     )
                 logger.info("Sent batch of pulled alerts via pusher")
-                # Also update the presets
+                # Also update the presets (the pulled alerts are not persisted,
+                #   so they make noise but don't change the counts)
                 try:
-                    presets = get_all_presets(tenant_id)
-                    presets_do_update = []
-                    for preset in presets:
-                        # filter the alerts based on the search query
-                        preset_dto = PresetDto(**preset.dict())
-                        filtered_alerts = RulesEngine.filter_alerts(
-                            last_alerts, preset_dto.cel_query
+                    presets_do_update = (
+                        PresetsCounters.get_instance().get_pulled_presets_dto(
+                            last_alerts, get_all_presets(tenant_id)
                         )
-                        # if not related alerts, no need to update
-                        if not filtered_alerts:
-                            continue
-                        presets_do_update.append(preset_dto)
-                        preset_dto.alerts_count = len(filtered_alerts)
-                        # update noisy
-                        if preset.is_noisy:
-                            firing_filtered_alerts = list(
-                                filter(
-                                    lambda alert: alert.status
-                                    == AlertStatus.FIRING.value,
-                                    filtered_alerts,
-                                )
-                            )
-                            # if there are firing alerts, then do noise
-                            if firing_filtered_alerts:
-                                logger.info("Noisy preset is noisy")
-                                preset_dto.should_do_noise_now = True
-                        # else if at least one of the alerts has .isNoisy
-                        elif any(
-                            alert.isNoisy and alert.status == AlertStatus.FIRING.value
-                            for alert in filtered_alerts
-                            if hasattr(alert, "isNoisy")
-                        ):
-                            logger.info("Noisy preset is noisy")
-                            preset_dto.should_do_noise_now = True
-                    # send with pusher
-                    if pusher_client:
-                        try:
-                            pusher_client.trigger(
-                                f"private-{tenant_id}",
-                                "async-presets",
-                                json.dumps(
-                                    [p.dict() for p in presets_do_update], default=str
-                                ),
-                            )
-                        except Exception:
-                            logger.exception("Failed to send presets via pusher")
+                    )
+                    push_presets(tenant_id, presets_do_update, pusher_client)
                 except Exception:
                     logger.exception(
                         "Failed to send presets via pusher",
-                        extra={
-                            "provider_type": provider.type,
-                            "provider_id": provider.id,
-                            "tenant_id": tenant_id,
-                        },
+                        extra={"tenant_id": tenant_id},
                     )
             logger.info(
-                f"Pulled alerts from provider {provider.type} ({provider.id}) (alerts: {len(sorted_provider_alerts_by_fingerprint)})",
+                f"Pulled alerts from provider {provider.type} ({provider.id}) (alerts: {len(last_alerts)})",
                 extra={
                     "provider_type": provider.type,
                     "provider_id": provider.id,
@@ -381,6 +393,7 @@ def get_alert_history(
 def delete_alert(
     delete_alert: DeleteRequestBody,
     authenticated_entity: AuthenticatedEntity = Depends(AuthVerifier(["delete:alert"])),
+    pusher_client: Pusher | None = Depends(get_pusher_client),
 ) -> dict[str, str]:
     tenant_id = authenticated_entity.tenant_id
     user_email = authenticated_entity.email
@@ -421,6 +434,7 @@ def delete_alert(
         # auto-assign the deleting user to the alert
         assignees_last_receievd[delete_alert.lastReceived] = user_email
 
+    presets_state = get_presets_state(tenant_id)
     # overwrite the enrichment
     enrich_alert_db(
         tenant_id=tenant_id,
@@ -431,6 +445,20 @@ def delete_alert(
         },
     )
 
+    # the alert was deleted/restored, so the presets counters should be updated
+    try:
+        alert = get_alerts_by_fingerprint(tenant_id, delete_alert.fingerprint, limit=1)
+        update_presets_counters(
+            tenant_id,
+            convert_db_alerts_to_dto_alerts(alert),
+            pusher_client,
+            presets_state,
+        )
+    except Exception:
+        logger.exception(
+            "Failed to update presets counters", extra={"tenant_id": tenant_id}
+        )
+
     logger.info(
         "Deleted alert successfully",
         extra={
@@ -526,7 +554,16 @@ def handle_formatted_events(
     formatted_events: list[AlertDto],
     pusher_client: Pusher,
     provider_id: str | None = None,
+    raise_on_error: bool = False,
 ):
+    """
+    Deduplicate, persist and enrich the formatted events, then run the
+    workflows and rules of the new alerts and notify the clients.
+
+    Args:
+        raise_on_error (bool, optional): raise if the alerts could not be
+            persisted (so the caller can retry them) instead of only logging it.
+    """
     logger.info(
         "Asyncronusly adding new alerts to the DB",
         extra={
@@ -549,6 +586,8 @@ def handle_formatted_events(
         filter(lambda event: not event.isDuplicate, formatted_events)
     )
 
+    enriched_formatted_events = []
+    presets_state = None
     try:
         # keep raw events in the DB if the user wants to
         # this is mainly for debugging and research purposes
@@ -559,11 +598,14 @@ def handle_formatted_events(
                     raw_alert=raw_event,
                 )
                 session.add(alert)
-        enriched_formatted_events = []
+        # the enrichments business logic caches the extraction/mapping rules,
+        #   so one instance per batch means the rules are loaded once per batch
+        enrichments_bl = EnrichmentsBl(tenant_id, session)
+        alerts = []
+        processed_events = []
         for formatted_event in formatted_events:
             formatted_event.pushed = True
 
-            enrichments_bl = EnrichmentsBl(tenant_id, session)
             # Post format enrichment
             try:
                 formatted_event = enrichments_bl.run_extraction_rules(formatted_event)
@@ -594,37 +636,60 @@ def handle_formatted_events(
                 fingerprint=formatted_event.fingerprint,
                 alert_hash=formatted_event.alert_hash,
             )
-            session.add(alert)
-            session.flush()
-            session.refresh(alert)
+            # the id is generated client side, so there is no need to refresh the row
             formatted_event.event_id = str(alert.id)
-            alert_dto = AlertDto(**formatted_event.dict())
+            alerts.append(alert)
+            processed_events.append(formatted_event)
+
+        # the presets counters count the change the alerts make to the DB
+        presets_state = get_presets_state(tenant_id)
+        # insert all the alerts of the batch in one go and release the
+        #   connection before running the (slower) mapping and enrichment steps
+        session.add_all(alerts)
+        session.commit()
+        # the inserted alerts are now the last alerts of their fingerprints
+        alert_hash_cache = AlertHashCache.get_instance()
+        for formatted_event in processed_events:
+            alert_hash_cache.set(
+                tenant_id, formatted_event.fingerprint, formatted_event.alert_hash
+            )
 
-            # Mapping
+        alerts_dto = [
+            AlertDto(**formatted_event.dict()) for formatted_event in processed_events
+        ]
+        # Mapping
+        for alert_dto in alerts_dto:
             try:
                 enrichments_bl.run_mapping_rules(alert_dto)
             except Exception:
                 logger.exception("Failed to run mapping rules")
 
-            alert_enrichment = get_enrichment(
-                tenant_id=tenant_id, fingerprint=formatted_event.fingerprint
+        # fetch the enrichments of the whole batch (after mapping) with one query
+        alerts_enrichments = {
+            alert_enrichment.alert_fingerprint: alert_enrichment
+            for alert_enrichment in get_enrichments(
+                tenant_id=tenant_id,
+                fingerprints=list(
+                    set(alert_dto.fingerprint for alert_dto in alerts_dto)
+                ),
             )
+        }
+        for alert_dto in alerts_dto:
+            alert_enrichment = alerts_enrichments.get(alert_dto.fingerprint)
             if alert_enrichment:
                 for enrichment in alert_enrichment.enrichments:
                     # set the enrichment
                     value = alert_enrichment.enrichments[enrichment]
                     setattr(alert_dto, enrichment, value)
-            if pusher_client:
-                try:
-                    pusher_client.trigger(
-                        f"private-{tenant_id}",
-                        "async-alerts",
-                        json.dumps([alert_dto.dict()]),
-                    )
-                except Exception:
-                    logger.exception("Failed to push alert to the client")
             enriched_formatted_events.append(alert_dto)
         session.commit()
+        if pusher_client:
+            trigger_batches(
+                pusher_client,
+                f"private-{tenant_id}",
+                "async-alerts",
+                [alert_dto.dict() for alert_dto in enriched_formatted_events],
+            )
         logger.info(
             "Asyncronusly added new alerts to the DB",
             extra={
@@ -644,6 +709,8 @@ def handle_formatted_events(
                 "tenant_id": tenant_id,
             },
         )
+        if raise_on_error:
+            raise
     try:
         # Now run any workflow that should run based on this alert
         # TODO: this should publish event
@@ -674,16 +741,13 @@ def handle_formatted_events(
             logger.info("Added group alerts to the workflow manager queue")
             # Now send the grouped alerts to the client
             logger.info("Sending grouped alerts to the client")
-            for grouped_alert in grouped_alerts:
-                if pusher_client:
-                    try:
-                        pusher_client.trigger(
-                            f"private-{tenant_id}",
-                            "async-alerts",
-                            json.dumps([grouped_alert.dict()]),
-                        )
-                    except Exception:
-                        logger.exception("Failed to push alert to the client")
+            if pusher_client:
+                trigger_batches(
+                    pusher_client,
+                    f"private-{tenant_id}",
+                    "async-alerts",
+                    [grouped_alert.dict() for grouped_alert in grouped_alerts],
+                )
             logger.info("Sent grouped alerts to the client")
     except Exception:
         logger.exception(
@@ -696,60 +760,10 @@ def handle_formatted_events(
             },
         )
     # Now we need to update the presets
-    try:
-        presets = get_all_presets(tenant_id)
-        presets_do_update = []
-        for preset in presets:
-            # filter the alerts based on the search query
-            preset_dto = PresetDto(**preset.dict())
-            filtered_alerts = RulesEngine.filter_alerts(
-                enriched_formatted_events, preset_dto.cel_query
-            )
-            # if not related alerts, no need to update
-            if not filtered_alerts:
-                continue
-            presets_do_update.append(preset_dto)
-            preset_dto.alerts_count = len(filtered_alerts)
-            # update noisy
-            if preset.is_noisy:
-                firing_filtered_alerts = list(
-                    filter(
-                        lambda alert: alert.status == AlertStatus.FIRING.value,
-                        filtered_alerts,
-                    )
-                )
-                # if there are firing alerts, then do noise
-                if firing_filtered_alerts:
-                    logger.info("Noisy preset is noisy")
-                    preset_dto.should_do_noise_now = True
-            # else if at least one of the alerts has isNoisy and should fire:
-            elif any(
-                alert.isNoisy and alert.status == AlertStatus.FIRING.value
-                for alert in filtered_alerts
-                if hasattr(alert, "isNoisy")
-            ):
-                logger.info("Noisy preset is noisy")
-                preset_dto.should_do_noise_now = True
-        # send with pusher
-        if pusher_client:
-            try:
-                pusher_client.trigger(
-                    f"private-{tenant_id}",
-                    "async-presets",
-                    json.dumps([p.dict() for p in presets_do_update], default=str),
-                )
-            except Exception:
-                logger.exception("Failed to send presets via pusher")
-    except Exception:
-        logger.exception(
-            "Failed to send presets via pusher",
-            extra={
-                "provider_type": provider_type,
-                "num_of_alerts": len(formatted_events),
-                "provider_id": provider_id,
-                "tenant_id": tenant_id,
-            },
-        )
+    update_presets_counters(
+        tenant_id, enriched_formatted_events, pusher_client, presets_state
+    )
+    return enriched_formatted_events
 
 
 @router.post(
@@ -780,7 +794,11 @@ async def receive_generic_event(
     enrichments_bl = EnrichmentsBl(tenant_id, session)
     # Pre format enrichment
     try:
-        event = enrichments_bl.run_extraction_rules(event)
+        if isinstance(event, list):
+            # batches pushed by the consumer providers
+            event = [enrichments_bl.run_extraction_rules(_event) for _event in event]
+        else:
+            event = enrichments_bl.run_extraction_rules(event)
     except Exception:
         logger.exception("Failed to run pre-formatting extraction rules")
 
@@ -999,6 +1017,7 @@ def enrich_alert(
     )
 
     try:
+        presets_state = get_presets_state(tenant_id)
         enrich_alert_db(
             tenant_id=tenant_id,
             fingerprint=enrich_data.fingerprint,
@@ -1015,6 +1034,9 @@ def enrich_alert(
             return {"status": "failed"}
 
         enriched_alerts_dto = convert_db_alerts_to_dto_alerts(alert)
+        update_presets_counters(
+            tenant_id, enriched_alerts_dto, pusher_client, presets_state
+        )
         # use pusher to push the enriched alert to the client
         if pusher_client:
             logger.info("Pushing enriched alert to the client")
@@ -4,6 +4,10 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session
 
+from keep.api.bl.extraction_rules_engine import (
+    ExtractionRulesEngine,
+    validate_extraction_rule,
+)
 from keep.api.core.db import get_session
 from keep.api.core.dependencies import AuthenticatedEntity, AuthVerifier
 from keep.api.models.db.extraction import (
@@ -17,6 +21,13 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def _validate_rule(rule_dto: ExtractionRuleDtoBase):
+    try:
+        validate_extraction_rule(rule_dto.regex, rule_dto.attribute, rule_dto.condition)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("", description="Get all extraction rules")
 def get_extraction_rules(
     authenticated_entity: AuthenticatedEntity = Depends(
@@ -42,6 +53,7 @@ def create_extraction_rule(
     session: Session = Depends(get_session),
 ) -> ExtractionRuleDtoOut:
     logger.info("Creating a new extraction rule")
+    _validate_rule(rule_dto)
     new_rule = ExtractionRule(
         **rule_dto.dict(),
         created_by=authenticated_entity.email,
@@ -50,6 +62,7 @@ def create_extraction_rule(
     session.add(new_rule)
     session.commit()
     session.refresh(new_rule)
+    ExtractionRulesEngine.get_instance().invalidate(authenticated_entity.tenant_id)
     return ExtractionRuleDtoOut(**new_rule.dict())
 
 
@@ -63,6 +76,7 @@ def update_extraction_rule(
     session: Session = Depends(get_session),
 ) -> ExtractionRuleDtoOut:
     logger.info("Updating an extraction rule")
+    _validate_rule(rule_dto)
     rule: ExtractionRule | None = (
         session.query(ExtractionRule)
         .filter(
@@ -80,6 +94,7 @@ def update_extraction_rule(
     rule.updated_at = datetime.datetime.now(datetime.timezone.utc)
     session.commit()
     session.refresh(rule)
+    ExtractionRulesEngine.get_instance().invalidate(authenticated_entity.tenant_id)
     return ExtractionRuleDtoOut(**rule.dict())
 
 
@@ -104,4 +119,5 @@ def delete_extraction_rule(
         raise HTTPException(status_code=404, detail="Extraction rule not found")
     session.delete(rule)
     session.commit()
+    ExtractionRulesEngine.get_instance().invalidate(authenticated_entity.tenant_id)
     return {"message": "Extraction rule deleted successfully"}
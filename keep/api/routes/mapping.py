@@ -1,10 +1,17 @@
+import csv
 import datetime
+import io
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
 from sqlmodel import Session
 
-from keep.api.core.db import get_session
+from keep.api.bl.mapping_rules_index import MappingRulesIndex
+from keep.api.core.db import (
+    get_mapping_rules_first_rows,
+    get_session,
+    set_mapping_rule_rows,
+)
 from keep.api.core.dependencies import AuthenticatedEntity, AuthVerifier
 from keep.api.models.db.mapping import (
     MappingRule,
@@ -33,10 +40,14 @@ def get_rules(
 
     rules_dtos = []
     if rules:
+        # the attributes are the columns of the first row, the other rows are not read
+        first_rows = get_mapping_rules_first_rows(session, rules)
         for rule in rules:
             rule_dto = MappingRuleDtoOut(**rule.dict())
             rule_dto.attributes = [
-                key for key in rule.rows[0].keys() if key not in rule.matchers
+                key
+                for key in first_rows.get(rule.id, {}).keys()
+                if key not in rule.matchers
             ]
             rules_dtos.append(rule_dto)
 
@@ -55,13 +66,19 @@ def create_rule(
 ) -> MappingRule:
     logger.info("Creating a new mapping rule")
     new_rule = MappingRule(
-        **rule.dict(),
+        **rule.dict(exclude={"rows"}),
+        rows=[],
         tenant_id=authenticated_entity.tenant_id,
         created_by=authenticated_entity.email,
     )
     session.add(new_rule)
+    # the rule's id is needed for its rows
+    session.flush()
+    set_mapping_rule_rows(session, new_rule, rule.rows)
     session.commit()
     session.refresh(new_rule)
+    # build the rule's index now so the first enriched alert doesn't pay for it
+    MappingRulesIndex.get_instance().get_index(new_rule)
     logger.info("Created a new mapping rule", extra={"rule_id": new_rule.id})
     return new_rule
 
@@ -81,8 +98,10 @@ def delete_rule(
     )
     if rule is None:
         raise HTTPException(status_code=404, detail="Rule not found")
+    set_mapping_rule_rows(session, rule, [])
     session.delete(rule)
     session.commit()
+    MappingRulesIndex.get_instance().invalidate(rule_id)
     logger.info("Deleted a mapping rule", extra={"rule_id": rule_id})
     return {"message": "Rule deleted successfully"}
 
@@ -111,13 +130,72 @@ def update_rule(
     existing_rule.priority = rule.priority
     existing_rule.updated_by = authenticated_entity.email
     existing_rule.last_updated_at = datetime.datetime.now(tz=datetime.timezone.utc)
+    first_row = None
     if rule.rows is not None:
-        existing_rule.rows = rule.rows
+        _, first_row = set_mapping_rule_rows(session, existing_rule, rule.rows)
     session.commit()
     session.refresh(existing_rule)
+    # the index of the previous version is dropped and the new one is built
+    MappingRulesIndex.get_instance().invalidate(existing_rule.id)
+    MappingRulesIndex.get_instance().get_index(existing_rule)
     response = MappingRuleDtoOut(**existing_rule.dict())
-    if rule.rows is not None:
+    if first_row is not None:
         response.attributes = [
-            key for key in existing_rule.rows[0].keys() if key not in rule.matchers
+            key for key in first_row.keys() if key not in rule.matchers
         ]
     return response
+
+
+@router.post(
+    "/{rule_id}/csv", description="Replace the rows of a mapping rule with a CSV file"
+)
+def upload_rule_rows(
+    rule_id: int,
+    file: UploadFile,
+    authenticated_entity: AuthenticatedEntity = Depends(AuthVerifier(["write:rules"])),
+    session: Session = Depends(get_session),
+) -> MappingRuleDtoOut:
+    logger.info("Uploading mapping rule rows", extra={"rule_id": rule_id})
+    existing_rule: MappingRule = (
+        session.query(MappingRule)
+        .filter(
+            MappingRule.tenant_id == authenticated_entity.tenant_id,
+            MappingRule.id == rule_id,
+        )
+        .first()
+    )
+    if existing_rule is None:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    # the file is read (and inserted) row by row, so large files are never loaded as a whole
+    reader = csv.DictReader(
+        io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    )
+    try:
+        missing_matchers = set(existing_rule.matchers) - set(reader.fieldnames or [])
+        if missing_matchers:
+            raise HTTPException(
+                status_code=400,
+                detail=f"The file is missing the matchers columns: {', '.join(sorted(missing_matchers))}",
+            )
+        rows_count, first_row = set_mapping_rule_rows(session, existing_rule, reader)
+    except (UnicodeDecodeError, csv.Error):
+        logger.exception("Invalid CSV file", extra={"rule_id": rule_id})
+        raise HTTPException(status_code=400, detail="Invalid CSV file")
+    if not rows_count:
+        raise HTTPException(status_code=400, detail="The file has no rows")
+    existing_rule.file_name = file.filename
+    existing_rule.updated_by = authenticated_entity.email
+    existing_rule.last_updated_at = datetime.datetime.now(tz=datetime.timezone.utc)
+    session.commit()
+    session.refresh(existing_rule)
+    MappingRulesIndex.get_instance().invalidate(existing_rule.id)
+    MappingRulesIndex.get_instance().get_index(existing_rule)
+    logger.info(
+        "Uploaded mapping rule rows",
+        extra={"rule_id": rule_id, "rows_count": rows_count},
+    )
+    response = MappingRuleDtoOut(**existing_rule.dict())
+    response.attributes = [
+        key for key in first_row.keys() if key not in existing_rule.matchers
+    ]
+    return response
@@ -27,7 +27,9 @@ from keep.providers.base.provider_exceptions import (
     GetAlertException,
     ProviderMethodException,
 )
+from keep.providers.installed_providers_registry import InstalledProvidersRegistry
 from keep.providers.providers_factory import ProvidersFactory
+from keep.providers.providers_pool import ProvidersPool
 from keep.secretmanager.secretmanagerfactory import SecretManagerFactory
 
 router = APIRouter()
@@ -339,6 +341,8 @@ def delete_provider(
         # delete the provider anyway
         session.delete(provider)
         session.commit()
+        InstalledProvidersRegistry.get_instance().invalidate(tenant_id)
+        ProvidersPool.get_instance().invalidate(tenant_id, provider_id)
     except sqlalchemy.orm.exc.NoResultFound:
         raise HTTPException(404, detail="Provider not found")
     except Exception:
@@ -426,6 +430,7 @@ def validate_provider_scopes(
     if validated_scopes != provider.validatedScopes:
         provider.validatedScopes = validated_scopes
         session.commit()
+        InstalledProvidersRegistry.get_instance().invalidate(tenant_id)
     logger.info(
         "Validated provider scopes",
         extra={"provider_id": provider_id, "validated_scopes": validate_scopes},
@@ -497,6 +502,8 @@ async def update_provider(
     provider.installed_by = updated_by
     provider.validatedScopes = validated_scopes
     session.commit()
+    InstalledProvidersRegistry.get_instance().invalidate(tenant_id)
+    ProvidersPool.get_instance().invalidate(tenant_id, provider_id)
     logger.info("Updated provider", extra={"provider_id": provider_id})
     return {
         "details": provider_config,
@@ -587,6 +594,7 @@ async def install_provider(
     try:
         session.add(provider_model)
         session.commit()
+        InstalledProvidersRegistry.get_instance().invalidate(tenant_id)
     except IntegrityError:
         raise HTTPException(
             status_code=409,
@@ -676,6 +684,7 @@ async def install_provider_oauth2(
         )
         session.add(provider)
         session.commit()
+        InstalledProvidersRegistry.get_instance().invalidate(tenant_id)
         return JSONResponse(
             status_code=200,
             content={
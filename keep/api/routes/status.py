@@ -1,6 +1,9 @@
 from fastapi import APIRouter
 
 from keep.event_subscriber.event_subscriber import EventSubscriber
+from keep.rulesengine.cel_program_cache import CELProgramCache
+from keep.secretmanager.secretscache import SecretsCache
+from keep.workflowmanager.workflowmanager import WorkflowManager
 
 router = APIRouter()
 
@@ -17,4 +20,7 @@ def status() -> dict:
     return {
         "status": "OK",
         "consumer": event_subscriber.status(),
+        "cel_program_cache": CELProgramCache.get_instance().stats(),
+        "secrets_cache": SecretsCache.get_instance().stats(),
+        "workflows_executor": WorkflowManager.get_instance().scheduler.executor.stats(),
     }
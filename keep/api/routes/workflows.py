@@ -19,7 +19,6 @@ from opentelemetry import trace
 from sqlmodel import Session
 
 from keep.api.core.db import (
-    get_installed_providers,
     get_last_workflow_executions,
     get_last_workflow_workflow_to_alert_executions,
     get_session,
@@ -38,7 +37,9 @@ from keep.api.models.workflow import (
     WorkflowToAlertExecutionDTO,
 )
 from keep.parser.parser import Parser
+from keep.providers.installed_providers_registry import InstalledProvidersRegistry
 from keep.providers.providers_factory import ProvidersFactory
+from keep.workflowmanager.workflow_definitions_cache import WorkflowDefinitionsCache
 from keep.workflowmanager.workflowmanager import WorkflowManager
 from keep.workflowmanager.workflowstore import WorkflowStore
 
@@ -60,7 +61,9 @@ def get_workflows(
     workflowstore = WorkflowStore()
     parser = Parser()
     workflows_dto = []
-    installed_providers = get_installed_providers(tenant_id)
+    installed_providers = (
+        InstalledProvidersRegistry.get_instance().get_installed_providers(tenant_id)
+    )
     installed_providers_by_type = {}
     for installed_provider in installed_providers:
         if installed_provider.type not in installed_providers_by_type:
@@ -335,10 +338,12 @@ async def update_workflow_by_id(
     workflow_from_db.description = workflow.get("description")
     workflow_from_db.interval = workflow_interval
     workflow_from_db.workflow_raw = yaml.dump(workflow)
+    workflow_from_db.revision += 1
     workflow_from_db.last_updated = datetime.datetime.now()
     session.add(workflow_from_db)
     session.commit()
     session.refresh(workflow_from_db)
+    WorkflowDefinitionsCache.get_instance().invalidate(tenant_id, workflow_from_db.id)
     logger.info(f"Updated workflow {workflow_id}", extra={"tenant_id": tenant_id})
     return WorkflowCreateOrUpdateDTO(workflow_id=workflow_id, status="updated")
 
@@ -0,0 +1,93 @@
+import json
+import logging
+
+from pusher import Pusher
+
+logger = logging.getLogger(__name__)
+
+# pusher rejects messages bigger than 10KB
+PUSHER_MAX_MESSAGE_SIZE = 10240
+
+
+class PusherBatchBuilder:
+    """
+    Builds JSON list payloads of up to `max_size` bytes.
+
+    Every item is serialized once and the size of the batch is tracked as
+    items are added, the payload of a batch is the same as `json.dumps` of
+    its items list.
+    """
+
+    def __init__(self, max_size: int = PUSHER_MAX_MESSAGE_SIZE):
+        self.max_size = max_size
+        self._items: list[str] = []
+        self._size = 0
+
+    def add(self, item: dict) -> str | None:
+        """
+        Add an item to the batch.
+
+        Returns:
+            str | None: the payload of the previous batch if the item didn't fit in it.
+        """
+        item_json = json.dumps(item, default=str)
+        # json is ascii by default, so its length is its size in bytes
+        if len(item_json) + 2 > self.max_size:
+            logger.warning(
+                "Item is too big to be sent, skipping it",
+                extra={"size": len(item_json), "max_size": self.max_size},
+            )
+            return None
+        payload = None
+        # "[" + items separated by ", " + "]", so every item adds its size + 2
+        size = self._size + len(item_json) + 2
+        if size > self.max_size:
+            payload = self.flush()
+            size = len(item_json) + 2
+        self._items.append(item_json)
+        self._size = size
+        return payload
+
+    def flush(self) -> str | None:
+        """
+        Get the payload of the current batch and start a new one.
+        """
+        if not self._items:
+            return None
+        payload = "[" + ", ".join(self._items) + "]"
+        self._items = []
+        self._size = 0
+        return payload
+
+    @staticmethod
+    def build(items: list[dict], max_size: int = PUSHER_MAX_MESSAGE_SIZE) -> list[str]:
+        batch_builder = PusherBatchBuilder(max_size)
+        payloads = [
+            payload for payload in map(batch_builder.add, items) if payload is not None
+        ]
+        last_payload = batch_builder.flush()
+        if last_payload is not None:
+            payloads.append(last_payload)
+        return payloads
+
+
+def trigger_batches(
+    pusher_client: Pusher, channel: str, event_name: str, items: list[dict]
+) -> int:
+    """
+    Send the items in as few messages as possible.
+
+    Returns:
+        int: the number of messages that were sent.
+    """
+    sent = 0
+    for payload in PusherBatchBuilder.build(items):
+        try:
+            pusher_client.trigger(channel, event_name, payload)
+            sent += 1
+        except Exception:
+            logger.exception(
+                "Failed to send batch via pusher",
+                extra={"channel": channel, "event_name": event_name},
+            )
+    return sent
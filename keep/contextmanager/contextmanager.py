@@ -1,14 +1,122 @@
 # TODO - refactor context manager to support multitenancy in a more robust way
+import collections.abc
+import itertools
 import logging
 import os
+import pickle
+import tempfile
+import threading
 
 import click
 from pympler.asizeof import asizeof
 
+from keep.api.core.config import config
 from keep.api.core.db import get_last_workflow_execution_by_workflow_id, get_session
 from keep.api.logging import WorkflowLoggerAdapter
 
 
+class SpilledStepResults:
+    """
+    Step results that are kept in a temporary file instead of the memory.
+    The last loaded results (of all the spilled results) are cached, so
+    repeated accesses (e.g. rendering a template) don't load them again while
+    only a few of them are in the memory at once.
+
+    Use `spill` to create them, list and dict results are spilled to a
+    `Sequence` and a `Mapping` so templates (e.g. mustache sections) and
+    foreach steps iterate them as they iterate the results themselves.
+    """
+
+    # spilled results id -> loaded results, least recently used first
+    _loaded = collections.OrderedDict()
+    _loaded_lock = threading.Lock()
+    _loaded_size = config("KEEP_STEP_RESULTS_SPILL_CACHE_SIZE", default=4, cast=int)
+    _ids = itertools.count()
+
+    # the results are mutable, so the spilled results are not hashable either
+    __hash__ = None
+
+    def __init__(self, results):
+        self._id = next(SpilledStepResults._ids)
+        self._file = tempfile.TemporaryFile()
+        pickle.dump(results, self._file)
+        self._lock = threading.Lock()
+
+    def __del__(self):
+        SpilledStepResults._loaded.pop(self._id, None)
+
+    @staticmethod
+    def spill(results) -> "SpilledStepResults":
+        if isinstance(results, (list, tuple)):
+            return SpilledSequenceStepResults(results)
+        if isinstance(results, dict):
+            return SpilledMappingStepResults(results)
+        return SpilledStepResults(results)
+
+    def load(self):
+        loaded = SpilledStepResults._loaded
+        with SpilledStepResults._loaded_lock:
+            if self._id in loaded:
+                loaded.move_to_end(self._id)
+                return loaded[self._id]
+        with self._lock:
+            self._file.seek(0)
+            results = pickle.load(self._file)
+        with SpilledStepResults._loaded_lock:
+            loaded[self._id] = results
+            while len(loaded) > SpilledStepResults._loaded_size:
+                loaded.popitem(last=False)
+        return results
+
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def __bool__(self):
+        return bool(self.load())
+
+    def __eq__(self, other):
+        if isinstance(other, SpilledStepResults):
+            other = other.load()
+        return self.load() == other
+
+    def __str__(self):
+        return str(self.load())
+
+    def __repr__(self):
+        return repr(self.load())
+
+
+class SpilledSequenceStepResults(SpilledStepResults, collections.abc.Sequence):
+    def __contains__(self, value):
+        return value in self.load()
+
+    def __reversed__(self):
+        return reversed(self.load())
+
+
+class SpilledMappingStepResults(SpilledStepResults, collections.abc.Mapping):
+    def __contains__(self, key):
+        return key in self.load()
+
+    def keys(self):
+        return self.load().keys()
+
+    def items(self):
+        return self.load().items()
+
+    def values(self):
+        return self.load().values()
+
+
 class ContextManager:
     def __init__(self, tenant_id, workflow_id=None, workflow_execution_id=None):
         self.logger = logging.getLogger(__name__)
@@ -18,7 +126,14 @@ class ContextManager:
         self.workflow_id = workflow_id
         self.tenant_id = tenant_id
         self.steps_context = {}
+        # the size of the steps context is the sum of the sizes of its results
+        #   and provider parameters, each one is measured once when it's set
         self.steps_context_size = 0
+        self._steps_context_sizes = {}
+        # step results that are bigger than this (bytes) are spilled to a temporary file
+        self.spill_results_size = config(
+            "KEEP_STEP_RESULTS_SPILL_SIZE", default=0, cast=int
+        )
         self.providers_context = {}
         self.event_context = {}
         self.foreach_context = {
@@ -169,20 +284,46 @@ class ContextManager:
         if step_id not in self.steps_context:
             self.steps_context[step_id] = {"provider_parameters": {}, "results": []}
         self.steps_context[step_id]["provider_parameters"] = provider_parameters
+        self._set_steps_context_size(
+            (step_id, "provider_parameters"), asizeof(provider_parameters)
+        )
 
     def set_step_context(self, step_id, results, foreach=False):
         if step_id not in self.steps_context:
             self.steps_context[step_id] = {"provider_parameters": {}, "results": []}
 
+        results_size = asizeof(results)
+        if self.spill_results_size and results_size > self.spill_results_size:
+            results = self._spill_results(step_id, results, results_size)
         # If this is a foreach step, we need to append the results to the list
         # so we can iterate over them
         if foreach:
             self.steps_context[step_id]["results"].append(results)
+            results_size += self._steps_context_sizes.get((step_id, "results"), 0)
         else:
             self.steps_context[step_id]["results"] = results
+        self._set_steps_context_size((step_id, "results"), results_size)
         # this is an alias to the current step output
         self.steps_context["this"] = self.steps_context[step_id]
-        self.steps_context_size = asizeof(self.steps_context)
+
+    def _set_steps_context_size(self, key, size):
+        self.steps_context_size += size - self._steps_context_sizes.get(key, 0)
+        self._steps_context_sizes[key] = size
+
+    def _spill_results(self, step_id, results, results_size):
+        try:
+            spilled_results = SpilledStepResults.spill(results)
+        except Exception:
+            self.logger.exception(
+                "Failed to spill step results, keeping them in memory",
+                extra={"step_id": step_id},
+            )
+            return results
+        self.logger.info(
+            "Spilled step results to a temporary file",
+            extra={"step_id": step_id, "results_size": results_size},
+        )
+        return spilled_results
 
     def get_last_workflow_run(self, workflow_id):
         return get_last_workflow_execution_by_workflow_id(self.tenant_id, workflow_id)
@@ -1,11 +1,17 @@
 import logging
 import threading
 
+from keep.api.core.config import config
 from keep.providers.base.base_provider import BaseProvider
 from keep.providers.providers_factory import ProvidersFactory
 
 
 class EventSubscriber:
+    # the consumers run in the API server, so they ingest the alerts they push in-process
+    INGEST_IN_PROCESS = config(
+        "KEEP_CONSUMERS_INGEST_IN_PROCESS", default=True, cast=bool
+    )
+
     @staticmethod
     def get_instance() -> "EventSubscriber":
         if not hasattr(EventSubscriber, "_instance"):
@@ -37,6 +43,10 @@ class EventSubscriber:
             consumer_provider (_type_): _description_
         """
         self.logger.info("Adding consumer %s", consumer_provider)
+        self._start_consumer(consumer_provider)
+
+    def _start_consumer(self, consumer_provider: BaseProvider):
+        consumer_provider.alerts_push_buffer.in_process = self.INGEST_IN_PROCESS
         # start the consumer in a separate thread
         thread = threading.Thread(
             target=consumer_provider.start_consume,
@@ -61,17 +71,7 @@ class EventSubscriber:
             self.logger.info(
                 "Getting consumer for event provider %s", consumer_provider
             )
-            # start the consumer in a separate thread
-            thread = threading.Thread(
-                target=consumer_provider.start_consume,
-                name=f"consumer-{consumer_provider}",
-            )
-            thread.start()
-            self.consumers.append(consumer_provider)
-            self.consumer_threads.append(thread)
-            self.logger.info(
-                "Started consumer thread for event provider %s", consumer_provider
-            )
+            self._start_consumer(consumer_provider)
         self.started = True
 
     def remove_consumer(self, provider_id: str):
@@ -1,18 +1,21 @@
 import ast
 import copy
+import datetime
+import functools
 
 # TODO: fix this! It screws up the eval statement if these are not imported
 import inspect
-import io
 import logging
 import re
-import sys
 
 import astunparse
 import chevron
 import requests
+from chevron.tokenizer import tokenize
+from dateutil.tz import tzutc
 
 import keep.functions as keep_functions
+from keep.api.core.config import config
 from keep.contextmanager.contextmanager import ContextManager
 from keep.step.step_provider_parameter import StepProviderParameter
 
@@ -21,6 +24,46 @@ class RenderException(Exception):
     pass
 
 
+@functools.lru_cache(
+    maxsize=config("KEEP_TEMPLATES_CACHE_SIZE", default=4096, cast=int)
+)
+def _compile_template(template: str) -> tuple:
+    # chevron renders a sequence of tokens without tokenizing the template again
+    return tuple(tokenize(template))
+
+
+class _MissingKey:
+    """
+    A chevron scope that is searched after the context, so only the keys that
+    are not in the context reach it. It collects them (for safe rendering)
+    instead of the stderr warnings of chevron.
+    """
+
+    def __init__(self, missing_keys: list, path: tuple = ()):
+        self._missing_keys = missing_keys
+        self._path = path
+
+    def __getitem__(self, key):
+        return _MissingKey(self._missing_keys, self._path + (key,))
+
+    def __bool__(self):
+        # chevron checks the value once all the parts of the key were looked up
+        if self._path:
+            self._missing_keys.append(".".join(self._path))
+        return False
+
+
+def _get_keep_functions() -> dict:
+    # function name -> (function, whether the tenant id should be injected)
+    functions = {}
+    for name, func in inspect.getmembers(keep_functions, inspect.isfunction):
+        functions[name] = (func, "kwargs" in inspect.signature(func).parameters)
+    return functions
+
+
+KEEP_FUNCTIONS = _get_keep_functions()
+
+
 class IOHandler:
     def __init__(self, context_manager: ContextManager):
         self.context_manager = context_manager
@@ -28,6 +71,8 @@ class IOHandler:
         # whether Keep should shorten urls in the message or not
         # todo: have a specific parameter for this?
         self.shorten_urls = False
+        self._eval_globals = None
+        self._eval_dependencies = 0
         if (
             self.context_manager.click_context
             and self.context_manager.click_context.params.get("api_key")
@@ -239,20 +284,7 @@ class IOHandler:
                                 # because the user can run any python code need to find a way to limit the functions that can be used
 
                                 # https://github.com/keephq/keep/issues/138
-                                import datetime
-
-                                from dateutil.tz import tzutc
-
-                                g = globals()
-                                # we need to pass the classes of the dependencies to the eval
-                                for dependency in self.context_manager.dependencies:
-                                    g[dependency.__name__] = dependency
-
-                                # TODO: this is a hack to tzutc in the eval, should be more robust
-                                g["tzutc"] = tzutc
-                                g["datetime"] = datetime
-                                # finally, eval the expression
-                                _arg = eval(_arg, g)
+                                _arg = eval(_arg, self._get_eval_globals())
                             except ValueError:
                                 pass
                     else:
@@ -260,11 +292,16 @@ class IOHandler:
                     if _arg:
                         _args.append(_arg)
                 # check if we need to inject tenant_id
-                keep_func = getattr(keep_functions, func.attr)
-                func_signature = inspect.signature(keep_func)
+                if func.attr in KEEP_FUNCTIONS:
+                    keep_func, inject_tenant_id = KEEP_FUNCTIONS[func.attr]
+                else:
+                    keep_func = getattr(keep_functions, func.attr)
+                    inject_tenant_id = (
+                        "kwargs" in inspect.signature(keep_func).parameters
+                    )
 
                 kwargs = {}
-                if "kwargs" in func_signature.parameters:
+                if inject_tenant_id:
                     kwargs["tenant_id"] = self.context_manager.tenant_id
 
                 val = keep_func(*_args) if not kwargs else keep_func(*_args, **kwargs)
@@ -288,6 +325,21 @@ class IOHandler:
                 tree = ast.parse(token.encode("unicode_escape"))
         return _parse(self, tree)
 
+    def _get_eval_globals(self) -> dict:
+        # the dependencies are only added, so the globals are built again only when they grow
+        dependencies = self.context_manager.dependencies
+        if self._eval_globals is None or self._eval_dependencies != len(dependencies):
+            eval_globals = dict(globals())
+            # we need to pass the classes of the dependencies to the eval
+            for dependency in dependencies:
+                eval_globals[dependency.__name__] = dependency
+            # TODO: this is a hack to tzutc in the eval, should be more robust
+            eval_globals["tzutc"] = tzutc
+            eval_globals["datetime"] = datetime
+            self._eval_globals = eval_globals
+            self._eval_dependencies = len(dependencies)
+        return self._eval_globals
+
     def _render(self, key: str, safe=False, default=""):
         if "{{^" in key or "{{ ^" in key:
             self.logger.debug(
@@ -296,27 +348,20 @@ class IOHandler:
             safe = False
 
         context = self.context_manager.get_full_context()
-        # TODO: protect from multithreaded where another thread will print to stderr, but thats a very rare case and we shouldn't care much
-        original_stderr = sys.stderr
-        sys.stderr = io.StringIO()
-        rendered = chevron.render(key, context, warn=True)
+        missing_keys = []
+        rendered = chevron.render(
+            _compile_template(key), scopes=[context, _MissingKey(missing_keys)]
+        )
         # chevron.render will escape the quotes, we need to unescape them
         rendered = rendered.replace("&quot;", '"')
-        stderr_output = sys.stderr.getvalue()
-        sys.stderr = original_stderr
         # If render should failed if value does not exists
-        if safe and "Could not find key" in stderr_output:
+        if safe and missing_keys:
             # if more than one keys missing, pretiffy the error
-            if stderr_output.count("Could not find key") > 1:
-                missing_keys = stderr_output.split("Could not find key")
-                missing_keys = [
-                    missing_key.strip().replace("\n", "")
-                    for missing_key in missing_keys[1:]
-                ]
-                missing_keys = list(set(missing_keys))
+            if len(missing_keys) > 1:
+                missing_keys = [f"'{k}'" for k in dict.fromkeys(missing_keys)]
                 err = "Could not find keys: " + ", ".join(missing_keys)
             else:
-                err = stderr_output.replace("\n", "")
+                err = f"Could not find key '{missing_keys[0]}'"
             raise RenderException(f"{err} in the context.")
         if not rendered:
             return default
@@ -327,38 +372,36 @@ class IOHandler:
         Iterates the provider context and renders it using the workflow context.
         """
         # Don't modify the original context
-        context_to_render = copy.deepcopy(context_to_render)
+        rendered_context = {}
         for key, value in context_to_render.items():
             if isinstance(value, str):
-                context_to_render[key] = self._render_template_with_context(
-                    value, safe=True
-                )
+                value = self._render_template_with_context(value, safe=True)
             elif isinstance(value, list):
-                context_to_render[key] = self._render_list_context(value)
+                value = self._render_list_context(value)
             elif isinstance(value, dict):
-                context_to_render[key] = self.render_context(value)
+                value = self.render_context(value)
             elif isinstance(value, StepProviderParameter):
                 safe = value.safe and value.default is not None
-                context_to_render[key] = self._render_template_with_context(
+                value = self._render_template_with_context(
                     value.key, safe=safe, default=value.default
                 )
-        return context_to_render
+            rendered_context[key] = value
+        return rendered_context
 
     def _render_list_context(self, context_to_render: list):
         """
         Iterates the provider context and renders it using the workflow context.
         """
-        for i in range(0, len(context_to_render)):
-            value = context_to_render[i]
+        rendered_context = []
+        for value in context_to_render:
             if isinstance(value, str):
-                context_to_render[i] = self._render_template_with_context(
-                    value, safe=True
-                )
-            if isinstance(value, list):
-                context_to_render[i] = self._render_list_context(value)
-            if isinstance(value, dict):
-                context_to_render[i] = self.render_context(value)
-        return context_to_render
+                value = self._render_template_with_context(value, safe=True)
+            elif isinstance(value, list):
+                value = self._render_list_context(value)
+            elif isinstance(value, dict):
+                value = self.render_context(value)
+            rendered_context.append(value)
+        return rendered_context
 
     def _render_template_with_context(
         self, template: str, safe: bool = False, default: str = ""
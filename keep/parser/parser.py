@@ -8,7 +8,9 @@ import yaml
 from keep.api.core.db import get_workflow_id
 from keep.contextmanager.contextmanager import ContextManager
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.installed_providers_registry import InstalledProvidersRegistry
 from keep.providers.providers_factory import ProvidersFactory
+from keep.providers.providers_pool import ProvidersPool
 from keep.step.step import Step, StepType
 from keep.step.step_provider_parameter import StepProviderParameter
 from keep.workflowmanager.workflow import Workflow, WorkflowStrategy
@@ -192,19 +194,21 @@ class Parser:
         # If there is no tenant id, e.g. running from CLI, no db here
         if not tenant_id:
             return
-        # Load installed providers
-        all_providers = ProvidersFactory.get_all_providers()
-        installed_providers = ProvidersFactory.get_installed_providers(
-            tenant_id=tenant_id, all_providers=all_providers
+        # Load installed providers, their configs are read only if the workflow uses them
+        installed_providers_registry = InstalledProvidersRegistry.get_instance()
+        installed_providers = installed_providers_registry.get_installed_providers(
+            tenant_id
         )
         for provider in installed_providers:
             self.logger.debug("Loading provider", extra={"provider_id": provider.id})
             try:
-                provider_name = provider.details.get("name")
-                context_manager.providers_context[provider.id] = provider.details
+                provider_config = installed_providers_registry.get_provider_config(
+                    tenant_id, provider
+                )
+                context_manager.providers_context[provider.id] = provider_config
                 # map also the name of the provider, not only the id
                 # so that we can use the name to reference the provider
-                context_manager.providers_context[provider_name] = provider.details
+                context_manager.providers_context[provider.name] = provider_config
                 self.logger.debug(f"Provider {provider.id} loaded successfully")
             except Exception as e:
                 self.logger.error(
@@ -351,6 +355,11 @@ class Parser:
         provider_id, provider_config = self._parse_provider_config(
             context_manager, step_provider_type, step_provider_config
         )
+        providers_pool = ProvidersPool.get_instance()
+        if providers_pool.enabled:
+            return providers_pool.get_provider(
+                context_manager, provider_id, step_provider_type, provider_config
+            )
         provider = ProvidersFactory.get_provider(
             context_manager, provider_id, step_provider_type, provider_config
         )
@@ -372,13 +381,19 @@ class Parser:
         provider_id, provider_config = self._parse_provider_config(
             context_manager, provider_type, provider_config
         )
-        provider = ProvidersFactory.get_provider(
-            context_manager,
-            provider_id,
-            provider_type,
-            provider_config,
-            **parsed_provider_parameters,
-        )
+        providers_pool = ProvidersPool.get_instance()
+        if providers_pool.enabled:
+            provider = providers_pool.get_provider(
+                context_manager, provider_id, provider_type, provider_config
+            )
+        else:
+            provider = ProvidersFactory.get_provider(
+                context_manager,
+                provider_id,
+                provider_type,
+                provider_config,
+                **parsed_provider_parameters,
+            )
         action = Step(
             context_manager=context_manager,
             step_id=name,
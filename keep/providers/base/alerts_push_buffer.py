@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+import typing
+
+import requests
+
+from keep.api.core.config import config
+from keep.api.core.dependencies import get_pusher_client
+from keep.api.models.alert import AlertDto
+from keep.providers.base.http_session import create_http_session
+
+if typing.TYPE_CHECKING:
+    from keep.providers.base.base_provider import BaseProvider
+
+PUSH_BATCH_SIZE = config("KEEP_PUSH_BATCH_SIZE", default=100, cast=int)
+PUSH_FLUSH_INTERVAL = config("KEEP_PUSH_FLUSH_INTERVAL", default=1, cast=float)
+PUSH_RETRIES = config("KEEP_PUSH_RETRIES", default=3, cast=int)
+PUSH_RETRY_BACKOFF = config("KEEP_PUSH_RETRY_BACKOFF", default=0.5, cast=float)
+
+
+class AlertsPushBuffer:
+    """
+    Buffers the alerts a provider pushes to Keep and sends them as a list,
+    when `batch_size` alerts were buffered or `flush_interval` seconds after
+    the first alert of the batch was buffered.
+
+    The batches are posted to the API over a keep-alive session and retried
+    with an exponential backoff on connection errors and 5xx responses, or,
+    with `in_process`, handed straight to the ingestion pipeline (which
+    notifies the clients with pusher, as the API does) when the provider runs
+    inside the API server.
+    """
+
+    def __init__(
+        self,
+        provider: "BaseProvider",
+        batch_size: int = PUSH_BATCH_SIZE,
+        flush_interval: float = PUSH_FLUSH_INTERVAL,
+        retries: int = PUSH_RETRIES,
+        retry_backoff: float = PUSH_RETRY_BACKOFF,
+        in_process: bool = False,
+    ):
+        self.provider = provider
+        self.logger = provider.logger
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.in_process = in_process
+        self._alerts: list[AlertDto] = []
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+        # flushes are serialized so the batches are sent in order
+        self._flush_lock = threading.Lock()
+        self._session: requests.Session | None = None
+        # created on the first in process flush
+        self._pusher_client = None
+
+    def add(self, alert: AlertDto):
+        with self._lock:
+            self._alerts.append(alert)
+            full = len(self._alerts) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Send the buffered alerts.
+
+        Returns:
+            int: The number of alerts that were sent.
+        """
+        with self._flush_lock:
+            with self._lock:
+                alerts, self._alerts = self._alerts, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not alerts:
+                return 0
+            try:
+                if self.in_process:
+                    if self._pusher_client is None:
+                        self._pusher_client = get_pusher_client()
+                    self.provider._ingest_alerts(alerts, self._pusher_client)
+                else:
+                    self._post(alerts)
+            except Exception:
+                self.logger.exception(
+                    f"Failed to push {len(alerts)} alerts",
+                    extra={"provider_id": self.provider.provider_id},
+                )
+                return 0
+            self.logger.info(
+                "Alerts pushed successfully", extra={"num_of_alerts": len(alerts)}
+            )
+            return len(alerts)
+
+    def close(self):
+        self.flush()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _post(self, alerts: list[AlertDto]):
+        if self._session is None:
+            # the retries are done here, POST is not retried by the session
+            self._session = create_http_session(retries=0)
+        url = f'{os.environ["KEEP_API_URL"]}/alerts/event'
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "X-API-KEY": self.provider.context_manager.api_key,
+        }
+        payload = [alert.dict() for alert in alerts]
+        for attempt in range(self.retries + 1):
+            try:
+                response = self._session.post(url, json=payload, headers=headers)
+                # client errors won't succeed on retry
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return
+                error = requests.HTTPError(
+                    f"{response.status_code}: {response.content}", response=response
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt < self.retries:
+                self.logger.warning(
+                    f"Failed to push alerts, retrying: {error}",
+                    extra={"attempt": attempt + 1},
+                )
+                time.sleep(self.retry_backoff * 2**attempt)
+        raise error
@@ -4,13 +4,11 @@ Base class for all providers.
 
 import abc
 import copy
-import datetime
 import hashlib
 import itertools
 import json
 import logging
 import operator
-import os
 import re
 import uuid
 from typing import Literal, Optional
@@ -22,6 +20,11 @@ from keep.api.core.db import enrich_alert, get_enrichments
 from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
 from keep.api.utils.enrichment_helpers import parse_and_enrich_deleted_and_assignees
 from keep.contextmanager.contextmanager import ContextManager
+from keep.providers.base.alerts_push_buffer import AlertsPushBuffer
+from keep.providers.base.http_session import (
+    create_http_session,
+    get_http_session_stats,
+)
 from keep.providers.models.provider_config import ProviderConfig, ProviderScope
 from keep.providers.models.provider_method import ProviderMethod
 
@@ -63,6 +66,8 @@ class BaseProvider(metaclass=abc.ABCMeta):
         self.provider_description = provider_description
         self.context_manager = context_manager
         self.logger = context_manager.get_logger()
+        self._http_session = None
+        self._alerts_push_buffer = None
         self.validate_config()
         self.logger.debug(
             "Base provider initalized", extra={"provider": self.__class__.__name__}
@@ -86,6 +91,55 @@ class BaseProvider(metaclass=abc.ABCMeta):
         )
         return name_with_spaces.replace(" ", ".")
 
+    @property
+    def http_session(self) -> requests.Session:
+        """
+        A session with keep-alive connections per target host, default
+        timeouts and retries, providers use it instead of calling `requests`
+        directly so their calls reuse connections.
+        """
+        if self._http_session is None:
+            self._http_session = create_http_session()
+        return self._http_session
+
+    def get_http_session_stats(self) -> dict:
+        if self._http_session is None:
+            return {}
+        return get_http_session_stats(self._http_session)
+
+    def close_http_session(self):
+        if self._http_session is not None:
+            self._http_session.close()
+            self._http_session = None
+
+    @property
+    def alerts_push_buffer(self) -> AlertsPushBuffer:
+        """
+        The buffer the alerts of `_push_alert` are sent through in batches.
+        """
+        if self._alerts_push_buffer is None:
+            self._alerts_push_buffer = AlertsPushBuffer(self)
+        return self._alerts_push_buffer
+
+    def flush_pushed_alerts(self):
+        """
+        Send the buffered pushed alerts, consumers call it when they stop.
+        """
+        if self._alerts_push_buffer is not None:
+            self._alerts_push_buffer.close()
+
+    def bind_context_manager(self, context_manager: ContextManager):
+        """
+        Bind a reused (pooled) provider to the context manager of a new run.
+
+        Args:
+            context_manager (ContextManager): the context manager of the run.
+        """
+        self.context_manager = context_manager
+        self.logger = context_manager.get_logger()
+        # the results belong to a single run
+        self.results = []
+
     @abc.abstractmethod
     def dispose(self):
         """
@@ -486,19 +540,22 @@ class BaseProvider(metaclass=abc.ABCMeta):
         """
         return self.start_consume.__qualname__ != "BaseProvider.start_consume"
 
-    def _push_alert(self, alert: dict):
+    def _format_pushed_alert(self, alert: dict) -> AlertDto | None:
         """
-        Push an alert to the provider.
+        Build the alert model of an alert that is pushed to Keep (e.g. consumed from a queue).
 
         Args:
-            alert (dict): The alert to push.
+            alert (dict): The alert (or its json).
+
+        Returns:
+            AlertDto | None: The alert, None if it's not a dict.
         """
         # if this is not a dict, try to convert it to a dict
         if not isinstance(alert, dict):
             try:
                 alert_data = json.loads(alert)
             except Exception:
-                alert_data = alert_data
+                alert_data = alert
         else:
             alert_data = alert
 
@@ -508,7 +565,7 @@ class BaseProvider(metaclass=abc.ABCMeta):
                 "We currently support only alert represented as a dict, dismissing alert",
                 extra={"alert": alert},
             )
-            return
+            return None
         # now try to build the alert model
         # we will have a lot of default values here to support all providers and all cases, the
         # way to fine tune those would be to use the provider specific model or enforce that the event from the queue will be casted into the fields
@@ -516,7 +573,8 @@ class BaseProvider(metaclass=abc.ABCMeta):
             id=alert_data.get("id", str(uuid.uuid4())),
             name=alert_data.get("name", "alert-from-event-queue"),
             status=alert_data.get("status", AlertStatus.FIRING),
-            lastReceived=alert_data.get("lastReceived", datetime.datetime.now()),
+            # defaults to now (as an iso string) in AlertDto
+            lastReceived=alert_data.get("lastReceived"),
             environment=alert_data.get("environment", "alert-from-event-queue"),
             isDuplicate=alert_data.get("isDuplicate", False),
             duplicateReason=alert_data.get("duplicateReason", None),
@@ -530,21 +588,65 @@ class BaseProvider(metaclass=abc.ABCMeta):
             url=alert_data.get("url", None),
             fingerprint=alert_data.get("fingerprint", None),
         )
-        # push the alert to the provider
-        url = f'{os.environ["KEEP_API_URL"]}/alerts/event'
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "X-API-KEY": self.context_manager.api_key,
-        }
-        response = requests.post(url, json=alert_model.dict(), headers=headers)
-        try:
-            response.raise_for_status()
-            self.logger.info("Alert pushed successfully")
-        except Exception:
-            self.logger.error(
-                f"Failed to push alert to {self.provider_id}: {response.content}"
-            )
+        return alert_model
+
+    def _push_alert(self, alert: dict):
+        """
+        Push an alert to Keep, the alert is buffered and sent with the next batch.
+
+        Args:
+            alert (dict): The alert to push.
+        """
+        alert_model = self._format_pushed_alert(alert)
+        if alert_model is None:
+            return
+        self.alerts_push_buffer.add(alert_model)
+
+    def _ingest_alerts(
+        self, alerts: list[AlertDto], pusher_client=None
+    ) -> list[AlertDto]:
+        """
+        Hand alerts straight to the ingestion pipeline of this process instead
+        of posting them to the API, for consumers that run in the API process.
+
+        Args:
+            alerts (list[AlertDto]): The alerts to ingest.
+            pusher_client (Pusher, optional): The pusher client to notify the clients with.
+
+        Raises:
+            Exception: If the alerts could not be persisted.
+
+        Returns:
+            list[AlertDto]: The ingested alerts.
+        """
+        # avoid circular import, the alerts route uses the providers
+        from sqlmodel import Session
+
+        from keep.api.core.db import engine
+        from keep.api.routes.alerts import handle_formatted_events
+
+        # the alerts are stored with the provider type of their source
+        alerts_by_source = {}
+        for alert in alerts:
+            source = alert.source[0] if alert.source else self.provider_type
+            alerts_by_source.setdefault(source, []).append(alert)
+
+        ingested_alerts = []
+        with Session(engine) as session:
+            for source, source_alerts in alerts_by_source.items():
+                ingested_alerts.extend(
+                    handle_formatted_events(
+                        self.context_manager.tenant_id,
+                        source,
+                        session,
+                        [alert.dict() for alert in source_alerts],
+                        source_alerts,
+                        pusher_client,
+                        self.provider_id,
+                        raise_on_error=True,
+                    )
+                )
+        return ingested_alerts
 
     @classmethod
     def simulate_alert(cls) -> dict:
@@ -0,0 +1,88 @@
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from keep.api.core.config import config
+
+HTTP_CONNECT_TIMEOUT = config(
+    "KEEP_PROVIDERS_HTTP_CONNECT_TIMEOUT", default=10, cast=float
+)
+HTTP_READ_TIMEOUT = config("KEEP_PROVIDERS_HTTP_READ_TIMEOUT", default=30, cast=float)
+HTTP_RETRIES = config("KEEP_PROVIDERS_HTTP_RETRIES", default=3, cast=int)
+HTTP_POOL_SIZE = config("KEEP_PROVIDERS_HTTP_POOL_SIZE", default=10, cast=int)
+
+
+class ProviderHTTPAdapter(HTTPAdapter):
+    """
+    An adapter that keeps a pool of keep-alive connections per target host
+    and applies a default timeout to requests that don't set one.
+    """
+
+    def __init__(self, timeout: tuple[float, float], **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+def create_http_session(
+    connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+    read_timeout: float = HTTP_READ_TIMEOUT,
+    retries: int = HTTP_RETRIES,
+    pool_size: int = HTTP_POOL_SIZE,
+) -> requests.Session:
+    """
+    Create a session for the HTTP calls of a provider.
+
+    Connection errors and 502/503/504 responses are retried with a backoff,
+    responses are retried only for idempotent methods (not POST). Read timeouts
+    are not retried (the call would take retries times the timeout), they raise
+    `requests.exceptions.ReadTimeout`. Only the connections are shared between
+    the calls, cookies are not kept.
+    """
+    retry = Retry(
+        total=retries,
+        read=False,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False,
+    )
+    adapter = ProviderHTTPAdapter(
+        timeout=(connect_timeout, read_timeout),
+        max_retries=retry,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+    )
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_http_session_stats(session: requests.Session) -> dict:
+    """
+    Get the connections and requests count of each target host of the session.
+    """
+    stats = {}
+    for adapter in set(session.adapters.values()):
+        if not isinstance(adapter, ProviderHTTPAdapter):
+            continue
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            stats[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "connections": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle": (
+                    sum(1 for conn in pool.pool.queue if conn is not None)
+                    if pool.pool
+                    else 0
+                ),
+            }
+    return stats
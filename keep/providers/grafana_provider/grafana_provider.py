@@ -126,8 +126,8 @@ class GrafanaProvider(BaseProvider):
             f"{self.authentication_config.host}/api/access-control/user/permissions"
         )
         try:
-            response = requests.get(
-                permissions_api, headers=headers, timeout=5, verify=False
+            response = self.http_session.get(
+                permissions_api, headers=headers, verify=False
             ).json()
         except requests.exceptions.ConnectionError:
             self.logger.exception("Failed to connect to Grafana")
@@ -154,7 +154,7 @@ class GrafanaProvider(BaseProvider):
     def get_alerts_configuration(self, alert_id: str | None = None):
         api = f"{self.authentication_config.host}{APIEndpoints.ALERTING_PROVISIONING.value}/alert-rules"
         headers = {"Authorization": f"Bearer {self.authentication_config.token}"}
-        response = requests.get(api, verify=False, headers=headers)
+        response = self.http_session.get(api, verify=False, headers=headers)
         if not response.ok:
             self.logger.warning(
                 "Could not get alerts", extra={"response": response.json()}
@@ -171,7 +171,9 @@ class GrafanaProvider(BaseProvider):
         self.logger.info("Deploying alert")
         api = f"{self.authentication_config.host}{APIEndpoints.ALERTING_PROVISIONING.value}/alert-rules"
         headers = {"Authorization": f"Bearer {self.authentication_config.token}"}
-        response = requests.post(api, verify=False, json=alert, headers=headers)
+        response = self.http_session.post(
+            api, verify=False, json=alert, headers=headers
+        )
 
         if not response.ok:
             response_json = response.json()
@@ -239,7 +241,7 @@ class GrafanaProvider(BaseProvider):
         contacts_api = f"{self.authentication_config.host}{APIEndpoints.ALERTING_PROVISIONING.value}/contact-points"
         try:
             self.logger.info("Getting contact points")
-            all_contact_points = requests.get(
+            all_contact_points = self.http_session.get(
                 contacts_api, verify=False, headers=headers
             )
             all_contact_points.raise_for_status()
@@ -259,7 +261,7 @@ class GrafanaProvider(BaseProvider):
         self.logger.info("Getting Grafana version")
         try:
             health_api = f"{self.authentication_config.host}/api/health"
-            health_response = requests.get(
+            health_response = self.http_session.get(
                 health_api, verify=False, headers=headers
             ).json()
             grafana_version = health_response["version"]
@@ -275,7 +277,7 @@ class GrafanaProvider(BaseProvider):
                 webhook["settings"]["url"] = keep_api_url
                 webhook["settings"]["authorization_scheme"] = "digest"
                 webhook["settings"]["authorization_credentials"] = api_key
-                requests.put(
+                self.http_session.put(
                     f'{contacts_api}/{webhook["uid"]}',
                     verify=False,
                     json=webhook,
@@ -294,7 +296,7 @@ class GrafanaProvider(BaseProvider):
                         "authorization_credentials": api_key,
                     },
                 }
-                response = requests.post(
+                response = self.http_session.post(
                     contacts_api,
                     verify=False,
                     json=webhook,
@@ -309,7 +311,7 @@ class GrafanaProvider(BaseProvider):
             if webhook_exists:
                 webhook = webhook_exists[0]
                 webhook["settings"]["url"] = f"{keep_api_url}&api_key={api_key}"
-                requests.put(
+                self.http_session.put(
                     f'{contacts_api}/{webhook["uid"]}',
                     verify=False,
                     json=webhook,
@@ -326,7 +328,7 @@ class GrafanaProvider(BaseProvider):
                         "url": f"{keep_api_url}?api_key={api_key}",
                     },
                 }
-                response = requests.post(
+                response = self.http_session.post(
                     contacts_api,
                     verify=False,
                     json=webhook,
@@ -339,7 +341,7 @@ class GrafanaProvider(BaseProvider):
         if setup_alerts:
             self.logger.info("Setting up alerts")
             policies_api = f"{self.authentication_config.host}{APIEndpoints.ALERTING_PROVISIONING.value}/policies"
-            all_policies = requests.get(
+            all_policies = self.http_session.get(
                 policies_api, verify=False, headers=headers
             ).json()
             policy_exists = any(
@@ -374,7 +376,7 @@ class GrafanaProvider(BaseProvider):
                         "continue": True,
                     }
                 )
-                requests.put(
+                self.http_session.put(
                     policies_api,
                     verify=False,
                     json=all_policies,
@@ -442,7 +444,7 @@ class GrafanaProvider(BaseProvider):
         now = int(datetime.datetime.now().timestamp())
         api_endpoint = f"{self.authentication_config.host}/api/v1/rules/history?from={week_ago}&to={now}&limit=0"
         headers = {"Authorization": f"Bearer {self.authentication_config.token}"}
-        response = requests.get(api_endpoint, verify=False, headers=headers, timeout=3)
+        response = self.http_session.get(api_endpoint, verify=False, headers=headers)
         if not response.ok:
             raise ProviderException("Failed to get alerts from Grafana")
         events_history = response.json()
@@ -4,7 +4,6 @@ HttpProvider is a class that provides a way to send HTTP requests.
 import json
 import typing
 
-import requests
 from requests.exceptions import JSONDecodeError
 
 from keep.contextmanager.contextmanager import ContextManager
@@ -104,19 +103,19 @@ class HttpProvider(BaseProvider):
             },
         )
         if method == "GET":
-            response = requests.get(
+            response = self.http_session.get(
                 url, headers=headers, params=params, proxies=proxies, **kwargs
             )
         elif method == "POST":
-            response = requests.post(
+            response = self.http_session.post(
                 url, headers=headers, json=body, proxies=proxies, **kwargs
             )
         elif method == "PUT":
-            response = requests.put(
+            response = self.http_session.put(
                 url, headers=headers, json=body, proxies=proxies, **kwargs
             )
         elif method == "DELETE":
-            response = requests.delete(
+            response = self.http_session.delete(
                 url, headers=headers, json=body, proxies=proxies, **kwargs
             )
         else:
@@ -0,0 +1,130 @@
+import copy
+import dataclasses
+import logging
+import threading
+import time
+from collections.abc import Mapping
+
+from keep.api.core.config import config
+from keep.api.core.db import get_installed_providers
+from keep.api.models.db.provider import Provider
+from keep.contextmanager.contextmanager import ContextManager
+from keep.secretmanager.secretmanagerfactory import SecretManagerFactory
+
+logger = logging.getLogger(__name__)
+
+
+class LazyProviderConfig(Mapping):
+    """
+    The config of an installed provider, read from the secret manager only
+    when it's used (e.g. when the provider instance is built).
+    """
+
+    def __init__(self, tenant_id: str, provider: Provider):
+        self.tenant_id = tenant_id
+        self.provider = provider
+        self._config = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> dict:
+        with self._lock:
+            if self._config is None:
+                self._config = self._read_config()
+        return self._config
+
+    def _read_config(self) -> dict:
+        context_manager = ContextManager(tenant_id=self.tenant_id)
+        secret_manager = SecretManagerFactory.get_secret_manager(context_manager)
+        try:
+            provider_config = {"name": self.provider.name}
+            provider_config.update(
+                secret_manager.read_secret(
+                    secret_name=f"{self.tenant_id}_{self.provider.type}_{self.provider.id}",
+                    is_json=True,
+                )
+            )
+            return provider_config
+        # Somehow the provider is installed but the secret is missing, probably bug in deletion
+        except Exception:
+            logger.exception(
+                f"Could not get provider {self.provider.id} auth config from secret manager"
+            )
+            return {}
+
+    def __getitem__(self, key):
+        return self.resolve()[key]
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __len__(self):
+        return len(self.resolve())
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.resolve(), memo)
+
+    def __repr__(self):
+        # don't resolve (and print) the secret
+        return f"LazyProviderConfig(provider_id={self.provider.id!r})"
+
+
+@dataclasses.dataclass
+class TenantInstalledProviders:
+    providers: list[Provider]
+    loaded_at: float
+
+
+class InstalledProvidersRegistry:
+    """
+    A per tenant cache of the installed providers metadata (id, type, name...),
+    without their configs, so listing them doesn't read any secret.
+
+    The providers are loaded from the DB on the first use and again after
+    `ttl` seconds (providers can be installed by other workers), installing,
+    updating or deleting a provider invalidates its tenant.
+    """
+
+    @staticmethod
+    def get_instance() -> "InstalledProvidersRegistry":
+        if not hasattr(InstalledProvidersRegistry, "_instance"):
+            InstalledProvidersRegistry._instance = InstalledProvidersRegistry()
+        return InstalledProvidersRegistry._instance
+
+    def __init__(
+        self, ttl: int = config("KEEP_INSTALLED_PROVIDERS_TTL", default=60, cast=int)
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        self._tenants: dict[str, TenantInstalledProviders] = {}
+        self._lock = threading.Lock()
+
+    def get_installed_providers(self, tenant_id: str) -> list[Provider]:
+        with self._lock:
+            tenant_providers = self._tenants.get(tenant_id)
+            if (
+                tenant_providers
+                and time.monotonic() - tenant_providers.loaded_at <= self.ttl
+            ):
+                return list(tenant_providers.providers)
+        self.logger.debug("Loading installed providers", extra={"tenant_id": tenant_id})
+        tenant_providers = TenantInstalledProviders(
+            providers=get_installed_providers(tenant_id), loaded_at=time.monotonic()
+        )
+        with self._lock:
+            self._tenants[tenant_id] = tenant_providers
+        return list(tenant_providers.providers)
+
+    def get_provider_config(
+        self, tenant_id: str, provider: Provider
+    ) -> LazyProviderConfig:
+        """
+        Get the config of an installed provider, the secret is read on the first use.
+        """
+        return LazyProviderConfig(tenant_id, provider)
+
+    def invalidate(self, tenant_id: str | None = None):
+        with self._lock:
+            if tenant_id is None:
+                self._tenants.clear()
+            else:
+                self._tenants.pop(tenant_id, None)
@@ -1,9 +1,11 @@
 """
 Kafka Provider is a class that allows to ingest/digest data from Grafana.
 """
+
 import dataclasses
 import inspect
 import logging
+import time
 
 import pydantic
 
@@ -11,6 +13,8 @@ import pydantic
 from kafka import KafkaConsumer
 from kafka.errors import KafkaError, NoBrokersAvailable
 
+from keep.api.core.config import config
+from keep.api.core.dependencies import get_pusher_client
 from keep.contextmanager.contextmanager import ContextManager
 from keep.providers.base.base_provider import BaseProvider
 from keep.providers.models.provider_config import ProviderConfig, ProviderScope
@@ -105,6 +109,17 @@ class KafkaProvider(BaseProvider):
         )
     ]
     PROVIDER_TAGS = ["queue"]
+    # "single" pushes every record to the API, "batch" ingests the polled records in-process
+    CONSUMER_MODE = config("KEEP_KAFKA_CONSUMER_MODE", default="single")
+    BATCH_MAX_RECORDS = config("KEEP_KAFKA_BATCH_MAX_RECORDS", default=500, cast=int)
+    BATCH_MAX_WAIT_MS = config("KEEP_KAFKA_BATCH_MAX_WAIT_MS", default=1000, cast=int)
+    # seconds to wait before retrying a batch that failed to be persisted
+    BATCH_RETRY_INTERVAL = config(
+        "KEEP_KAFKA_BATCH_RETRY_INTERVAL", default=5, cast=float
+    )
+    # times a failed batch is polled again before it's ingested in halves,
+    #   the records that still fail on their own are skipped
+    BATCH_MAX_RETRIES = config("KEEP_KAFKA_BATCH_MAX_RETRIES", default=5, cast=int)
 
     def __init__(
         self, context_manager: ContextManager, provider_id: str, config: ProviderConfig
@@ -112,7 +127,21 @@ class KafkaProvider(BaseProvider):
         super().__init__(context_manager, provider_id, config)
         self.consume = False
         self.consumer = None
+        self.pusher_client = None
+        # the times the current batch failed to be ingested in a row
+        self._batch_retries = 0
         self.err = ""
+        self.metrics = {
+            "mode": self.CONSUMER_MODE,
+            "batches": 0,
+            "records": 0,
+            "failed_batches": 0,
+            "skipped_records": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            # "topic-partition" -> the records that were not consumed yet
+            "lag": {},
+        }
         # patch all Kafka loggers to contain the tenant_id
         for logger_name in logging.Logger.manager.loggerDict:
             if logger_name.startswith("kafka"):
@@ -177,7 +206,8 @@ class KafkaProvider(BaseProvider):
             "bootstrap_servers": self.authentication_config.host,
             "group_id": "keephq-group",
             "auto_offset_reset": "earliest",
-            "enable_auto_commit": True,  # this is typically needed
+            # in batch mode the offsets are committed after the batch is persisted
+            "enable_auto_commit": self.CONSUMER_MODE != "batch",
             "reconnect_backoff_max_ms": 30000,  # 30 seconds
             "client_id": self.context_manager.tenant_id,  # add tenant id to the logs
         }
@@ -185,9 +215,11 @@ class KafkaProvider(BaseProvider):
         if self.authentication_config.username and self.authentication_config.password:
             basic_conf.update(
                 {
-                    "security_protocol": "SASL_SSL"
-                    if self.authentication_config.username
-                    else "PLAINTEXT",
+                    "security_protocol": (
+                        "SASL_SSL"
+                        if self.authentication_config.username
+                        else "PLAINTEXT"
+                    ),
                     "sasl_mechanism": "PLAIN",
                     "sasl_plain_username": self.authentication_config.username,
                     "sasl_plain_password": self.authentication_config.password,
@@ -216,25 +248,38 @@ class KafkaProvider(BaseProvider):
         return {
             "status": status,
             "error": self.err,
+            "metrics": self.metrics,
         }
 
+    def _create_consumer(self, conf: dict) -> KafkaConsumer:
+        return KafkaConsumer(self.authentication_config.topic, **conf)
+
     def start_consume(self):
         self.consume = True
         conf = self._get_conf()
         try:
-            self.consumer = KafkaConsumer(self.authentication_config.topic, **conf)
+            self.consumer = self._create_consumer(conf)
         except NoBrokersAvailable:
             # retry with SASL_PLAINTEXT
             try:
                 conf["security_protocol"] = "SASL_PLAINTEXT"
-                self.consumer = KafkaConsumer(self.authentication_config.topic, **conf)
+                self.consumer = self._create_consumer(conf)
             except NoBrokersAvailable:
                 self.logger.exception(
                     f"Could not connect to Kafka at {self.authentication_config.host}"
                 )
                 return
 
+        if self.CONSUMER_MODE == "batch":
+            self.pusher_client = get_pusher_client()
         while self.consume:
+            if self.CONSUMER_MODE == "batch":
+                try:
+                    self._consume_batch()
+                except Exception:
+                    self.logger.exception("Error consuming messages from Kafka")
+                    break
+                continue
             try:
                 topics = self.consumer.poll(timeout_ms=1000)
                 if not topics:
@@ -254,7 +299,8 @@ class KafkaProvider(BaseProvider):
                 self.logger.exception("Error consuming message from Kafka")
                 break
 
-        # finally, dispose
+        # finally, send the buffered alerts and dispose
+        self.flush_pushed_alerts()
         if self.consumer:
             try:
                 self.consumer.close()
@@ -266,6 +312,128 @@ class KafkaProvider(BaseProvider):
     def stop_consume(self):
         self.consume = False
 
+    def _consume_batch(self) -> int:
+        """
+        Poll a batch of records and ingest it in-process, the offsets are
+        committed only after the batch is persisted, a batch that failed is
+        polled again. After `BATCH_MAX_RETRIES` failures in a row, the batch is
+        ingested in halves until the records that fail are found, those are
+        skipped (their offsets are logged) and the offsets are committed.
+
+        Returns:
+            int: The number of records that were ingested.
+        """
+        topics = self.consumer.poll(
+            timeout_ms=self.BATCH_MAX_WAIT_MS, max_records=self.BATCH_MAX_RECORDS
+        )
+        if not topics:
+            self._update_lag()
+            return 0
+
+        # (topic partition, offset, alert) of each record
+        batch = []
+        # partition -> the offset of its first record in the batch
+        first_offsets = {}
+        for tp, records in topics.items():
+            if records:
+                first_offsets[tp] = records[0].offset
+            for record in records:
+                try:
+                    alert = self._format_pushed_alert(record.value)
+                except Exception:
+                    self.logger.warning(
+                        "Dismissing message that is not a valid alert",
+                        extra={
+                            "topic": tp.topic,
+                            "partition": tp.partition,
+                            "offset": record.offset,
+                        },
+                        exc_info=True,
+                    )
+                    continue
+                if alert is None:
+                    continue
+                batch.append((tp, record.offset, alert))
+
+        self.logger.info(
+            "Received batch from Kafka",
+            extra={"num_of_records": sum(map(len, topics.values()))},
+        )
+        try:
+            if self._batch_retries < self.BATCH_MAX_RETRIES:
+                if batch:
+                    self._ingest_alerts(
+                        [alert for _, _, alert in batch], self.pusher_client
+                    )
+                failed = []
+            else:
+                failed = self._ingest_bisect(batch)
+            self.consumer.commit()
+        except Exception:
+            self.logger.exception(
+                "Failed to ingest batch, it will be retried",
+                extra={"num_of_alerts": len(batch), "retries": self._batch_retries},
+            )
+            # rewind so the next poll returns the same batch
+            for tp, offset in first_offsets.items():
+                self.consumer.seek(tp, offset)
+            self._batch_retries += 1
+            self.metrics["failed_batches"] += 1
+            time.sleep(self.BATCH_RETRY_INTERVAL)
+            return 0
+
+        self._batch_retries = 0
+        for tp, offset, _ in failed:
+            self.logger.error(
+                "Skipping record that failed to be ingested",
+                extra={"topic": tp.topic, "partition": tp.partition, "offset": offset},
+            )
+        ingested = len(batch) - len(failed)
+        self.metrics["batches"] += 1
+        self.metrics["records"] += ingested
+        self.metrics["skipped_records"] += len(failed)
+        self.metrics["last_batch_size"] = ingested
+        self.metrics["max_batch_size"] = max(self.metrics["max_batch_size"], ingested)
+        self._update_lag()
+        return ingested
+
+    def _ingest_bisect(self, batch: list) -> list:
+        """
+        Ingest the batch, if it fails ingest each half of it on its own.
+
+        Returns:
+            list: the (topic partition, offset, alert) of the records that
+                failed to be ingested on their own.
+        """
+        if not batch:
+            return []
+        try:
+            self._ingest_alerts([alert for _, _, alert in batch], self.pusher_client)
+            return []
+        except Exception:
+            if len(batch) == 1:
+                self.logger.exception(
+                    "Failed to ingest record", extra={"offset": batch[0][1]}
+                )
+                return batch
+        middle = len(batch) // 2
+        return self._ingest_bisect(batch[:middle]) + self._ingest_bisect(batch[middle:])
+
+    def _update_lag(self):
+        lag = {}
+        try:
+            for tp in self.consumer.assignment():
+                highwater = self.consumer.highwater(tp)
+                if highwater is None:
+                    continue
+                lag[f"{tp.topic}-{tp.partition}"] = max(
+                    highwater - self.consumer.position(tp), 0
+                )
+        except Exception:
+            self.logger.debug("Failed to get the consumer lag", exc_info=True)
+            return
+        self.metrics["lag"] = lag
+
 
 if __name__ == "__main__":
     # Output debug messages
@@ -8,7 +8,6 @@ import os
 from typing import Optional
 
 import pydantic
-import requests
 from requests.auth import HTTPBasicAuth
 
 from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
@@ -120,7 +119,7 @@ receivers:
                 self.authentication_config.username, self.authentication_config.password
             )
 
-        response = requests.get(
+        response = self.http_session.get(
             f"{self.authentication_config.url}/api/v1/query",
             params={"query": query},
             auth=(
@@ -142,7 +141,7 @@ receivers:
             auth = HTTPBasicAuth(
                 self.authentication_config.username, self.authentication_config.password
             )
-        response = requests.get(
+        response = self.http_session.get(
             f"{self.authentication_config.url}/api/v1/alerts",
             auth=auth,
         )
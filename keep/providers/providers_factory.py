@@ -14,14 +14,14 @@ import typing
 from dataclasses import fields
 from typing import get_args
 
-from keep.api.core.db import (
-    get_consumer_providers,
-    get_installed_providers,
-    get_linked_providers,
-)
+from keep.api.core.db import get_consumer_providers, get_linked_providers
 from keep.api.models.provider import Provider
 from keep.contextmanager.contextmanager import ContextManager
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.installed_providers_registry import (
+    InstalledProvidersRegistry,
+    LazyProviderConfig,
+)
 from keep.providers.models.provider_config import ProviderConfig
 from keep.providers.models.provider_method import ProviderMethodDTO, ProviderMethodParam
 from keep.secretmanager.secretmanagerfactory import SecretManagerFactory
@@ -82,6 +82,9 @@ class ProvidersFactory:
             BaseProvider: The provider class.
         """
         provider_class = ProvidersFactory.get_provider_class(provider_type)
+        # the config of an installed provider is read only now that the provider is built
+        if isinstance(provider_config, LazyProviderConfig):
+            provider_config = provider_config.resolve()
         # we keep a copy of the auth config so we can check if the provider has changed it and we need to update it
         #   an example for that is the Datadog provider that uses OAuth and needs to save the fresh new refresh token.
         provider_config_copy = copy.deepcopy(provider_config)
@@ -370,10 +373,9 @@ class ProvidersFactory:
         if all_providers is None:
             all_providers = ProvidersFactory.get_all_providers()
 
-        installed_providers = get_installed_providers(tenant_id)
+        registry = InstalledProvidersRegistry.get_instance()
+        installed_providers = registry.get_installed_providers(tenant_id)
         providers = []
-        context_manager = ContextManager(tenant_id=tenant_id)
-        secret_manager = SecretManagerFactory.get_secret_manager(context_manager)
         for p in installed_providers:
             provider: Provider = next(
                 filter(
@@ -389,22 +391,13 @@ class ProvidersFactory:
             provider_copy.id = p.id
             provider_copy.installed_by = p.installed_by
             provider_copy.installation_time = p.installation_time
-            try:
-                provider_auth = {"name": p.name}
-                if include_details:
-                    provider_auth.update(
-                        secret_manager.read_secret(
-                            secret_name=f"{tenant_id}_{p.type}_{p.id}", is_json=True
-                        )
-                    )
-            # Somehow the provider is installed but the secret is missing, probably bug in deletion
-            # TODO: solve its root cause
-            except Exception:
-                logger.exception(
-                    f"Could not get provider {provider_copy.id} auth config from secret manager"
-                )
-                continue
-            provider_copy.details = provider_auth
+            # the secret is read only when the details are used (e.g. the provider
+            #   is pulled or the providers are returned to the client)
+            provider_copy.details = (
+                registry.get_provider_config(tenant_id, p)
+                if include_details
+                else {"name": p.name}
+            )
             provider_copy.validatedScopes = p.validatedScopes
             providers.append(provider_copy)
         return providers
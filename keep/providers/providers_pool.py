@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from keep.api.core.config import config
+from keep.contextmanager.contextmanager import ContextManager
+from keep.providers.base.base_provider import BaseProvider
+from keep.providers.installed_providers_registry import LazyProviderConfig
+from keep.providers.providers_factory import ProvidersFactory
+
+# (tenant_id, provider_id, provider_type, config revision)
+PoolKey = tuple[str, str, str, str]
+
+
+def get_config_revision(provider_config: dict) -> str:
+    """
+    A digest of the provider config, a changed config gets a new revision so
+    instances built with the old config are never reused.
+    """
+    return hashlib.sha256(
+        json.dumps(provider_config, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class PooledProvider:
+    """
+    The provider of a step when the pool is enabled, the instance is taken
+    from the pool on the first use in the step and given back after the step
+    ran, so steps that never run don't build their provider.
+    """
+
+    def __init__(
+        self,
+        pool: "ProvidersPool",
+        context_manager: ContextManager,
+        provider_id: str,
+        provider_type: str,
+        provider_config: dict,
+    ):
+        self.pool = pool
+        self.context_manager = context_manager
+        self.provider_id = provider_id
+        self.provider_type = provider_type
+        self.provider_config = provider_config
+        # the results of the instances that ran the step
+        self.results = []
+        self._key: PoolKey | None = None
+        self._provider: BaseProvider | None = None
+
+    def acquire(self) -> BaseProvider:
+        if self._provider is None:
+            self._key, self._provider = self.pool.acquire(
+                self.context_manager,
+                self.provider_id,
+                self.provider_type,
+                self.provider_config,
+            )
+        return self._provider
+
+    def release(self):
+        if self._provider is None:
+            return
+        self.results.extend(self._provider.results)
+        self.pool.release(self._key, self._provider)
+        self._key, self._provider = None, None
+
+
+class ProvidersPool:
+    """
+    A process wide pool of idle provider instances keyed by (tenant_id,
+    provider_id, provider_type, config revision), so providers with an
+    expensive setup (cloud SDK clients, authenticated sessions) are built once
+    and reused by the next runs instead of being built by every parse.
+
+    An instance is used by one step at a time, it's bound to the context
+    manager of the run when it's taken from the pool. Instances idle for more
+    than `ttl` seconds or beyond `max_size` are evicted and disposed.
+    The pool is disabled when `max_size` is 0 (the default).
+    """
+
+    @staticmethod
+    def get_instance() -> "ProvidersPool":
+        if not hasattr(ProvidersPool, "_instance"):
+            ProvidersPool._instance = ProvidersPool()
+        return ProvidersPool._instance
+
+    def __init__(
+        self,
+        max_size: int = config("KEEP_PROVIDERS_POOL_SIZE", default=0, cast=int),
+        ttl: int = config("KEEP_PROVIDERS_POOL_TTL", default=600, cast=int),
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.max_size = max_size
+        self.ttl = ttl
+        # key -> idle instances and the time they were released, the least recently released key first
+        self._idle: OrderedDict[PoolKey, list[tuple[BaseProvider, float]]] = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get_provider(
+        self,
+        context_manager: ContextManager,
+        provider_id: str,
+        provider_type: str,
+        provider_config: dict,
+    ) -> PooledProvider:
+        """
+        Get a step provider that is taken from the pool only when the step runs.
+        """
+        return PooledProvider(
+            self, context_manager, provider_id, provider_type, provider_config
+        )
+
+    def acquire(
+        self,
+        context_manager: ContextManager,
+        provider_id: str,
+        provider_type: str,
+        provider_config: dict,
+    ) -> tuple[PoolKey, BaseProvider]:
+        if isinstance(provider_config, LazyProviderConfig):
+            provider_config = provider_config.resolve()
+        key = (
+            context_manager.tenant_id,
+            provider_id,
+            provider_type,
+            get_config_revision(provider_config),
+        )
+        provider = None
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                provider, _ = idle.pop()
+                self._size -= 1
+                if not idle:
+                    del self._idle[key]
+                self._hits += 1
+            else:
+                self._misses += 1
+        if provider is not None:
+            provider.bind_context_manager(context_manager)
+            return key, provider
+        self.logger.debug(
+            "Building pooled provider",
+            extra={"provider_id": provider_id, "provider_type": provider_type},
+        )
+        provider = ProvidersFactory.get_provider(
+            context_manager, provider_id, provider_type, provider_config
+        )
+        return key, provider
+
+    def release(self, key: PoolKey, provider: BaseProvider):
+        now = time.monotonic()
+        with self._lock:
+            self._idle.setdefault(key, []).append((provider, now))
+            self._idle.move_to_end(key)
+            self._size += 1
+            evicted = self._evict(now)
+        self._dispose(evicted)
+
+    def invalidate(self, tenant_id: str | None = None, provider_id: str | None = None):
+        with self._lock:
+            evicted = []
+            for key in list(self._idle):
+                if tenant_id in (None, key[0]) and provider_id in (None, key[1]):
+                    evicted.extend(provider for provider, _ in self._idle.pop(key))
+            self._size -= len(evicted)
+        self._dispose(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self._size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+            }
+
+    def _evict(self, now: float) -> list[BaseProvider]:
+        evicted = []
+        for key in list(self._idle):
+            idle = self._idle[key]
+            while idle and (self._size > self.max_size or now - idle[0][1] > self.ttl):
+                evicted.append(idle.pop(0)[0])
+                self._size -= 1
+            if not idle:
+                del self._idle[key]
+        self._evictions += len(evicted)
+        return evicted
+
+    def _dispose(self, providers: list[BaseProvider]):
+        for provider in providers:
+            try:
+                provider.dispose()
+                provider.close_http_session()
+            except Exception:
+                self.logger.exception(
+                    "Failed to dispose provider",
+                    extra={"provider_id": provider.provider_id},
+                )
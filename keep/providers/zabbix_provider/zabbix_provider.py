@@ -10,7 +10,6 @@ import random
 from typing import Literal, Optional
 
 import pydantic
-import requests
 
 from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
 from keep.contextmanager.contextmanager import ContextManager
@@ -329,7 +328,7 @@ class ZabbixProvider(BaseProvider):
         # zabbix < 6.4 compatibility
         data["auth"] = f"{self.authentication_config.auth_token}"
 
-        response = requests.post(url, json=data, headers=headers)
+        response = self.http_session.post(url, json=data, headers=headers)
 
         response.raise_for_status()
         response_json = response.json()
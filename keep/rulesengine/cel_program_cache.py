@@ -0,0 +1,75 @@
+import logging
+import threading
+from collections import OrderedDict
+
+import celpy
+
+from keep.api.core.config import config
+
+
+class CELProgramCache:
+    """
+    A process wide, size bounded (LRU) cache of compiled CEL programs keyed by
+    the expression text, so every unique expression is compiled once.
+
+    Callers that preprocess their expressions (e.g. with
+    RulesEngine.preprocess_cel_expression) should pass the preprocessed text.
+    Compiled programs keep no evaluation state and can be shared between threads.
+    """
+
+    @staticmethod
+    def get_instance() -> "CELProgramCache":
+        if not hasattr(CELProgramCache, "_instance"):
+            CELProgramCache._instance = CELProgramCache()
+        return CELProgramCache._instance
+
+    def __init__(
+        self,
+        max_size: int = config("KEEP_CEL_PROGRAM_CACHE_SIZE", default=2048, cast=int),
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.max_size = max_size
+        self._programs: OrderedDict[str, celpy.Runner] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_program(self, expression: str) -> celpy.Runner:
+        """
+        Get the compiled program of a CEL expression, compiling it on the first use.
+
+        Raises:
+            celpy.CELParseError: If the expression cannot be compiled.
+        """
+        with self._lock:
+            program = self._programs.get(expression)
+            if program is not None:
+                self._programs.move_to_end(expression)
+                self.hits += 1
+                return program
+            self.misses += 1
+        # compile outside of the lock, worst case two threads compile the same expression
+        #   (a new environment each time since the CEL parser keeps per-parse state)
+        env = celpy.Environment()
+        ast = env.compile(expression)
+        program = env.program(ast)
+        with self._lock:
+            self._programs[expression] = program
+            self._programs.move_to_end(expression)
+            while len(self._programs) > self.max_size:
+                self._programs.popitem(last=False)
+        return program
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._programs),
+            "max_size": self.max_size,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._programs.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,206 @@
+import functools
+import logging
+import re
+
+import celpy
+import lark
+
+logger = logging.getLogger(__name__)
+
+# a field path (e.g. ("labels", "queue")) and the values it must be equal to
+RulePredicate = tuple[tuple[str, ...], frozenset[str]]
+
+# only plain quoted strings, anything with escapes/prefixes is left to CEL
+STRING_LITERAL_PATTERN = re.compile(r"^([\"'])([^\"'\\]*)\1$")
+# nodes that wrap a single child without changing its meaning
+PASSTHROUGH_NODES = {
+    "expr",
+    "conditionalor",
+    "conditionaland",
+    "relation",
+    "addition",
+    "multiplication",
+    "unary",
+    "member",
+    "primary",
+    "paren_expr",
+}
+
+
+def _unwrap(node):
+    while (
+        isinstance(node, lark.Tree)
+        and node.data in PASSTHROUGH_NODES
+        and len(node.children) == 1
+    ):
+        node = node.children[0]
+    return node
+
+
+def _conjuncts(node) -> list:
+    node = _unwrap(node)
+    if (
+        isinstance(node, lark.Tree)
+        and node.data == "conditionaland"
+        and len(node.children) == 2
+    ):
+        return _conjuncts(node.children[0]) + _conjuncts(node.children[1])
+    return [node]
+
+
+def _field_path(node) -> tuple[str, ...] | None:
+    node = _unwrap(node)
+    if not isinstance(node, lark.Tree):
+        return None
+    if node.data == "ident" and len(node.children) == 1:
+        return (str(node.children[0]),)
+    if node.data == "member_dot" and len(node.children) == 2:
+        parent = _field_path(node.children[0])
+        if parent is None:
+            return None
+        return parent + (str(node.children[1]),)
+    return None
+
+
+def _string_literal(node) -> str | None:
+    node = _unwrap(node)
+    if not (isinstance(node, lark.Tree) and node.data == "literal" and node.children):
+        return None
+    token = node.children[0]
+    if getattr(token, "type", None) != "STRING_LIT":
+        return None
+    match = STRING_LITERAL_PATTERN.match(str(token))
+    return match.group(2) if match else None
+
+
+def _string_list_literal(node) -> frozenset[str] | None:
+    node = _unwrap(node)
+    if not (isinstance(node, lark.Tree) and node.data == "list_lit"):
+        return None
+    # an empty list literal has no exprlist
+    if not node.children:
+        return frozenset()
+    values = set()
+    for item in node.children[0].children:
+        value = _string_literal(item)
+        if value is None:
+            return None
+        values.add(value)
+    return frozenset(values)
+
+
+def _predicate(node) -> RulePredicate | None:
+    # relation(relation_eq(lhs), rhs) / relation(relation_in(lhs), rhs)
+    if not (
+        isinstance(node, lark.Tree)
+        and node.data == "relation"
+        and len(node.children) == 2
+        and isinstance(node.children[0], lark.Tree)
+    ):
+        return None
+    operator, rhs = node.children
+    lhs = operator.children[0]
+    if operator.data == "relation_eq":
+        # field == "value" or "value" == field
+        for field, value in ((lhs, rhs), (rhs, lhs)):
+            path, literal = _field_path(field), _string_literal(value)
+            if path is not None and literal is not None:
+                return path, frozenset([literal])
+    elif operator.data == "relation_in":
+        path, literals = _field_path(lhs), _string_list_literal(rhs)
+        if path is not None and literals is not None:
+            return path, literals
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def extract_subrule_predicates(sub_rule: str) -> tuple[RulePredicate, ...]:
+    """
+    Extract the necessary conditions of a CEL sub rule: the equality (or `in`)
+    predicates between a field and string literals that are top level
+    conjuncts of the sub rule, so the sub rule cannot be true without them.
+
+    Returns an empty tuple if the sub rule has no such predicates (or cannot be parsed).
+    """
+    try:
+        ast = celpy.Environment().compile(sub_rule)
+    except celpy.CELParseError:
+        return ()
+    predicates = [_predicate(conjunct) for conjunct in _conjuncts(ast)]
+    return tuple(predicate for predicate in predicates if predicate is not None)
+
+
+def _get_field(payload: dict, path: tuple[str, ...]):
+    value = payload
+    for part in path:
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+class RulesIndex:
+    """
+    An inverted index from (field path, value) to the rules that might apply
+    to an event with that value, so run_rules only evaluates plausible rules.
+
+    A rule applies if any of its sub rules apply, so a rule is indexed only if
+    every sub rule has necessary predicates (see extract_subrule_predicates),
+    any other rule is a candidate for every event.
+    The index only prunes rules that cannot match, every candidate is still
+    fully evaluated, so the results are the same as evaluating all the rules.
+    """
+
+    def __init__(self, rules: list, extract_subrules):
+        self.rules = rules
+        # (field path, value) of the first predicate of a sub rule ->
+        #   (rule id, the other predicates of the sub rule)
+        self._index: dict[
+            tuple[tuple[str, ...], str], list[tuple[str, tuple[RulePredicate, ...]]]
+        ] = {}
+        # the field paths used by the index
+        self._paths: set[tuple[str, ...]] = set()
+        self._unindexed: set[str] = set()
+        for rule in rules:
+            rule_id = str(rule.id)
+            sub_rules_predicates = [
+                extract_subrule_predicates(sub_rule)
+                for sub_rule in extract_subrules(rule.definition_cel)
+            ]
+            if not sub_rules_predicates or not all(sub_rules_predicates):
+                self._unindexed.add(rule_id)
+                continue
+            for (path, values), *other_predicates in sub_rules_predicates:
+                self._paths.add(path)
+                for value in values:
+                    self._index.setdefault((path, value), []).append(
+                        (rule_id, tuple(other_predicates))
+                    )
+        logger.debug(
+            "Built rules index",
+            extra={
+                "number_of_rules": len(rules),
+                "number_of_unindexed_rules": len(self._unindexed),
+            },
+        )
+
+    def get_candidate_rule_ids(self, payload: dict) -> set[str]:
+        """
+        Get the ids of the rules that might apply to an event.
+
+        Args:
+            payload (dict): the event as the CEL activation sees it.
+        """
+        candidates = set(self._unindexed)
+        for path in self._paths:
+            value = _get_field(payload, path)
+            if not isinstance(value, str):
+                continue
+            for rule_id, other_predicates in self._index.get((path, value), ()):
+                if rule_id in candidates:
+                    continue
+                if all(
+                    isinstance(other_value := _get_field(payload, other_path), str)
+                    and other_value in other_values
+                    for other_path, other_values in other_predicates
+                ):
+                    candidates.add(rule_id)
+        return candidates
@@ -11,6 +11,8 @@ from keep.api.core.db import create_alert as create_alert_db
 from keep.api.core.db import get_rules as get_rules_db
 from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
 from keep.api.models.group import GroupDto
+from keep.rulesengine.cel_program_cache import CELProgramCache
+from keep.rulesengine.rule_index import RulesIndex
 
 
 class RulesEngine:
@@ -46,16 +48,30 @@ class RulesEngine:
     def run_rules(self, events: list[AlertDto]):
         self.logger.info("Running rules")
         rules = get_rules_db(tenant_id=self.tenant_id)
+        # most events can match only a few rules, so use the rules index to
+        #   evaluate only the rules that might apply to each event
+        rules_index = RulesIndex(rules, self._extract_subrules)
+        payloads = [self._get_event_payload(event) for event in events]
+        candidate_rule_ids = [
+            rules_index.get_candidate_rule_ids(payload) for payload in payloads
+        ]
 
         groups = []
         for rule in rules:
             self.logger.info(f"Evaluating rule {rule.name}")
-            for event in events:
+            for event, payload, event_candidate_rule_ids in zip(
+                events, payloads, candidate_rule_ids
+            ):
+                if str(rule.id) not in event_candidate_rule_ids:
+                    self.logger.debug(
+                        f"Rule {rule.name} on event {event.id} is not relevant (index)"
+                    )
+                    continue
                 self.logger.info(
                     f"Checking if rule {rule.name} apply to event {event.id}"
                 )
                 try:
-                    rule_result = self._check_if_rule_apply(rule, event)
+                    rule_result = self._check_if_rule_apply(rule, event, payload)
                 except Exception:
                     self.logger.exception(
                         f"Failed to evaluate rule {rule.name} on event {event.id}"
@@ -173,22 +189,28 @@ class RulesEngine:
         sub_rules[-1] = sub_rules[-1][:-1]
         return sub_rules
 
-    # TODO: a lot of unit tests to write here
-    def _check_if_rule_apply(self, rule, event: AlertDto):
-        sub_rules = self._extract_subrules(rule.definition_cel)
+    def _get_event_payload(self, event: AlertDto) -> dict:
+        # the event as the rules see it
         payload = event.dict()
         # workaround since source is a list
         # todo: fix this in the future
         payload["source"] = payload["source"][0]
+        return json.loads(json.dumps(payload, default=str))
+
+    # TODO: a lot of unit tests to write here
+    def _check_if_rule_apply(self, rule, event: AlertDto, payload: dict = None):
+        sub_rules = self._extract_subrules(rule.definition_cel)
+        if payload is None:
+            payload = self._get_event_payload(event)
 
         # what we do here is to compile the CEL rule and evaluate it
         #   https://github.com/cloud-custodian/cel-python
         #   https://github.com/google/cel-spec
-        env = celpy.Environment()
+        # the compiled programs are cached, so every sub rule is compiled once
+        cel_program_cache = CELProgramCache.get_instance()
+        activation = celpy.json_to_cel(payload)
         for sub_rule in sub_rules:
-            ast = env.compile(sub_rule)
-            prgm = env.program(ast)
-            activation = celpy.json_to_cel(json.loads(json.dumps(payload, default=str)))
+            prgm = cel_program_cache.get_program(sub_rule)
             try:
                 r = prgm.evaluate(activation)
             except celpy.evaluation.CELEvalError as e:
@@ -364,15 +386,13 @@ class RulesEngine:
             list[AlertDto]: list of alerts that are related to the cel
         """
         logger = logging.getLogger(__name__)
-        env = celpy.Environment()
         # if the cel is empty, return all the alerts
         if not cel:
             logger.debug("No CEL expression provided")
             return alerts
         # preprocess the cel expression
         cel = RulesEngine.preprocess_cel_expression(cel)
-        ast = env.compile(cel)
-        prgm = env.program(ast)
+        prgm = CELProgramCache.get_instance().get_program(cel)
         filtered_alerts = []
         for alert in alerts:
             payload = alert.dict()
@@ -3,6 +3,7 @@ import enum
 from keep.api.core.config import config
 from keep.contextmanager.contextmanager import ContextManager
 from keep.secretmanager.secretmanager import BaseSecretManager
+from keep.secretmanager.secretscache import CachedSecretManager, SecretsCache
 
 
 class SecretManagerTypes(enum.Enum):
@@ -23,6 +24,24 @@ class SecretManagerFactory:
             secret_manager_type = SecretManagerTypes[
                 config("SECRET_MANAGER_TYPE", default="FILE").upper()
             ]
+        if SecretsCache.get_instance().ttl <= 0:
+            return SecretManagerFactory._create_secret_manager(
+                context_manager, secret_manager_type, **kwargs
+            )
+        return CachedSecretManager(
+            context_manager,
+            secret_manager_type.value,
+            lambda: SecretManagerFactory._create_secret_manager(
+                context_manager, secret_manager_type, **kwargs
+            ),
+        )
+
+    @staticmethod
+    def _create_secret_manager(
+        context_manager: ContextManager,
+        secret_manager_type: SecretManagerTypes,
+        **kwargs,
+    ) -> BaseSecretManager:
         if secret_manager_type == SecretManagerTypes.FILE:
             from keep.secretmanager.filesecretmanager import FileSecretManager
 
@@ -0,0 +1,135 @@
+import copy
+import logging
+import threading
+import time
+import typing
+
+from keep.api.core.config import config
+from keep.contextmanager.contextmanager import ContextManager
+from keep.secretmanager.secretmanager import BaseSecretManager
+
+
+class SecretsCache:
+    """
+    A process wide read-through cache of the secrets of all the secret managers.
+
+    Secrets are cached for `ttl` seconds (secrets can be written by other
+    workers), writing or deleting a secret through a secret manager of this
+    process invalidates it right away.
+    """
+
+    @staticmethod
+    def get_instance() -> "SecretsCache":
+        if not hasattr(SecretsCache, "_instance"):
+            SecretsCache._instance = SecretsCache()
+        return SecretsCache._instance
+
+    def __init__(
+        self, ttl: int = config("KEEP_SECRETS_CACHE_TTL", default=60, cast=int)
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        # (secret manager type, secret name, is_json) -> (expires at, secret)
+        self._secrets: dict[tuple[str, str, bool], tuple[float, typing.Any]] = {}
+        # incremented by every invalidation, so secrets that were read before
+        #   an invalidation are not cached after it
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(
+        self,
+        secret_manager_type: str,
+        secret_name: str,
+        is_json: bool,
+        read_secret: typing.Callable[[], typing.Any],
+    ):
+        """
+        Get a secret, reading it with `read_secret` if it's not cached.
+        """
+        key = (secret_manager_type, secret_name, is_json)
+        with self._lock:
+            cached = self._secrets.get(key)
+            if cached and cached[0] > time.monotonic():
+                self._hits += 1
+                # the callers may change the secret (e.g. a provider config)
+                return copy.deepcopy(cached[1])
+            self._misses += 1
+            generation = self._generation
+        secret = read_secret()
+        with self._lock:
+            if generation == self._generation:
+                self._secrets[key] = (time.monotonic() + self.ttl, secret)
+        return copy.deepcopy(secret)
+
+    def invalidate(self, secret_manager_type: str, secret_name: str):
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            for is_json in (True, False):
+                self._secrets.pop((secret_manager_type, secret_name, is_json), None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._secrets.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._secrets),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "ttl": self.ttl,
+            }
+
+
+class CachedSecretManager(BaseSecretManager):
+    """
+    A secret manager that reads the secrets through the secrets cache.
+
+    The actual secret manager is created only when it's needed (a secret
+    that is not cached, or a write/delete), since creating some of them is
+    expensive (e.g. loading the kubernetes config).
+    """
+
+    def __init__(
+        self,
+        context_manager: ContextManager,
+        secret_manager_type: str,
+        create_secret_manager: typing.Callable[[], BaseSecretManager],
+    ):
+        super().__init__(context_manager)
+        self.secret_manager_type = secret_manager_type
+        self._create_secret_manager = create_secret_manager
+        self._secret_manager = None
+        self._secrets_cache = SecretsCache.get_instance()
+
+    @property
+    def secret_manager(self) -> BaseSecretManager:
+        if self._secret_manager is None:
+            self._secret_manager = self._create_secret_manager()
+        return self._secret_manager
+
+    def read_secret(self, secret_name: str, is_json: bool = False) -> str | dict:
+        return self._secrets_cache.get(
+            self.secret_manager_type,
+            secret_name,
+            is_json,
+            lambda: self.secret_manager.read_secret(secret_name, is_json=is_json),
+        )
+
+    def write_secret(self, secret_name: str, secret_value: str) -> None:
+        try:
+            self.secret_manager.write_secret(secret_name, secret_value)
+        finally:
+            self._secrets_cache.invalidate(self.secret_manager_type, secret_name)
+
+    def delete_secret(self, secret_name: str) -> None:
+        try:
+            self.secret_manager.delete_secret(secret_name)
+        finally:
+            self._secrets_cache.invalidate(self.secret_manager_type, secret_name)
@@ -6,6 +6,7 @@ from keep.contextmanager.contextmanager import ContextManager
 from keep.exceptions.action_error import ActionError
 from keep.iohandler.iohandler import IOHandler
 from keep.providers.base.base_provider import BaseProvider
+from keep.providers.providers_pool import PooledProvider
 from keep.step.step_provider_parameter import StepProviderParameter
 from keep.throttles.throttle_factory import ThrottleFactory
 
@@ -22,7 +23,7 @@ class Step:
         step_id: str,
         config: dict,
         step_type: StepType,
-        provider: BaseProvider,
+        provider: BaseProvider | PooledProvider,
         provider_parameters: dict,
     ):
         self.config = config
@@ -62,6 +63,15 @@ class Step:
                 "Failed to run step %s with error %s", self.step_id, e, exc_info=True
             )
             raise ActionError(e)
+        finally:
+            # give the pooled provider back for the next runs
+            if isinstance(self.provider, PooledProvider):
+                self.provider.release()
+
+    def _get_provider(self) -> BaseProvider:
+        if isinstance(self.provider, PooledProvider):
+            return self.provider.acquire()
+        return self.provider
 
     def _check_throttling(self, action_name):
         throttling = self.config.get("throttle")
@@ -242,19 +252,16 @@ class Step:
                 self.provider_parameters
             )
 
+            provider = self._get_provider()
             for curr_retry_count in range(self.__retry_count + 1):
                 self.logger.info(
                     f"Running {self.step_id} {self.step_type}, current retry: {curr_retry_count}"
                 )
                 try:
                     if self.step_type == StepType.STEP:
-                        step_output = self.provider.query(
-                            **rendered_providers_parameters
-                        )
+                        step_output = provider.query(**rendered_providers_parameters)
                     else:
-                        step_output = self.provider.notify(
-                            **rendered_providers_parameters
-                        )
+                        step_output = provider.notify(**rendered_providers_parameters)
                     # exiting the loop as step/action execution was successful
                     self.context_manager.set_step_context(
                         self.step_id, results=step_output, foreach=self.foreach
@@ -272,7 +279,7 @@ class Step:
 
                         time.sleep(self.__retry_interval)
 
-            extra_context = self.provider.expose()
+            extra_context = provider.expose()
             rendered_providers_parameters.update(extra_context)
             self.context_manager.set_step_provider_paremeters(
                 self.step_id, rendered_providers_parameters
@@ -0,0 +1,85 @@
+import dataclasses
+import logging
+import threading
+from collections import OrderedDict
+
+import yaml
+
+from keep.api.core.config import config
+
+
+@dataclasses.dataclass
+class WorkflowDefinition:
+    workflow_id: str
+    revision: int
+    # the workflow yaml as stored in the db (without the "workflow" key)
+    workflow_yaml: dict
+    triggers: list[dict]
+
+
+class WorkflowDefinitionsCache:
+    """
+    A process wide, size bounded (LRU) cache of the loaded workflow yamls keyed
+    by (tenant_id, workflow_id, revision), so events are matched against the
+    workflow triggers without loading the yaml or parsing the workflow.
+
+    Every update of a workflow increments its revision, so entries of older
+    revisions are never used again; `invalidate` only frees them early.
+    """
+
+    @staticmethod
+    def get_instance() -> "WorkflowDefinitionsCache":
+        if not hasattr(WorkflowDefinitionsCache, "_instance"):
+            WorkflowDefinitionsCache._instance = WorkflowDefinitionsCache()
+        return WorkflowDefinitionsCache._instance
+
+    def __init__(
+        self,
+        max_size: int = config("KEEP_WORKFLOWS_CACHE_SIZE", default=1000, cast=int),
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.max_size = max_size
+        self._definitions: OrderedDict[tuple[str, str, int], WorkflowDefinition] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id: str, workflow_model) -> WorkflowDefinition:
+        """
+        Get the definition of a workflow, loading it on the first use.
+
+        Args:
+            tenant_id (str): the tenant id.
+            workflow_model (keep.api.models.db.workflow.Workflow): the workflow row.
+        """
+        key = (tenant_id, workflow_model.id, workflow_model.revision)
+        with self._lock:
+            definition = self._definitions.get(key)
+            if definition is not None:
+                self._definitions.move_to_end(key)
+                return definition
+        self.logger.debug(
+            "Loading workflow definition",
+            extra={"workflow_id": workflow_model.id, "revision": key[2]},
+        )
+        workflow_yaml = yaml.safe_load(workflow_model.workflow_raw)
+        definition = WorkflowDefinition(
+            workflow_id=workflow_model.id,
+            revision=workflow_model.revision,
+            workflow_yaml=workflow_yaml,
+            triggers=workflow_yaml.get("triggers", []),
+        )
+        with self._lock:
+            self._definitions[key] = definition
+            while len(self._definitions) > self.max_size:
+                self._definitions.popitem(last=False)
+        return definition
+
+    def invalidate(self, tenant_id: str | None = None, workflow_id: str | None = None):
+        with self._lock:
+            if tenant_id is None:
+                self._definitions.clear()
+                return
+            for key in list(self._definitions):
+                if key[0] == tenant_id and workflow_id in (None, key[1]):
+                    del self._definitions[key]
@@ -0,0 +1,151 @@
+import enum
+import logging
+import threading
+import typing
+from collections import OrderedDict, deque
+
+from keep.api.core.config import config
+
+
+class QueuePolicy(enum.Enum):
+    # keep the runs in the scheduler until the executor has room for them
+    BACKPRESSURE = "backpressure"
+    # reject the runs that don't fit in the queue
+    SHED = "shed"
+
+
+class WorkflowRunsExecutor:
+    """
+    A bounded pool of worker threads that runs workflows.
+
+    Runs are queued per tenant and the workers take them round robin between
+    the tenants, so a single tenant's alert storm doesn't starve the others.
+    The queue is bounded by `max_queue_size` (runs that are waiting to start),
+    when it's full `submit` rejects new runs and the caller applies the
+    queue policy.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = config("KEEP_WORKFLOWS_MAX_WORKERS", default=20, cast=int),
+        max_queue_size: int = config(
+            "KEEP_WORKFLOWS_MAX_QUEUE_SIZE", default=1000, cast=int
+        ),
+        policy: QueuePolicy = QueuePolicy(
+            config("KEEP_WORKFLOWS_QUEUE_POLICY", default="backpressure")
+        ),
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        # tenant_id -> queued runs, the order of the tenants is the round robin order
+        self._queues: OrderedDict[str, deque] = OrderedDict()
+        self._queued = 0
+        self._active = 0
+        self._rejected = 0
+        self._completed = 0
+        self._workers: list[threading.Thread] = []
+        self._condition = threading.Condition()
+        self._stop = False
+
+    @property
+    def full(self) -> bool:
+        with self._condition:
+            return self._queued >= self.max_queue_size
+
+    def submit(
+        self,
+        tenant_id: str,
+        fn: typing.Callable,
+        *args,
+        force: bool = False,
+    ) -> bool:
+        """
+        Queue a run.
+
+        Args:
+            tenant_id (str): the tenant the run belongs to.
+            fn (Callable): the function to run with args.
+            force (bool, optional): queue the run even if the queue is full.
+
+        Returns:
+            bool: whether the run was queued.
+        """
+        with self._condition:
+            if self._stop:
+                return False
+            if not force and self._queued >= self.max_queue_size:
+                self._rejected += 1
+                return False
+            self._queues.setdefault(tenant_id, deque()).append((fn, args))
+            self._queued += 1
+            self._ensure_workers()
+            self._condition.notify()
+        return True
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "rejected": self._rejected,
+                "completed": self._completed,
+                "workers": len(self._workers),
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "policy": self.policy.value,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the workers once the queued runs are done.
+        """
+        with self._condition:
+            self._stop = True
+            self._condition.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _ensure_workers(self):
+        # workers are started lazily, up to max_workers, and live as long as the executor
+        busy = self._active + self._queued
+        while len(self._workers) < min(self.max_workers, busy):
+            worker = threading.Thread(
+                target=self._worker,
+                name=f"workflow-worker-{len(self._workers)}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_run(self):
+        # take a run of the next tenant and move the tenant to the end of the line
+        tenant_id, queue = next(iter(self._queues.items()))
+        run = queue.popleft()
+        if queue:
+            self._queues.move_to_end(tenant_id)
+        else:
+            del self._queues[tenant_id]
+        self._queued -= 1
+        return run
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._queued and not self._stop:
+                    self._condition.wait()
+                if not self._queued:
+                    return
+                fn, args = self._next_run()
+                self._active += 1
+            try:
+                fn(*args)
+            except Exception:
+                self.logger.exception("Workflow run failed")
+            finally:
+                with self._condition:
+                    self._active -= 1
+                    self._completed += 1
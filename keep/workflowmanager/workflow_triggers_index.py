@@ -0,0 +1,206 @@
+import dataclasses
+import logging
+import re
+
+from keep.api.models.alert import AlertDto
+from keep.workflowmanager.workflow_definitions_cache import WorkflowDefinition
+
+logger = logging.getLogger(__name__)
+
+
+def get_event_value(event: AlertDto, filter_key: str):
+    # if the filter key is a nested key, get the value
+    if "." in filter_key:
+        filter_key_split = filter_key.split(".")
+        # event is alert dto so we need getattr
+        event_val = getattr(event, filter_key_split[0], None)
+        if not event_val:
+            return None
+        # iterate the other keys
+        for key in filter_key_split[1:]:
+            event_val = event_val.get(key, None)
+            # if the key doesn't exist, return None because we didn't find the value
+            if not event_val:
+                return None
+        return event_val
+    else:
+        return getattr(event, filter_key, None)
+
+
+@dataclasses.dataclass
+class AlertTriggerFilter:
+    key: str
+    value: object
+    # the compiled regex of r"..." filters
+    pattern: re.Pattern | None = None
+    # the regex could not be compiled, the filter never matches
+    invalid: bool = False
+
+    def apply(self, value) -> bool:
+        if self.invalid:
+            return False
+        # if it's a regex, apply it
+        if self.pattern is not None:
+            try:
+                return bool(self.pattern.findall(value))
+            except Exception as e:
+                logger.error(
+                    f"Error applying regex filter: {self.value} on value: {value}",
+                    extra={"exception": e},
+                )
+                return False
+        return value == self.value
+
+
+@dataclasses.dataclass
+class AlertTrigger:
+    # (workflow index, trigger index), the order the triggers are evaluated in
+    position: tuple[int, int]
+    workflow_model: object
+    workflow_definition: WorkflowDefinition
+    trigger: dict
+    filters: list[AlertTriggerFilter]
+
+    def matches(self, event: AlertDto) -> bool:
+        should_run = True
+        # apply filters
+        for filter in self.filters:
+            # TODO: more sophisticated filtering/attributes/nested, etc
+            event_val = get_event_value(event, filter.key)
+            if not event_val:
+                logger.warning(
+                    "Failed to run filter, skipping the event. Probably misconfigured workflow."
+                )
+                should_run = False
+                continue
+            # if its list, check if the filter is in the list
+            if isinstance(event_val, list):
+                for val in event_val:
+                    # if one filter applies, it should run
+                    if filter.apply(val):
+                        should_run = True
+                        break
+                    should_run = False
+            # elif the filter is string/int/float, compare them:
+            elif type(event_val) in [
+                int,
+                str,
+                float,
+            ]:
+                if not filter.apply(event_val):
+                    logger.debug(
+                        "Filter didn't match, skipping",
+                        extra={
+                            "filter_key": filter.key,
+                            "filter_val": filter.value,
+                            "event": event,
+                        },
+                    )
+                    should_run = False
+                    break
+            # other types currently does not supported
+            else:
+                logger.warning(
+                    "Could not run the filter on unsupported type, skipping the event. Probably misconfigured workflow."
+                )
+                should_run = False
+                break
+        return should_run
+
+
+def _compile_filter(filter: dict) -> AlertTriggerFilter:
+    filter_val = filter.get("value")
+    alert_trigger_filter = AlertTriggerFilter(key=filter.get("key"), value=filter_val)
+    if isinstance(filter_val, str) and filter_val.startswith('r"'):
+        try:
+            # remove the r" and the last "
+            alert_trigger_filter.pattern = re.compile(filter_val[2:-1])
+        except Exception as e:
+            logger.error(
+                f"Error compiling regex filter: {filter_val}",
+                extra={"exception": e},
+            )
+            alert_trigger_filter.invalid = True
+    return alert_trigger_filter
+
+
+class WorkflowTriggersIndex:
+    """
+    An index of the `type: alert` triggers of a tenant's workflows, so each
+    event is matched only against the triggers that could match it.
+
+    A trigger can only run if its last filter matches, so triggers whose last
+    filter is an exact match are indexed by (filter key, filter value), any
+    other trigger (regex last filter / no filters) is checked for every event.
+    The candidates are still matched with all their filters.
+    """
+
+    def __init__(self, workflows: list[tuple[object, WorkflowDefinition]]):
+        # (filter key, filter value) -> triggers
+        self._index: dict[tuple[str, object], list[AlertTrigger]] = {}
+        self._keys: set[str] = set()
+        self._unindexed: list[AlertTrigger] = []
+        for workflow_index, (workflow_model, workflow_definition) in enumerate(
+            workflows
+        ):
+            for trigger_index, trigger in enumerate(workflow_definition.triggers):
+                # TODO: handle it better
+                if not trigger.get("type") == "alert":
+                    continue
+                alert_trigger = AlertTrigger(
+                    position=(workflow_index, trigger_index),
+                    workflow_model=workflow_model,
+                    workflow_definition=workflow_definition,
+                    trigger=trigger,
+                    filters=[_compile_filter(f) for f in trigger.get("filters", [])],
+                )
+                last_filter = (
+                    alert_trigger.filters[-1] if alert_trigger.filters else None
+                )
+                if (
+                    last_filter is None
+                    or last_filter.pattern is not None
+                    or last_filter.invalid
+                    or not _is_hashable(last_filter.value)
+                ):
+                    self._unindexed.append(alert_trigger)
+                    continue
+                self._keys.add(last_filter.key)
+                self._index.setdefault((last_filter.key, last_filter.value), []).append(
+                    alert_trigger
+                )
+
+    def get_candidates(self, event: AlertDto) -> list[AlertTrigger]:
+        """
+        Get the triggers that could match the event, ordered by their position.
+        """
+        candidates = list(self._unindexed)
+        for key in self._keys:
+            try:
+                event_val = get_event_value(event, key)
+            except Exception:
+                # let the triggers of this key fail the same way when matched
+                candidates.extend(
+                    alert_trigger
+                    for (index_key, _), alert_triggers in self._index.items()
+                    if index_key == key
+                    for alert_trigger in alert_triggers
+                )
+                continue
+            if not event_val:
+                continue
+            values = event_val if isinstance(event_val, list) else [event_val]
+            for value in values:
+                if _is_hashable(value):
+                    candidates.extend(self._index.get((key, value), []))
+        # a list value could match the same trigger more than once
+        unique_candidates = {id(c): c for c in candidates}.values()
+        return sorted(unique_candidates, key=lambda c: c.position)
+
+
+def _is_hashable(value) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
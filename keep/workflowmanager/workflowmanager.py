@@ -1,8 +1,8 @@
 import logging
 import os
-import re
 import typing
 import uuid
+from collections import deque
 
 from keep.api.core.config import AuthenticationType
 from keep.api.core.db import (
@@ -11,8 +11,11 @@ from keep.api.core.db import (
     save_workflow_results,
 )
 from keep.api.models.alert import AlertDto
-from keep.providers.providers_factory import ProviderConfigurationException
 from keep.workflowmanager.workflow import Workflow
+from keep.workflowmanager.workflow_triggers_index import (
+    WorkflowTriggersIndex,
+    get_event_value,
+)
 from keep.workflowmanager.workflowscheduler import WorkflowScheduler
 from keep.workflowmanager.workflowstore import WorkflowStore
 
@@ -31,6 +34,8 @@ class WorkflowManager:
         self.logger = logging.getLogger(__name__)
         self.scheduler = WorkflowScheduler(self)
         self.workflow_store = WorkflowStore()
+        # tenant_id -> (workflows ids and revisions, triggers index)
+        self._triggers_indexes = {}
         self.started = False
 
     async def start(self):
@@ -46,164 +51,104 @@ class WorkflowManager:
         self.scheduler.stop()
         self.started = False
 
-    def _apply_filter(self, filter_val, value):
-        # if it's a regex, apply it
-        if filter_val.startswith('r"'):
+    def _get_triggers_index(
+        self, tenant_id, all_workflow_models
+    ) -> WorkflowTriggersIndex:
+        # the index is rebuilt only when a workflow is added, updated or removed
+        index_key = tuple(
+            (workflow_model.id, workflow_model.revision)
+            for workflow_model in all_workflow_models
+        )
+        cached = self._triggers_indexes.get(tenant_id)
+        if cached and cached[0] == index_key:
+            return cached[1]
+        workflows = []
+        for workflow_model in all_workflow_models:
             try:
-                # remove the r" and the last "
-                pattern = re.compile(filter_val[2:-1])
-                return pattern.findall(value)
-            except Exception as e:
-                self.logger.error(
-                    f"Error applying regex filter: {filter_val} on value: {value}",
-                    extra={"exception": e},
+                # get the (cached) definition to match the triggers against,
+                #   the workflow is parsed only if it should run
+                workflow_definition = self.workflow_store.get_workflow_definition(
+                    tenant_id, workflow_model
                 )
-                return False
-        else:
-            return value == filter_val
+            except Exception as e:
+                # TODO: how to handle workflows that aren't properly parsed/configured?
+                self.logger.error(f"Error getting workflow: {e}")
+                continue
+            workflows.append((workflow_model, workflow_definition))
+        triggers_index = WorkflowTriggersIndex(workflows)
+        self._triggers_indexes[tenant_id] = (index_key, triggers_index)
+        return triggers_index
 
     def insert_events(self, tenant_id, events: typing.List[AlertDto]):
+        all_workflow_models = self.workflow_store.get_all_workflows(tenant_id)
+        triggers_index = self._get_triggers_index(tenant_id, all_workflow_models)
         for event in events:
-            all_workflow_models = self.workflow_store.get_all_workflows(tenant_id)
-            for workflow_model in all_workflow_models:
-                try:
-                    # get the actual workflow that can be triggered
-                    workflow = self.workflow_store.get_workflow(
-                        tenant_id, workflow_model.id
-                    )
-                # the provider is not configured, hence the workflow cannot be triggered
-                # todo - handle it better
-                # todo2 - handle if more than one provider is not configured
-                except ProviderConfigurationException as e:
-                    self.logger.warning(
-                        f"Workflow have a provider that is not configured: {e}"
-                    )
+            enriched = False
+            candidates = deque(triggers_index.get_candidates(event))
+            while candidates:
+                alert_trigger = candidates.popleft()
+                if not alert_trigger.matches(event):
                     continue
-                except Exception as e:
-                    # TODO: how to handle workflows that aren't properly parsed/configured?
-                    self.logger.error(f"Error getting workflow: {e}")
-                    continue
-                for trigger in workflow.workflow_triggers:
-                    # TODO: handle it better
-                    if not trigger.get("type") == "alert":
-                        continue
-                    should_run = True
-                    # apply filters
-                    for filter in trigger.get("filters", []):
-                        # TODO: more sophisticated filtering/attributes/nested, etc
-                        filter_key = filter.get("key")
-                        filter_val = filter.get("value")
-                        event_val = self._get_event_value(event, filter_key)
-                        if not event_val:
-                            self.logger.warning(
-                                "Failed to run filter, skipping the event. Probably misconfigured workflow."
-                            )
-                            should_run = False
-                            continue
-                        # if its list, check if the filter is in the list
-                        if isinstance(event_val, list):
-                            for val in event_val:
-                                # if one filter applies, it should run
-                                if self._apply_filter(filter_val, val):
-                                    should_run = True
-                                    break
-                                should_run = False
-                        # elif the filter is string/int/float, compare them:
-                        elif type(event_val) in [
-                            int,
-                            str,
-                            float,
-                        ]:
-                            if not self._apply_filter(filter_val, event_val):
-                                self.logger.debug(
-                                    "Filter didn't match, skipping",
-                                    extra={
-                                        "filter_key": filter_key,
-                                        "filter_val": filter_val,
-                                        "event": event,
-                                    },
-                                )
-                                should_run = False
-                                break
-                        # other types currently does not supported
-                        else:
-                            self.logger.warning(
-                                "Could not run the filter on unsupported type, skipping the event. Probably misconfigured workflow."
-                            )
-                            should_run = False
-                            break
-
-                    if not should_run:
-                        continue
-                    # enrich the alert with more data
-                    self.logger.info("Found a workflow to run")
-                    event.trigger = "alert"
-                    # prepare the alert with the enrichment
+                trigger = alert_trigger.trigger
+                # enrich the alert with more data
+                self.logger.info("Found a workflow to run")
+                event.trigger = "alert"
+                # prepare the alert with the enrichment (once per alert)
+                if not enriched:
                     self.logger.info("Enriching alert")
                     alert_enrichment = get_enrichment(tenant_id, event.fingerprint)
                     if alert_enrichment:
                         for k, v in alert_enrichment.enrichments.items():
                             setattr(event, k, v)
-                    self.logger.info("Alert enriched")
-                    # apply only_on_change (https://github.com/keephq/keep/issues/801)
-                    fields_that_needs_to_be_change = trigger.get("only_on_change", [])
-                    # if there are fields that needs to be changed, get the previous alert
-                    if fields_that_needs_to_be_change:
-                        previous_alert = get_previous_alert_by_fingerprint(
-                            tenant_id, event.fingerprint
+                        # the enrichment could change the values the triggers
+                        #   are matched on, so get the next candidates again
+                        candidates = deque(
+                            candidate
+                            for candidate in triggers_index.get_candidates(event)
+                            if candidate.position > alert_trigger.position
                         )
-                        # now compare:
-                        #   (no previous alert means that the workflow should run)
-                        if previous_alert:
-                            for field in fields_that_needs_to_be_change:
-                                # the field hasn't change
-                                if getattr(event, field) == previous_alert.event.get(
-                                    field
-                                ):
-                                    self.logger.info(
-                                        "Skipping the workflow because the field hasn't change",
-                                        extra={
-                                            "field": field,
-                                            "event": event,
-                                            "previous_alert": previous_alert,
-                                        },
-                                    )
-                                    should_run = False
-                                    break
+                    enriched = True
+                    self.logger.info("Alert enriched")
+                should_run = True
+                # apply only_on_change (https://github.com/keephq/keep/issues/801)
+                fields_that_needs_to_be_change = trigger.get("only_on_change", [])
+                # if there are fields that needs to be changed, get the previous alert
+                if fields_that_needs_to_be_change:
+                    previous_alert = get_previous_alert_by_fingerprint(
+                        tenant_id, event.fingerprint
+                    )
+                    # now compare:
+                    #   (no previous alert means that the workflow should run)
+                    if previous_alert:
+                        for field in fields_that_needs_to_be_change:
+                            # the field hasn't change
+                            if getattr(event, field) == previous_alert.event.get(field):
+                                self.logger.info(
+                                    "Skipping the workflow because the field hasn't change",
+                                    extra={
+                                        "field": field,
+                                        "event": event,
+                                        "previous_alert": previous_alert,
+                                    },
+                                )
+                                should_run = False
+                                break
 
-                    if not should_run:
-                        continue
-                    # Lastly, if the workflow should run, add it to the scheduler
-                    self.logger.info("Adding workflow to run")
-                    with self.scheduler.lock:
-                        self.scheduler.workflows_to_run.append(
-                            {
-                                "workflow": workflow,
-                                "workflow_id": workflow_model.id,
-                                "tenant_id": tenant_id,
-                                "triggered_by": "alert",
-                                "event": event,
-                            }
-                        )
-                    self.logger.info("Workflow added to run")
+                if not should_run:
+                    continue
+                # Lastly, if the workflow should run, add it to the scheduler
+                #   (the workflow is loaded by the scheduler that runs it)
+                self.logger.info("Adding workflow to run")
+                self.scheduler.add_workflow_run(
+                    tenant_id=tenant_id,
+                    workflow_id=alert_trigger.workflow_model.id,
+                    triggered_by="alert",
+                    event=event,
+                )
+                self.logger.info("Workflow added to run")
 
     def _get_event_value(self, event, filter_key):
-        # if the filter key is a nested key, get the value
-        if "." in filter_key:
-            filter_key_split = filter_key.split(".")
-            # event is alert dto so we need getattr
-            event_val = getattr(event, filter_key_split[0], None)
-            if not event_val:
-                return None
-            # iterate the other keys
-            for key in filter_key_split[1:]:
-                event_val = event_val.get(key, None)
-                # if the key doesn't exist, return None because we didn't find the value
-                if not event_val:
-                    return None
-            return event_val
-        else:
-            return getattr(event, filter_key, None)
+        return get_event_value(event, filter_key)
 
     # TODO should be fixed to support the usual CLI
     def run(self, workflows: list[Workflow]):
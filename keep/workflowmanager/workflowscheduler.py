@@ -1,6 +1,9 @@
 import enum
 import hashlib
+import json
 import logging
+import os
+import socket
 import threading
 import time
 import typing
@@ -9,14 +12,28 @@ from threading import Lock
 
 from sqlalchemy.exc import IntegrityError
 
-from keep.api.core.db import create_workflow_execution
+from keep.api.core.config import config
+from keep.api.core.db import (
+    claim_workflow_runs,
+    create_workflow_execution,
+    delete_workflow_run,
+    enqueue_workflow_run,
+)
 from keep.api.core.db import finish_workflow_execution as finish_workflow_execution_db
 from keep.api.core.db import get_enrichment, get_previous_execution_id
 from keep.api.core.db import get_workflow as get_workflow_db
-from keep.api.core.db import get_workflows_that_should_run
+from keep.api.core.db import (
+    get_workflows_that_should_run,
+    release_workflow_run,
+    renew_workflow_runs_lease,
+)
 from keep.api.models.alert import AlertDto
 from keep.providers.providers_factory import ProviderConfigurationException
 from keep.workflowmanager.workflow import Workflow, WorkflowStrategy
+from keep.workflowmanager.workflow_runs_executor import (
+    QueuePolicy,
+    WorkflowRunsExecutor,
+)
 from keep.workflowmanager.workflowstore import WorkflowStore
 
 
@@ -26,15 +43,37 @@ class WorkflowStatus(enum.Enum):
     PROVIDERS_NOT_CONFIGURED = "providers_not_configured"
 
 
+class WorkflowsQueueType(enum.Enum):
+    # the event workflows runs are kept in the db, any worker can claim them
+    DB = "db"
+    # the event workflows runs are kept in the memory of the worker that got the event
+    MEMORY = "memory"
+
+
 class WorkflowScheduler:
     MAX_SIZE_SIGNED_INT = 2147483647
 
     def __init__(self, workflow_manager):
         self.logger = logging.getLogger(__name__)
         self.threads = []
+        # runs the interval and event workflows
+        self.executor = WorkflowRunsExecutor()
         self.workflow_manager = workflow_manager
         self.workflow_store = WorkflowStore()
-        # all workflows that needs to be run due to alert event
+        self.queue_type = WorkflowsQueueType(
+            config("KEEP_WORKFLOWS_QUEUE_TYPE", default="db")
+        )
+        # how long a claimed run is owned by this worker without being renewed,
+        #   the leases of the runs that are queued or running are renewed every
+        #   third of it, so other workers claim a run only if this worker is gone
+        self.queue_lease_seconds = config(
+            "KEEP_WORKFLOWS_QUEUE_LEASE_SECONDS", default=600, cast=int
+        )
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4()}"
+        # the db queue runs this worker claimed and didn't finish yet
+        self._claimed_runs: set[str] = set()
+        self._leases_renewed_at = time.monotonic()
+        # all workflows that needs to be run due to alert event (memory queue)
         self.workflows_to_run = []
         self._stop = False
         self.lock = Lock()
@@ -81,12 +120,161 @@ class WorkflowScheduler:
                     error=f"Error getting workflow: {e}",
                 )
                 continue
-            thread = threading.Thread(
-                target=self._run_workflow,
-                args=[tenant_id, workflow_id, workflow, workflow_execution_id],
+            # the interval executions are already created, so they are always queued
+            self.executor.submit(
+                tenant_id,
+                self._run_workflow,
+                tenant_id,
+                workflow_id,
+                workflow,
+                workflow_execution_id,
+                force=True,
+            )
+
+    def add_workflow_run(
+        self,
+        tenant_id: str,
+        workflow_id: str,
+        triggered_by: str,
+        event: AlertDto,
+        workflow_execution_id: str = None,
+        triggered_by_user: str = None,
+    ):
+        """
+        Queue an event workflow run.
+
+        Args:
+            tenant_id (str): the tenant id.
+            workflow_id (str): the workflow to run.
+            triggered_by (str): "alert" or "manual".
+            event (AlertDto): the event that triggered the workflow.
+            workflow_execution_id (str, optional): the execution of manual runs.
+            triggered_by_user (str, optional): the user of manual runs.
+        """
+        if self.queue_type == WorkflowsQueueType.DB:
+            enqueue_workflow_run(
+                tenant_id=tenant_id,
+                workflow_id=workflow_id,
+                triggered_by=triggered_by,
+                event=json.loads(event.json()),
+                workflow_execution_id=workflow_execution_id,
+                triggered_by_user=triggered_by_user,
+            )
+            return
+        with self.lock:
+            self.workflows_to_run.append(
+                {
+                    "workflow_id": workflow_id,
+                    "workflow_execution_id": workflow_execution_id,
+                    "tenant_id": tenant_id,
+                    "triggered_by": triggered_by,
+                    "triggered_by_user": triggered_by_user,
+                    "event": event,
+                }
             )
-            thread.start()
-            self.threads.append(thread)
+
+    def _get_workflows_to_run(self) -> list[dict]:
+        if self.queue_type == WorkflowsQueueType.MEMORY:
+            # take out all items from the workflows to run and clean the self.workflows_to_run list
+            with self.lock:
+                workflows_to_run, self.workflows_to_run = self.workflows_to_run, []
+            return workflows_to_run
+        # claim only the runs the executor has room for, the rest are left for the other workers
+        limit = self.executor.max_queue_size - self.executor.stats()["queued"]
+        if limit <= 0:
+            return []
+        workflows_to_run = []
+        queued_runs = claim_workflow_runs(
+            self.worker_id, limit, self.queue_lease_seconds
+        )
+        with self.lock:
+            self._claimed_runs.update(queued_run.id for queued_run in queued_runs)
+        for queued_run in queued_runs:
+            try:
+                event = AlertDto(**queued_run.event)
+            except Exception:
+                self.logger.exception(
+                    "Failed to load the event of a queued workflow run",
+                    extra={"queued_run_id": queued_run.id},
+                )
+                self._complete_workflow_run(queued_run.id)
+                continue
+            workflows_to_run.append(
+                {
+                    "queued_run_id": queued_run.id,
+                    "workflow_id": queued_run.workflow_id,
+                    "workflow_execution_id": queued_run.workflow_execution_id,
+                    "tenant_id": queued_run.tenant_id,
+                    "triggered_by": queued_run.triggered_by,
+                    "triggered_by_user": queued_run.triggered_by_user,
+                    "event": event,
+                    "retry": queued_run.retry,
+                }
+            )
+        return workflows_to_run
+
+    def _requeue_workflow_runs(self, workflows_to_run: list[dict], retry=False):
+        if self.queue_type == WorkflowsQueueType.DB:
+            for workflow_to_run in workflows_to_run:
+                release_workflow_run(
+                    workflow_to_run["queued_run_id"],
+                    retry=retry or workflow_to_run.get("retry", False),
+                )
+                with self.lock:
+                    self._claimed_runs.discard(workflow_to_run["queued_run_id"])
+            return
+        if retry:
+            workflows_to_run = [{**w, "retry": True} for w in workflows_to_run]
+            with self.lock:
+                self.workflows_to_run.extend(workflows_to_run)
+            return
+        with self.lock:
+            self.workflows_to_run = workflows_to_run + self.workflows_to_run
+
+    def _complete_workflow_run(self, queued_run_id: str | None):
+        # memory queue runs are not persisted
+        if not queued_run_id:
+            return
+        with self.lock:
+            self._claimed_runs.discard(queued_run_id)
+        try:
+            delete_workflow_run(queued_run_id)
+        except Exception:
+            self.logger.exception(
+                "Failed to remove a workflow run from the queue",
+                extra={"queued_run_id": queued_run_id},
+            )
+
+    def _renew_leases(self):
+        """
+        Renew the leases of the claimed runs that are queued in the executor
+        or running, so they are not claimed again by other workers.
+        """
+        if time.monotonic() - self._leases_renewed_at < self.queue_lease_seconds / 3:
+            return
+        self._leases_renewed_at = time.monotonic()
+        with self.lock:
+            claimed_runs = list(self._claimed_runs)
+        if not claimed_runs:
+            return
+        renewed = renew_workflow_runs_lease(
+            self.worker_id, claimed_runs, self.queue_lease_seconds
+        )
+        if renewed < len(claimed_runs):
+            # the runs were already claimed by another worker (their lease expired)
+            self.logger.warning(
+                "Failed to renew the lease of some workflow runs",
+                extra={
+                    "number_of_runs": len(claimed_runs),
+                    "number_of_renewed_runs": renewed,
+                },
+            )
+
+    def _run_queued_workflow(self, queued_run_id: str | None, *args):
+        try:
+            self._run_workflow(*args)
+        finally:
+            self._complete_workflow_run(queued_run_id)
 
     def _run_workflow(
         self,
@@ -163,18 +351,15 @@ class WorkflowScheduler:
                 "triggered_by_user": triggered_by_user,
             },
         )
-        with self.lock:
-            alert.trigger = "manual"
-            self.workflows_to_run.append(
-                {
-                    "workflow_id": workflow_id,
-                    "workflow_execution_id": workflow_execution_id,
-                    "tenant_id": tenant_id,
-                    "triggered_by": "manual",
-                    "triggered_by_user": triggered_by_user,
-                    "event": alert,
-                }
-            )
+        alert.trigger = "manual"
+        self.add_workflow_run(
+            tenant_id=tenant_id,
+            workflow_id=workflow_id,
+            triggered_by="manual",
+            event=alert,
+            workflow_execution_id=workflow_execution_id,
+            triggered_by_user=triggered_by_user,
+        )
         return workflow_execution_id
 
     def _get_unique_execution_number(self, fingerprint=None):
@@ -195,35 +380,55 @@ class WorkflowScheduler:
         )
 
     def _handle_event_workflows(self):
-        # TODO - event workflows should be in DB too, to avoid any state problems.
+        workflows_to_run = self._get_workflows_to_run()
+        for i, workflow_to_run in enumerate(workflows_to_run):
+            # backpressure: if the executor is full, keep the rest for the next iteration
+            if self.executor.policy == QueuePolicy.BACKPRESSURE and self.executor.full:
+                self.logger.warning(
+                    "Workflows executor is full, postponing workflows",
+                    extra={"number_of_workflows": len(workflows_to_run) - i},
+                )
+                self._requeue_workflow_runs(workflows_to_run[i:])
+                break
+            # the run leaves the queue unless it's queued again or submitted to the executor
+            queued = False
+            try:
+                queued = self._handle_event_workflow(workflow_to_run)
+            finally:
+                if not queued:
+                    self._complete_workflow_run(workflow_to_run.get("queued_run_id"))
 
-        # take out all items from the workflows to run and run them, also, clean the self.workflows_to_run list
-        with self.lock:
-            workflows_to_run, self.workflows_to_run = self.workflows_to_run, []
-        for workflow_to_run in workflows_to_run:
-            self.logger.info(
-                "Running event workflow on background",
-                extra={
-                    "workflow_id": workflow_to_run.get("workflow_id"),
-                    "workflow_execution_id": workflow_to_run.get(
-                        "workflow_execution_id"
-                    ),
-                    "tenant_id": workflow_to_run.get("tenant_id"),
-                },
-            )
-            workflow = workflow_to_run.get("workflow")
-            workflow_id = workflow_to_run.get("workflow_id")
-            tenant_id = workflow_to_run.get("tenant_id")
-            workflow_execution_id = workflow_to_run.get("workflow_execution_id")
-            if not workflow:
-                self.logger.info("Loading workflow")
-                try:
-                    workflow = self.workflow_store.get_workflow(
-                        workflow_id=workflow_id, tenant_id=tenant_id
-                    )
-                # In case the provider are not configured properly
-                except ProviderConfigurationException as e:
-                    self.logger.error(f"Error getting workflow: {e}")
+    def _handle_event_workflow(self, workflow_to_run: dict) -> bool:
+        """
+        Create the execution of an event workflow run and submit it to the executor.
+
+        Returns:
+            bool: whether the run is still queued (submitted or queued again).
+        """
+        self.logger.info(
+            "Running event workflow on background",
+            extra={
+                "workflow_id": workflow_to_run.get("workflow_id"),
+                "workflow_execution_id": workflow_to_run.get("workflow_execution_id"),
+                "tenant_id": workflow_to_run.get("tenant_id"),
+            },
+        )
+        workflow = workflow_to_run.get("workflow")
+        workflow_id = workflow_to_run.get("workflow_id")
+        tenant_id = workflow_to_run.get("tenant_id")
+        workflow_execution_id = workflow_to_run.get("workflow_execution_id")
+        if not workflow:
+            self.logger.info("Loading workflow")
+            try:
+                workflow = self.workflow_store.get_workflow(
+                    workflow_id=workflow_id, tenant_id=tenant_id
+                )
+            # In case the provider are not configured properly
+            # todo - handle event workflows that have providers that are not configured better
+            except ProviderConfigurationException as e:
+                self.logger.error(f"Error getting workflow: {e}")
+                # event runs have no execution yet, so there is nothing to finish
+                if workflow_execution_id:
                     self._finish_workflow_execution(
                         tenant_id=tenant_id,
                         workflow_id=workflow_id,
@@ -231,9 +436,10 @@ class WorkflowScheduler:
                         status=WorkflowStatus.PROVIDERS_NOT_CONFIGURED,
                         error=f"Providers are not configured for workflow {workflow_id}, please configure it so Keep will be able to run it",
                     )
-                    continue
-                except Exception as e:
-                    self.logger.error(f"Error getting workflow: {e}")
+                return False
+            except Exception as e:
+                self.logger.error(f"Error getting workflow: {e}")
+                if workflow_execution_id:
                     self._finish_workflow_execution(
                         tenant_id=tenant_id,
                         workflow_id=workflow_id,
@@ -241,115 +447,125 @@ class WorkflowScheduler:
                         status=WorkflowStatus.ERROR,
                         error=f"Error getting workflow: {e}",
                     )
-                    continue
+                return False
 
-            event = workflow_to_run.get("event")
-            triggered_by = workflow_to_run.get("triggered_by")
-            if triggered_by == "manual":
-                triggered_by_user = workflow_to_run.get("triggered_by_user")
-                triggered_by = f"manually by {triggered_by_user}"
-            else:
-                triggered_by = f"type:alert name:{event.name} id:{event.id}"
-
-            # In manual, we create the workflow execution id sync so it could be tracked by the caller (UI)
-            # In event (e.g. alarm), we will create it here
-            if not workflow_execution_id:
-                try:
-                    # if the workflow can run in parallel, we just to create a some random execution number
-                    if workflow.workflow_strategy == WorkflowStrategy.PARALLEL.value:
-                        workflow_execution_number = self._get_unique_execution_number()
-                    # else, we want to enforce that no workflow already run with the same fingerprint
-                    else:
-                        workflow_execution_number = self._get_unique_execution_number(
-                            event.fingerprint
-                        )
-                    workflow_execution_id = create_workflow_execution(
-                        workflow_id=workflow_id,
-                        tenant_id=tenant_id,
-                        triggered_by=triggered_by,
-                        execution_number=workflow_execution_number,
-                        fingerprint=event.fingerprint,
-                        event_id=event.event_id,
+        event = workflow_to_run.get("event")
+        triggered_by = workflow_to_run.get("triggered_by")
+        if triggered_by == "manual":
+            triggered_by_user = workflow_to_run.get("triggered_by_user")
+            triggered_by = f"manually by {triggered_by_user}"
+        else:
+            triggered_by = f"type:alert name:{event.name} id:{event.id}"
+
+        # In manual, we create the workflow execution id sync so it could be tracked by the caller (UI)
+        # In event (e.g. alarm), we will create it here
+        if not workflow_execution_id:
+            try:
+                # if the workflow can run in parallel, we just to create a some random execution number
+                if workflow.workflow_strategy == WorkflowStrategy.PARALLEL.value:
+                    workflow_execution_number = self._get_unique_execution_number()
+                # else, we want to enforce that no workflow already run with the same fingerprint
+                else:
+                    workflow_execution_number = self._get_unique_execution_number(
+                        event.fingerprint
+                    )
+                workflow_execution_id = create_workflow_execution(
+                    workflow_id=workflow_id,
+                    tenant_id=tenant_id,
+                    triggered_by=triggered_by,
+                    execution_number=workflow_execution_number,
+                    fingerprint=event.fingerprint,
+                    event_id=event.event_id,
+                )
+            # If there is already running workflow from the same event
+            except IntegrityError:
+                # if the strategy is with RETRY, just put a warning and add it back to the queue
+                if (
+                    workflow.workflow_strategy
+                    == WorkflowStrategy.NONPARALLEL_WITH_RETRY.value
+                ):
+                    self.logger.info(
+                        "Collision with workflow execution! will retry next time"
+                    )
+                    self._requeue_workflow_runs([workflow_to_run], retry=True)
+                    return True
+                # else if NONPARALLEL, just finish the execution
+                elif workflow.workflow_strategy == WorkflowStrategy.NONPARALLEL.value:
+                    self.logger.error(
+                        "Collision with workflow execution! will not retry"
                     )
-                # If there is already running workflow from the same event
-                except IntegrityError:
-                    # if the strategy is with RETRY, just put a warning and add it back to the queue
-                    if (
-                        workflow.workflow_strategy
-                        == WorkflowStrategy.NONPARALLEL_WITH_RETRY.value
-                    ):
-                        self.logger.info(
-                            "Collision with workflow execution! will retry next time"
-                        )
-                        with self.lock:
-                            self.workflows_to_run.append(
-                                {
-                                    "workflow_id": workflow_id,
-                                    "workflow_execution_id": workflow_execution_id,
-                                    "tenant_id": tenant_id,
-                                    "triggered_by": triggered_by,
-                                    "event": event,
-                                    "retry": True,
-                                }
-                            )
-                        continue
-                    # else if NONPARALLEL, just finish the execution
-                    elif (
-                        workflow.workflow_strategy == WorkflowStrategy.NONPARALLEL.value
-                    ):
-                        self.logger.error(
-                            "Collision with workflow execution! will not retry"
-                        )
-                        self._finish_workflow_execution(
-                            tenant_id=tenant_id,
-                            workflow_id=workflow_id,
-                            workflow_execution_id=workflow_execution_id,
-                            status=WorkflowStatus.ERROR,
-                            error="Workflow already running with the same fingerprint",
-                        )
-                        continue
-                    # else, just raise the exception (that should not happen)
-                    else:
-                        self.logger.exception("Collision with workflow execution!")
-                        continue
-                except Exception as e:
-                    self.logger.error(f"Error creating workflow execution: {e}")
-                    continue
-
-            # if thats a retry, we need to re-pull the alert to update the enrichments
-            # for example: 2 alerts arrived within a 0.1 seconds the first one is "firing" and the second one is "resolved"
-            #               - the first alert will trigger a workflow that will create a ticket with "firing"
-            #                    and enrich the alert with the ticket_url
-            #               - the second one will wait for the next iteration
-            #               - on the next iteratino, the second alert enriched with the ticket_url
-            #                    and will trigger a workflow that will update the ticket with "resolved"
-            if workflow_to_run.get("retry", False):
-                try:
-                    self.logger.info("Updating enrichment")
-                    new_enrichment = get_enrichment(tenant_id, event.fingerprint)
-                    # merge the new enrichment with the original event
-                    if new_enrichment:
-                        new_event = event.dict()
-                        new_event.update(new_enrichment.enrichments)
-                        event = AlertDto(**new_event)
-                    self.logger.info("Enrichment updated")
-                except Exception as e:
-                    self.logger.error(f"Failed to get enrichment: {e}")
                     self._finish_workflow_execution(
                         tenant_id=tenant_id,
                         workflow_id=workflow_id,
                         workflow_execution_id=workflow_execution_id,
                         status=WorkflowStatus.ERROR,
-                        error=f"Error getting alert by id: {e}",
+                        error="Workflow already running with the same fingerprint",
                     )
-                    continue
-            # Last, run the workflow
-            thread = threading.Thread(
-                target=self._run_workflow,
-                args=[tenant_id, workflow_id, workflow, workflow_execution_id, event],
+                    return False
+                # else, just raise the exception (that should not happen)
+                else:
+                    self.logger.exception("Collision with workflow execution!")
+                    return False
+            except Exception as e:
+                self.logger.error(f"Error creating workflow execution: {e}")
+                return False
+
+        # if thats a retry, we need to re-pull the alert to update the enrichments
+        # for example: 2 alerts arrived within a 0.1 seconds the first one is "firing" and the second one is "resolved"
+        #               - the first alert will trigger a workflow that will create a ticket with "firing"
+        #                    and enrich the alert with the ticket_url
+        #               - the second one will wait for the next iteration
+        #               - on the next iteratino, the second alert enriched with the ticket_url
+        #                    and will trigger a workflow that will update the ticket with "resolved"
+        if workflow_to_run.get("retry", False):
+            try:
+                self.logger.info("Updating enrichment")
+                new_enrichment = get_enrichment(tenant_id, event.fingerprint)
+                # merge the new enrichment with the original event
+                if new_enrichment:
+                    new_event = event.dict()
+                    new_event.update(new_enrichment.enrichments)
+                    event = AlertDto(**new_event)
+                self.logger.info("Enrichment updated")
+            except Exception as e:
+                self.logger.error(f"Failed to get enrichment: {e}")
+                self._finish_workflow_execution(
+                    tenant_id=tenant_id,
+                    workflow_id=workflow_id,
+                    workflow_execution_id=workflow_execution_id,
+                    status=WorkflowStatus.ERROR,
+                    error=f"Error getting alert by id: {e}",
+                )
+                return False
+        # Last, run the workflow
+        submitted = self.executor.submit(
+            tenant_id,
+            self._run_queued_workflow,
+            workflow_to_run.get("queued_run_id"),
+            tenant_id,
+            workflow_id,
+            workflow,
+            workflow_execution_id,
+            event,
+        )
+        # shed: the executor is full, so the run is dropped
+        if not submitted:
+            self.logger.warning(
+                "Workflows executor is full, dropping workflow run",
+                extra={
+                    "workflow_id": workflow_id,
+                    "workflow_execution_id": workflow_execution_id,
+                    "tenant_id": tenant_id,
+                },
             )
-            thread.start()
-            self.threads.append(thread)
+            self._finish_workflow_execution(
+                tenant_id=tenant_id,
+                workflow_id=workflow_id,
+                workflow_execution_id=workflow_execution_id,
+                status=WorkflowStatus.ERROR,
+                error="Workflow run was dropped, too many workflows are running",
+            )
+        return submitted
 
     def _start(self):
         self.logger.info("Starting workflows scheduler")
@@ -358,6 +574,8 @@ class WorkflowScheduler:
             self.logger.debug("Getting workflows that should run...")
             try:
                 self._handle_interval_workflows()
+                if self.queue_type == WorkflowsQueueType.DB:
+                    self._renew_leases()
                 self._handle_event_workflows()
             except Exception as e:
                 # This is the "mainloop" of the scheduler, we don't want to crash it
@@ -384,9 +602,10 @@ class WorkflowScheduler:
     def stop(self):
         self.logger.info("Stopping scheduled workflows")
         self._stop = True
-        # Now wait for the threads to finish
+        # Now wait for the threads and the queued runs to finish
         for thread in self.threads:
             thread.join()
+        self.executor.shutdown()
         self.logger.info("Scheduled workflows stopped")
 
     def _run_workflows_with_interval(
@@ -1,3 +1,4 @@
+import copy
 import io
 import logging
 import os
@@ -14,17 +15,24 @@ from keep.api.core.db import (
     get_all_workflows,
     get_all_workflows_yamls,
     get_raw_workflow,
+    get_workflow,
     get_workflow_execution,
     get_workflows_with_last_execution,
 )
+from keep.api.models.db.workflow import Workflow as WorkflowModel
 from keep.parser.parser import Parser
 from keep.workflowmanager.workflow import Workflow
+from keep.workflowmanager.workflow_definitions_cache import (
+    WorkflowDefinition,
+    WorkflowDefinitionsCache,
+)
 
 
 class WorkflowStore:
     def __init__(self):
         self.parser = Parser()
         self.logger = logging.getLogger(__name__)
+        self.definitions_cache = WorkflowDefinitionsCache.get_instance()
 
     def get_workflow_execution(self, tenant_id: str, workflow_execution_id: str):
         workflow_execution = get_workflow_execution(tenant_id, workflow_execution_id)
@@ -48,6 +56,8 @@ class WorkflowStore:
             interval=interval,
             workflow_raw=yaml.dump(workflow),
         )
+        # the workflow could be an update of an existing one (by name)
+        self.definitions_cache.invalidate(tenant_id, workflow.id)
         self.logger.info(f"Workflow {workflow_id} created successfully")
         return workflow
 
@@ -55,6 +65,7 @@ class WorkflowStore:
         self.logger.info(f"Deleting workflow {workflow_id}")
         try:
             delete_workflow(tenant_id, workflow_id)
+            self.definitions_cache.invalidate(tenant_id, workflow_id)
         except Exception:
             raise HTTPException(
                 status_code=404, detail=f"Workflow {workflow_id} not found"
@@ -87,25 +98,43 @@ class WorkflowStore:
         return yaml.dump(valid_workflow_yaml)
 
     def get_workflow(self, tenant_id: str, workflow_id: str) -> Workflow:
-        workflow = get_raw_workflow(tenant_id, workflow_id)
-        if not workflow:
+        workflow_model = get_workflow(tenant_id, workflow_id)
+        if not workflow_model:
             raise HTTPException(
                 status_code=404,
                 detail=f"Workflow {workflow_id} not found",
             )
-        workflow_yaml = yaml.safe_load(workflow)
-        workflow = self.parser.parse(tenant_id, workflow_yaml)
+        definition = self.get_workflow_definition(tenant_id, workflow_model)
+        return self.get_workflow_from_definition(tenant_id, definition)
+
+    def get_workflow_definition(
+        self, tenant_id: str, workflow_model: WorkflowModel
+    ) -> WorkflowDefinition:
+        """
+        Get the (cached) definition of a workflow, enough to match its triggers
+        without parsing the workflow.
+        """
+        return self.definitions_cache.get(tenant_id, workflow_model)
+
+    def get_workflow_from_definition(
+        self, tenant_id: str, definition: WorkflowDefinition
+    ) -> Workflow:
+        """
+        Parse a workflow definition into a runnable workflow (loads its providers).
+        """
+        # the parser modifies the yaml so it gets a copy of the cached one
+        workflow = self.parser.parse(tenant_id, copy.deepcopy(definition.workflow_yaml))
         if len(workflow) > 1:
             raise HTTPException(
                 status_code=500,
-                detail=f"More than one workflow with id {workflow_id} found",
+                detail=f"More than one workflow with id {definition.workflow_id} found",
             )
         elif workflow:
             return workflow[0]
         else:
             raise HTTPException(
                 status_code=404,
-                detail=f"Workflow {workflow_id} not found",
+                detail=f"Workflow {definition.workflow_id} not found",
             )
 
     def get_all_workflows(self, tenant_id: str) -> list[Workflow]:
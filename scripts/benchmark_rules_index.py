@@ -0,0 +1,104 @@
+# A script that compares the rules evaluation with and without the rules index
+# Written for benchmarking purposes only, runs in memory (no database needed)
+#   python scripts/benchmark_rules_index.py
+import datetime
+import logging
+import random
+import time
+import uuid
+
+from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
+from keep.api.models.db.rule import Rule
+from keep.rulesengine.rule_index import RulesIndex
+from keep.rulesengine.rulesengine import RulesEngine
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+SOURCES = ["grafana", "datadog", "sentry", "prometheus", "pagerduty"]
+SERVICES = [f"service-{i}" for i in range(50)]
+NUMBER_OF_EVENTS = 50
+
+
+def generate_rules(number_of_rules: int) -> list[Rule]:
+    rules = []
+    for i in range(number_of_rules):
+        source = random.choice(SOURCES)
+        service = random.choice(SERVICES)
+        if i < 5:
+            # a few rules can't be indexed and are evaluated for every event
+            definition_cel = f'(name.contains("{service}"))'
+        else:
+            definition_cel = f'(source == "{source}" && service == "{service}")'
+        rules.append(
+            Rule(
+                tenant_id="benchmark",
+                name=f"rule-{i}",
+                definition={"sql": "N/A", "params": {}},
+                definition_cel=definition_cel,
+                timeframe=600,
+                created_by="benchmark",
+            )
+        )
+    return rules
+
+
+def generate_events(number_of_events: int) -> list[AlertDto]:
+    return [
+        AlertDto(
+            id=str(uuid.uuid4()),
+            source=[random.choice(SOURCES)],
+            name=f"alert-{i}",
+            status=AlertStatus.FIRING,
+            severity=AlertSeverity.CRITICAL,
+            lastReceived=datetime.datetime.now().isoformat(),
+            service=random.choice(SERVICES),
+        )
+        for i in range(number_of_events)
+    ]
+
+
+def evaluate(rules_engine: RulesEngine, rules, events, use_index: bool) -> set:
+    matches = set()
+    payloads = [rules_engine._get_event_payload(event) for event in events]
+    if use_index:
+        rules_index = RulesIndex(rules, rules_engine._extract_subrules)
+        candidate_rule_ids = [
+            rules_index.get_candidate_rule_ids(payload) for payload in payloads
+        ]
+    for rule in rules:
+        for i, event in enumerate(events):
+            if use_index and str(rule.id) not in candidate_rule_ids[i]:
+                continue
+            try:
+                if rules_engine._check_if_rule_apply(rule, event, payloads[i]):
+                    matches.add((str(rule.id), event.id))
+            except Exception:
+                continue
+    return matches
+
+
+def benchmark():
+    random.seed(42)
+    rules_engine = RulesEngine(tenant_id="benchmark")
+    events = generate_events(NUMBER_OF_EVENTS)
+    print(f"{'rules':>8} {'all rules (ev/s)':>18} {'index (ev/s)':>14} {'speedup':>8}")
+    for number_of_rules in [10, 50, 100, 250, 500]:
+        rules = generate_rules(number_of_rules)
+        # warm up the compiled programs cache so both runs measure evaluation only
+        evaluate(rules_engine, rules, events[:1], use_index=False)
+        start = time.perf_counter()
+        all_rules_matches = evaluate(rules_engine, rules, events, use_index=False)
+        all_rules_time = time.perf_counter() - start
+        start = time.perf_counter()
+        index_matches = evaluate(rules_engine, rules, events, use_index=True)
+        index_time = time.perf_counter() - start
+        assert all_rules_matches == index_matches, "results differ"
+        print(
+            f"{number_of_rules:>8} {NUMBER_OF_EVENTS / all_rules_time:>18.1f} "
+            f"{NUMBER_OF_EVENTS / index_time:>14.1f} {all_rules_time / index_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -11,6 +11,14 @@ from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel, create_engine
 from starlette_context import context, request_cycle_context
 
+from keep.api.alert_deduplicator.alert_deduplicator import (
+    DeduplicationFilterRegistry,
+)
+from keep.api.alert_deduplicator.alert_hash_cache import AlertHashCache
+from keep.api.bl.extraction_rules_engine import ExtractionRulesEngine
+from keep.api.bl.mapping_rules_index import MappingRulesIndex
+from keep.api.bl.presets_counters import PresetsCounters
+
 # This import is required to create the tables
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
 from keep.api.models.db.alert import *
@@ -20,6 +28,9 @@ from keep.api.models.db.tenant import *
 from keep.api.models.db.user import *
 from keep.api.models.db.workflow import *
 from keep.contextmanager.contextmanager import ContextManager
+from keep.providers.installed_providers_registry import InstalledProvidersRegistry
+from keep.secretmanager.secretscache import SecretsCache
+from keep.workflowmanager.workflow_definitions_cache import WorkflowDefinitionsCache
 
 load_dotenv(find_dotenv())
 
@@ -193,6 +204,15 @@ def db_session(request, mysql_container):
     session.add_all(workflow_data)
     session.commit()
 
+    # the in-memory caches are keyed by tenant/fingerprint, a fresh DB means stale entries
+    AlertHashCache.get_instance().clear()
+    DeduplicationFilterRegistry.get_instance().invalidate()
+    PresetsCounters.get_instance().invalidate()
+    WorkflowDefinitionsCache.get_instance().invalidate()
+    SecretsCache.get_instance().clear()
+    InstalledProvidersRegistry.get_instance().invalidate()
+    MappingRulesIndex.get_instance().invalidate()
+    ExtractionRulesEngine.get_instance().invalidate()
     with patch("keep.api.core.db.engine", mock_engine):
         yield session
 
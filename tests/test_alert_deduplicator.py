@@ -1,4 +1,11 @@
-from keep.api.alert_deduplicator.alert_deduplicator import AlertDeduplicator
+import datetime
+from unittest.mock import patch
+
+from keep.api.alert_deduplicator.alert_deduplicator import (
+    AlertDeduplicator,
+    DeduplicationFilterRegistry,
+)
+from keep.api.alert_deduplicator.alert_hash_cache import AlertHashCache
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
 from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
 from keep.api.models.db.alert import Alert, AlertDeduplicationFilter
@@ -140,3 +147,187 @@ def test_deduplication_with_unrelated_filter(db_session):
     # Shouldn't be deduplicated since some-non-relevant-field-1 changed
     #   and it is not the field we are removing in filter
     assert not deduplicated
+
+
+def test_deduplication_hash_cache(db_session):
+    deduplicator = AlertDeduplicator(SINGLE_TENANT_UUID)
+    alert = AlertDto(
+        id="grafana-1",
+        source=["grafana"],
+        name="grafana-test-alert",
+        status=AlertStatus.FIRING,
+        severity=AlertSeverity.CRITICAL,
+        lastReceived="2021-08-01T00:00:00Z",
+    )
+    alert_hash, _ = deduplicator.is_deduplicated(alert)
+    db_session.add(
+        Alert(
+            tenant_id=SINGLE_TENANT_UUID,
+            provider_type="test",
+            provider_id="test",
+            event=alert.dict(),
+            fingerprint=alert.fingerprint,
+            alert_hash=alert_hash,
+        )
+    )
+    db_session.commit()
+    # first time the hash is fetched from the db and cached
+    _, deduplicated = deduplicator.is_deduplicated(alert)
+    assert deduplicated
+    # repeated alerts should not touch the db
+    with patch(
+        "keep.api.alert_deduplicator.alert_deduplicator.get_last_alert_hash_by_fingerprint"
+    ) as get_last_alert_hash_mock:
+        _, deduplicated = deduplicator.is_deduplicated(alert)
+    assert deduplicated
+    get_last_alert_hash_mock.assert_not_called()
+
+
+def _expire(cache: AlertHashCache, fingerprint: str):
+    # as if the entry was cached ttl seconds ago
+    alert_hash, inserted_at = cache._cache[(SINGLE_TENANT_UUID, fingerprint)]
+    cache._cache[(SINGLE_TENANT_UUID, fingerprint)] = (
+        alert_hash,
+        inserted_at - cache.ttl - 1,
+    )
+
+
+def test_deduplication_hash_cache_conflict(db_session):
+    deduplicator = AlertDeduplicator(SINGLE_TENANT_UUID)
+    alert = AlertDto(
+        id="grafana-1",
+        source=["grafana"],
+        name="grafana-test-alert",
+        status=AlertStatus.FIRING,
+        severity=AlertSeverity.CRITICAL,
+        lastReceived="2021-08-01T00:00:00Z",
+    )
+    alert_hash, _ = deduplicator.is_deduplicated(alert)
+    # e.g. another worker inserted the alert, this worker has a stale hash
+    AlertHashCache.get_instance().set(
+        SINGLE_TENANT_UUID, alert.fingerprint, "stale-hash"
+    )
+    db_session.add(
+        Alert(
+            tenant_id=SINGLE_TENANT_UUID,
+            provider_type="test",
+            provider_id="test",
+            event=alert.dict(),
+            fingerprint=alert.fingerprint,
+            alert_hash=alert_hash,
+        )
+    )
+    db_session.commit()
+    # the cached hash is trusted until it expires
+    _, deduplicated = deduplicator.is_deduplicated(alert)
+    assert not deduplicated
+    # then the db is checked and the cache is fixed
+    _expire(AlertHashCache.get_instance(), alert.fingerprint)
+    _, deduplicated = deduplicator.is_deduplicated(alert)
+    assert deduplicated
+    assert (
+        AlertHashCache.get_instance().get(SINGLE_TENANT_UUID, alert.fingerprint)
+        == alert_hash
+    )
+
+
+def test_deduplication_flapping_alert_across_workers(db_session):
+    # two workers, each with its own cache
+    worker_a = AlertDeduplicator(SINGLE_TENANT_UUID)
+    worker_a.alert_hash_cache = AlertHashCache(max_size=100, ttl=60)
+    worker_b = AlertDeduplicator(SINGLE_TENANT_UUID)
+    worker_b.alert_hash_cache = AlertHashCache(max_size=100, ttl=60)
+
+    def ingest(deduplicator, alert, timestamp):
+        alert_hash, deduplicated = deduplicator.is_deduplicated(alert)
+        if deduplicated:
+            return False
+        db_session.add(
+            Alert(
+                tenant_id=SINGLE_TENANT_UUID,
+                provider_type="test",
+                provider_id="test",
+                event=alert.dict(),
+                fingerprint=alert.fingerprint,
+                alert_hash=alert_hash,
+                timestamp=timestamp,
+            )
+        )
+        db_session.commit()
+        # as the ingestion does after inserting the alert
+        deduplicator.alert_hash_cache.set(
+            SINGLE_TENANT_UUID, alert.fingerprint, alert_hash
+        )
+        return True
+
+    def alert_with_status(status):
+        return AlertDto(
+            id="grafana-1",
+            source=["grafana"],
+            name="grafana-test-alert",
+            status=status,
+            severity=AlertSeverity.CRITICAL,
+            lastReceived="2021-08-01T00:00:00Z",
+            fingerprint="grafana-test-alert",
+        )
+
+    assert ingest(
+        worker_a, alert_with_status(AlertStatus.FIRING), datetime.datetime(2024, 1, 1)
+    )
+    assert ingest(
+        worker_b, alert_with_status(AlertStatus.RESOLVED), datetime.datetime(2024, 1, 2)
+    )
+    # worker a still has the firing hash cached, within the ttl the alert
+    #   firing again is deduplicated (the documented staleness window)
+    assert not ingest(
+        worker_a, alert_with_status(AlertStatus.FIRING), datetime.datetime(2024, 1, 3)
+    )
+    # once the cached hash expires, worker a sees that the alert was resolved
+    _expire(worker_a.alert_hash_cache, "grafana-test-alert")
+    assert ingest(
+        worker_a, alert_with_status(AlertStatus.FIRING), datetime.datetime(2024, 1, 4)
+    )
+    # and an actual duplicate is still deduplicated
+    assert not ingest(
+        worker_a, alert_with_status(AlertStatus.FIRING), datetime.datetime(2024, 1, 5)
+    )
+
+
+def test_alert_hash_cache_lru():
+    cache = AlertHashCache(max_size=2, ttl=60)
+    cache.set("tenant", "fingerprint-1", "hash-1")
+    cache.set("tenant", "fingerprint-2", "hash-2")
+    # touch fingerprint-1 so fingerprint-2 is the least recently used
+    assert cache.get("tenant", "fingerprint-1") == "hash-1"
+    cache.set("tenant", "fingerprint-3", "hash-3")
+    assert cache.get("tenant", "fingerprint-2") is None
+    assert cache.get("tenant", "fingerprint-3") == "hash-3"
+    # tenants are isolated
+    assert cache.get("other-tenant", "fingerprint-1") is None
+    assert len(cache) == 2
+
+
+def test_deduplication_filter_registry(db_session):
+    matcher = AlertDeduplicationFilter(
+        tenant_id=SINGLE_TENANT_UUID,
+        matcher_cel='source[0] == "grafana"',
+        fields=["labels.some-non-relevant-field"],
+    )
+    db_session.add(matcher)
+    db_session.commit()
+    registry = DeduplicationFilterRegistry.get_instance()
+    filters = registry.get_filters(SINGLE_TENANT_UUID)
+    assert len(filters) == 1
+    assert filters[0].fields == [("labels", "some-non-relevant-field")]
+    # the filters are kept in memory between deduplicators
+    with patch(
+        "keep.api.alert_deduplicator.alert_deduplicator.get_all_filters"
+    ) as get_all_filters_mock:
+        AlertDeduplicator(SINGLE_TENANT_UUID)
+        AlertDeduplicator(SINGLE_TENANT_UUID)
+    get_all_filters_mock.assert_not_called()
+    # until the filters are invalidated
+    db_session.delete(matcher)
+    db_session.commit()
+    registry.invalidate(SINGLE_TENANT_UUID)
+    assert registry.get_filters(SINGLE_TENANT_UUID) == []
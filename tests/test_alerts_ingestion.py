@@ -0,0 +1,131 @@
+import json
+from unittest.mock import Mock, patch
+
+from keep.api.core.db import enrich_alert, get_enrichments
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
+from keep.api.models.db.alert import Alert
+from keep.api.models.db.preset import Preset
+from keep.api.routes.alerts import handle_formatted_events, update_presets_counters
+
+
+def _build_alerts(count):
+    return [
+        AlertDto(
+            id=f"alert-{i}",
+            name=f"alert-{i}",
+            source=["test"],
+            status=AlertStatus.FIRING,
+            severity=AlertSeverity.CRITICAL,
+            lastReceived="2024-01-01T00:00:00Z",
+            fingerprint=f"fingerprint-{i}",
+        )
+        for i in range(count)
+    ]
+
+
+def test_handle_formatted_events_batch(db_session):
+    enrich_alert(SINGLE_TENANT_UUID, "fingerprint-1", {"ticket_id": "1234"})
+    alerts = _build_alerts(3)
+
+    with patch(
+        "keep.api.routes.alerts.get_enrichments", wraps=get_enrichments
+    ) as get_enrichments_mock:
+        enriched_alerts = handle_formatted_events(
+            SINGLE_TENANT_UUID,
+            "test",
+            db_session,
+            [alert.dict() for alert in alerts],
+            alerts,
+            None,
+            "test-provider",
+        )
+
+    # enrichments are fetched once for the whole batch
+    assert get_enrichments_mock.call_count == 1
+    assert [alert.fingerprint for alert in enriched_alerts] == [
+        "fingerprint-0",
+        "fingerprint-1",
+        "fingerprint-2",
+    ]
+    assert enriched_alerts[1].ticket_id == "1234"
+    assert not hasattr(enriched_alerts[0], "ticket_id")
+    db_alerts = {
+        alert.fingerprint: alert
+        for alert in db_session.query(Alert)
+        .filter(Alert.tenant_id == SINGLE_TENANT_UUID)
+        .all()
+    }
+    assert len(db_alerts) == 3
+    for enriched_alert in enriched_alerts:
+        assert str(db_alerts[enriched_alert.fingerprint].id) == enriched_alert.event_id
+
+
+def test_handle_formatted_events_pushes_batches(db_session):
+    alerts = _build_alerts(5)
+    pusher_client = Mock()
+    handle_formatted_events(
+        SINGLE_TENANT_UUID,
+        "test",
+        db_session,
+        [alert.dict() for alert in alerts],
+        alerts,
+        pusher_client,
+        "test-provider",
+    )
+    alerts_messages = [
+        call.args
+        for call in pusher_client.trigger.call_args_list
+        if call.args[1] == "async-alerts"
+    ]
+    # the alerts are sent in one message instead of one message per alert
+    assert len(alerts_messages) == 1
+    channel, _, payload = alerts_messages[0]
+    assert channel == f"private-{SINGLE_TENANT_UUID}"
+    assert [alert["fingerprint"] for alert in json.loads(payload)] == [
+        f"fingerprint-{i}" for i in range(5)
+    ]
+
+
+def test_handle_formatted_events_pushes_presets_changes(db_session):
+    db_session.add(
+        Preset(
+            tenant_id=SINGLE_TENANT_UUID,
+            name="test",
+            created_by="test@keephq.dev",
+            options=[{"label": "CEL", "value": '(source == "test")'}],
+        )
+    )
+    db_session.commit()
+    alerts = _build_alerts(3)
+    pusher_client = Mock()
+
+    def pushed_presets_counts():
+        presets_messages = [
+            json.loads(call.args[2])
+            for call in pusher_client.trigger.call_args_list
+            if call.args[1] == "async-presets"
+        ]
+        pusher_client.reset_mock()
+        return [
+            {preset["name"]: preset["alerts_count"] for preset in presets}
+            for presets in presets_messages
+        ]
+
+    for _ in range(2):
+        handle_formatted_events(
+            SINGLE_TENANT_UUID,
+            "test",
+            db_session,
+            [alert.dict() for alert in alerts],
+            alerts,
+            pusher_client,
+            "test-provider",
+        )
+    # the pushed counts are the changes, so alerts seen again are not counted again
+    assert pushed_presets_counts() == [{"test": 3}, {"test": 0}]
+
+    # enriched alerts push their presets too
+    alerts[0].source = ["other"]
+    update_presets_counters(SINGLE_TENANT_UUID, alerts[:1], pusher_client)
+    assert pushed_presets_counts() == [{"test": -1}]
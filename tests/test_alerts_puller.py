@@ -0,0 +1,205 @@
+import json
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from keep.api.bl import alerts_puller
+from keep.api.bl.alerts_puller import (
+    AlertsPuller,
+    PullInProgressError,
+    PullTimeoutError,
+    can_pull_alerts,
+)
+from keep.api.models.alert import AlertDto
+
+
+class FakeProvider:
+    def __init__(self, provider_id: str, delay: float, fail: bool = False):
+        self.provider_id = provider_id
+        self.delay = delay
+        self.fail = fail
+
+    def get_alerts_by_fingerprint(self, tenant_id: str):
+        time.sleep(self.delay)
+        if self.fail:
+            raise Exception("upstream is down")
+        alert = AlertDto(
+            id=self.provider_id,
+            name=self.provider_id,
+            lastReceived="2024-01-01T00:00:00.000Z",
+            source=["test"],
+            status="firing",
+            severity="info",
+        )
+        return {alert.fingerprint: [alert]}
+
+
+@pytest.fixture
+def fake_providers(monkeypatch):
+    delays = {"fast": 0, "slow": 0.5, "hung": 5, "broken": 0}
+    concurrent = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def get_provider(context_manager, provider_id, provider_type, provider_config):
+        provider = FakeProvider(
+            provider_id, delays[provider_id], provider_id == "broken"
+        )
+        get_alerts = provider.get_alerts_by_fingerprint
+
+        def counted_get_alerts(tenant_id):
+            with lock:
+                concurrent["now"] += 1
+                concurrent["max"] = max(concurrent["max"], concurrent["now"])
+            try:
+                return get_alerts(tenant_id)
+            finally:
+                with lock:
+                    concurrent["now"] -= 1
+
+        provider.get_alerts_by_fingerprint = counted_get_alerts
+        return provider
+
+    monkeypatch.setattr(
+        alerts_puller.ProvidersFactory, "get_provider", staticmethod(get_provider)
+    )
+    monkeypatch.setattr(alerts_puller, "can_pull_alerts", lambda provider_type: True)
+    providers = [
+        Mock(id=provider_id, type="fake", details={}) for provider_id in delays
+    ]
+    return providers, concurrent
+
+
+def test_pull_streams_results_as_providers_finish(fake_providers):
+    providers, concurrent = fake_providers
+    puller = AlertsPuller(max_workers=2, provider_timeout=1, budget=10)
+    start = time.monotonic()
+    results = []
+    for result in puller.pull("tenant", providers):
+        results.append((result, time.monotonic() - start))
+    by_provider = {result.provider.id: (result, at) for result, at in results}
+    # the fast providers don't wait for the slow or hung ones
+    order = [result.provider.id for result, _ in results]
+    assert order[0] == "fast" and order[-1] == "hung"
+    assert by_provider["fast"][1] < 0.3
+    assert [alert.name for alert in by_provider["fast"][0].alerts] == ["fast"]
+    assert str(by_provider["broken"][0].error) == "upstream is down"
+    assert [alert.name for alert in by_provider["slow"][0].alerts] == ["slow"]
+    # the hung provider is given up on after its timeout
+    assert isinstance(by_provider["hung"][0].error, PullTimeoutError)
+    assert by_provider["hung"][1] < 2.5
+    assert concurrent["max"] <= 2
+
+
+def test_pull_budget(fake_providers):
+    providers, _ = fake_providers
+    puller = AlertsPuller(max_workers=4, provider_timeout=10, budget=0.2)
+    results = {result.provider.id: result for result in puller.pull("t", providers)}
+    assert results["fast"].error is None
+    assert isinstance(results["slow"].error, PullTimeoutError)
+    assert isinstance(results["hung"].error, PullTimeoutError)
+
+
+def test_can_pull_alerts():
+    assert can_pull_alerts("prometheus")
+    assert not can_pull_alerts("console")
+    assert not can_pull_alerts("no-such-provider")
+
+
+def test_pull_skips_providers_still_pulling(fake_providers):
+    providers, concurrent = fake_providers
+    providers = [p for p in providers if p.id in ("fast", "hung")]
+    puller = AlertsPuller(
+        max_workers=2, provider_timeout=0.2, budget=10, min_interval=0
+    )
+    results = {result.provider.id: result for result in puller.pull("t", providers)}
+    assert isinstance(results["hung"].error, PullTimeoutError)
+    # the hung provider is still pulling, so it's not pulled again
+    results = {result.provider.id: result for result in puller.pull("t", providers)}
+    assert results["fast"].error is None
+    assert isinstance(results["hung"].error, PullInProgressError)
+    assert concurrent["max"] <= 2
+
+
+def test_pull_min_interval(fake_providers):
+    providers, _ = fake_providers
+    providers = [p for p in providers if p.id in ("fast", "broken")]
+    puller = AlertsPuller(max_workers=2, provider_timeout=1, budget=10, min_interval=60)
+    results = {result.provider.id: result for result in puller.pull("t", providers)}
+    assert not results["fast"].cached
+    # the providers pulled in the last minute are not pulled again
+    with patch.object(alerts_puller.ProvidersFactory, "get_provider") as get_provider:
+        results = {result.provider.id: result for result in puller.pull("t", providers)}
+        get_provider.assert_not_called()
+    assert results["fast"].cached
+    assert [alert.name for alert in results["fast"].alerts] == ["fast"]
+    assert results["broken"].cached and results["broken"].alerts == []
+    assert set(puller.get_last_pulled("t")) == {"fast", "broken"}
+    assert puller.get_last_pulled("other-tenant") == {}
+    puller.invalidate("t")
+    results = {result.provider.id: result for result in puller.pull("t", providers)}
+    assert not results["fast"].cached
+
+
+def test_pull_single_flight(fake_providers, monkeypatch):
+    from keep.api.routes import alerts
+
+    providers, _ = fake_providers
+    providers = [p for p in providers if p.id in ("fast", "slow")]
+    puller = AlertsPuller(max_workers=2, provider_timeout=5, budget=10)
+    monkeypatch.setattr(AlertsPuller, "_instance", puller, raising=False)
+    get_installed_providers = Mock(return_value=providers)
+    monkeypatch.setattr(
+        alerts.ProvidersFactory, "get_installed_providers", get_installed_providers
+    )
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                alerts.pull_alerts_from_providers("t", None, sync=True)
+            )
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # the concurrent calls joined a single pull
+    assert get_installed_providers.call_count == 1
+    assert [sorted(alert.name for alert in alerts) for alerts in results] == [
+        ["fast", "slow"]
+    ] * 5
+
+
+def test_pull_replays_alerts_to_late_joiners(fake_providers, monkeypatch, db_session):
+    from keep.api.routes import alerts
+
+    providers, _ = fake_providers
+    providers = [p for p in providers if p.id in ("fast", "slow")]
+    puller = AlertsPuller(max_workers=2, provider_timeout=5, budget=10)
+    monkeypatch.setattr(AlertsPuller, "_instance", puller, raising=False)
+    monkeypatch.setattr(
+        alerts.ProvidersFactory, "get_installed_providers", Mock(return_value=providers)
+    )
+    thread = threading.Thread(
+        target=alerts.pull_alerts_from_providers, args=("t", Mock())
+    )
+    thread.start()
+    # join the pull once the fast provider was sent to the channel
+    while not any(
+        result.provider.id == "fast"
+        for tenant_pull in list(puller._tenant_pulls.values())
+        for result in tenant_pull.results
+    ):
+        time.sleep(0.01)
+    pusher_client = Mock()
+    assert alerts.pull_alerts_from_providers("t", pusher_client) == []
+    thread.join()
+    pushed_alerts = [
+        alert["name"]
+        for call in pusher_client.trigger.call_args_list
+        for alert in json.loads(call.args[2])
+    ]
+    assert pushed_alerts == ["fast"]
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+
+import pytest
+
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.db.alert import Alert
+from keep.providers.providers_factory import ProvidersFactory
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # the bodies of the requests
+    batches = []
+    api_keys = set()
+    # status codes to answer with before answering 201
+    failures = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        status = StubAPIHandler.failures.pop(0) if StubAPIHandler.failures else 201
+        if status == 201:
+            StubAPIHandler.batches.append(json.loads(body))
+            StubAPIHandler.api_keys.add(self.headers["X-API-KEY"])
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("KEEP_API_URL", f"http://127.0.0.1:{server.server_port}")
+    yield
+    server.shutdown()
+    server.server_close()
+    StubAPIHandler.batches = []
+    StubAPIHandler.api_keys = set()
+    StubAPIHandler.failures = []
+
+
+def _get_provider(context_manager):
+    provider = ProvidersFactory.get_provider(
+        context_manager,
+        "kafka-test",
+        "kafka",
+        {"authentication": {"host": "localhost:9092", "topic": "alerts"}},
+    )
+    provider.alerts_push_buffer.batch_size = 3
+    provider.alerts_push_buffer.flush_interval = 0.2
+    provider.alerts_push_buffer.retry_backoff = 0
+    return provider
+
+
+def test_push_alerts_in_batches(stub_api, context_manager):
+    context_manager._api_key = "api-key"
+    provider = _get_provider(context_manager)
+    for i in range(4):
+        provider._push_alert({"name": f"alert-{i}"})
+    # the batch is sent when it's full
+    assert [[alert["name"] for alert in batch] for batch in StubAPIHandler.batches] == [
+        ["alert-0", "alert-1", "alert-2"]
+    ]
+    # and the rest after the flush interval
+    time.sleep(0.5)
+    assert len(StubAPIHandler.batches) == 2
+    assert StubAPIHandler.batches[1][0]["name"] == "alert-3"
+
+    # server errors are retried over the same connection
+    StubAPIHandler.failures = [503, 502]
+    provider._push_alert({"name": "alert-4"})
+    provider.flush_pushed_alerts()
+    assert len(StubAPIHandler.batches) == 3
+    assert provider.alerts_push_buffer.flush() == 0
+    assert StubAPIHandler.api_keys == {"api-key"}
+
+
+def test_push_alerts_in_process(db_session, context_manager):
+    provider = _get_provider(context_manager)
+    provider.alerts_push_buffer.in_process = True
+    pusher_client = Mock()
+    with patch(
+        "keep.providers.base.alerts_push_buffer.get_pusher_client",
+        return_value=pusher_client,
+    ):
+        provider._push_alert({"name": "alert", "fingerprint": "fingerprint"})
+        provider.flush_pushed_alerts()
+    db_alerts = (
+        db_session.query(Alert).filter(Alert.tenant_id == SINGLE_TENANT_UUID).all()
+    )
+    assert [alert.fingerprint for alert in db_alerts] == ["fingerprint"]
+    # the clients are notified as when the alerts are posted to the API
+    alerts_messages = [
+        call.args
+        for call in pusher_client.trigger.call_args_list
+        if call.args[1] == "async-alerts"
+    ]
+    assert len(alerts_messages) == 1
+    channel, _, payload = alerts_messages[0]
+    assert channel == f"private-{SINGLE_TENANT_UUID}"
+    assert [alert["fingerprint"] for alert in json.loads(payload)] == ["fingerprint"]
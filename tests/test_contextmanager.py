@@ -1,14 +1,17 @@
 """
 Test the context manager
 """
+import collections.abc
 import json
+import pickle
 import tempfile
 
 import pytest
 
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
 from keep.api.models.db.workflow import WorkflowExecution
-from keep.contextmanager.contextmanager import ContextManager
+from keep.contextmanager.contextmanager import ContextManager, SpilledStepResults
+from keep.iohandler.iohandler import IOHandler
 
 STATE_FILE_MOCK_DATA = {
     "new-github-stars": [
@@ -180,6 +183,96 @@ def test_context_manager_set_step_context(context_manager: ContextManager):
     assert context_manager.steps_context[step_id]["results"] == results
 
 
+def test_context_manager_steps_context_size(context_manager: ContextManager):
+    """
+    Test that the steps context size is updated with each result
+    """
+    rows = [{"id": i, "name": f"row-{i}"} for i in range(100)]
+    context_manager.set_step_context("query", results=rows)
+    size = context_manager.steps_context_size
+    assert size > 1024
+    # replacing the results replaces their size
+    context_manager.set_step_context("query", results=rows[:10])
+    assert context_manager.steps_context_size < size
+    context_manager.set_step_context("query", results=rows)
+    assert context_manager.steps_context_size == size
+    # foreach results are added
+    context_manager.set_step_context("foreach", results=rows, foreach=True)
+    context_manager.set_step_context("foreach", results=rows, foreach=True)
+    assert context_manager.steps_context_size == 3 * size
+
+
+def test_context_manager_spill_results(context_manager: ContextManager):
+    """
+    Test that oversized results are kept out of the memory and still rendered
+    """
+    context_manager.spill_results_size = 1024
+    rows = [{"id": i, "name": f"row-{i}"} for i in range(100)]
+    context_manager.set_step_context("query", results=rows)
+    context_manager.set_step_context("small", results={"count": 1})
+    assert isinstance(
+        context_manager.steps_context["query"]["results"], SpilledStepResults
+    )
+    assert context_manager.steps_context["small"]["results"] == {"count": 1}
+    assert context_manager.steps_context_size > 1024
+    iohandler = IOHandler(context_manager)
+    assert iohandler.render("{{ steps.query.results.1.name }}") == "row-1"
+    assert iohandler.render("keep.len({{ steps.query.results }})") == "100"
+
+
+def test_context_manager_spill_results_sections(context_manager: ContextManager):
+    """
+    Test that mustache sections iterate spilled results as they iterate the results
+    """
+    rows = [{"id": i, "name": f"row-{i}"} for i in range(100)]
+    template = (
+        "{{#steps.query.results}}{{ name }},{{/steps.query.results}}"
+        "{{#steps.count.results}}{{ count }}{{/steps.count.results}}"
+    )
+    count = {"count": 100, "rows": rows}
+    context_manager.set_step_context("query", results=rows)
+    context_manager.set_step_context("count", results=count)
+    expected = IOHandler(context_manager).render(template)
+    assert expected == ",".join(row["name"] for row in rows) + ",100"
+
+    context_manager.spill_results_size = 1024
+    context_manager.set_step_context("query", results=rows)
+    context_manager.set_step_context("count", results=count)
+    spilled_rows = context_manager.steps_context["query"]["results"]
+    spilled_count = context_manager.steps_context["count"]["results"]
+    assert isinstance(spilled_rows, SpilledStepResults)
+    assert isinstance(spilled_rows, collections.abc.Sequence)
+    assert isinstance(spilled_count, collections.abc.Mapping)
+    assert spilled_rows == rows and spilled_count == count
+    assert IOHandler(context_manager).render(template) == expected
+
+
+def test_context_manager_spill_results_cache(monkeypatch):
+    """
+    Test that spilled results are loaded once for repeated accesses
+    """
+    loads = []
+    pickle_load = pickle.load
+
+    def counting_load(file):
+        loads.append(file)
+        return pickle_load(file)
+
+    monkeypatch.setattr(pickle, "load", counting_load)
+    spilled = SpilledStepResults.spill({"id": 1, "name": "row-1"})
+    assert spilled["id"] == 1 and spilled.get("name") == "row-1"
+    assert len(loads) == 1
+    # the least recently loaded results are released
+    others = [
+        SpilledStepResults.spill([i]) for i in range(SpilledStepResults._loaded_size)
+    ]
+    assert [other[0] for other in others] == list(range(len(others)))
+    assert spilled["id"] == 1
+    assert len(loads) == len(others) + 2
+    with pytest.raises(TypeError):
+        hash(spilled)
+
+
 def test_context_manager_get_last_alert_run(context_manager_with_state: ContextManager, db_session):
     alert_id = "mock_alert"
     alert_context = {"mock": "mock"}
@@ -1,14 +1,30 @@
 # test_enrichments.py
+import datetime
+import enum
+import json
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 
 from keep.api.bl.enrichments import EnrichmentsBl
-from keep.api.models.alert import AlertDto
+from keep.api.bl.extraction_rules_engine import (
+    ExtractionRulesEngine,
+    to_json_value,
+    validate_extraction_rule,
+)
+from keep.api.models.alert import AlertDto, AlertStatus
 from keep.api.models.db.extraction import ExtractionRule
 from keep.api.models.db.mapping import MappingRule
 
 
+@pytest.fixture(autouse=True)
+def extraction_rules_engine():
+    # the compiled rules are cached per tenant, every test has its own rules
+    ExtractionRulesEngine.get_instance().invalidate()
+    yield
+    ExtractionRulesEngine.get_instance().invalidate()
+
+
 @pytest.fixture
 def mock_session():
     """Create a mock session to simulate database operations."""
@@ -247,3 +263,116 @@ def test_run_mapping_rules_applies(mock_session, mock_alert_dto):
 
     # Check if the alert's service is now updated to "new_service"
     assert mock_alert_dto.service == "new_service"
+
+
+def test_run_mapping_rules_first_match_and_wildcard(mock_session, mock_alert_dto):
+    mock_alert_dto.service = "api"
+    rule = MappingRule(
+        id=2,
+        tenant_id="test_tenant",
+        priority=1,
+        matchers=["name", "service"],
+        rows=[
+            {"name": "Other Alert", "service": "*", "team": "other"},
+            {"name": "*", "service": "api", "team": "api-team"},
+            {"name": "Test Alert", "service": "api", "team": "alerts-team"},
+            {"name": "Test Alert", "service": ["unhashable"], "team": "list-team"},
+        ],
+        disabled=False,
+    )
+    mock_session.query.return_value.filter.return_value.filter.return_value.order_by.return_value.all.return_value = [
+        rule
+    ]
+
+    enrichment_bl = EnrichmentsBl(tenant_id="test_tenant", db=mock_session)
+    enrichment_bl.run_mapping_rules(mock_alert_dto)
+
+    # the first matching row wins, like when scanning the rows
+    assert mock_alert_dto.team == "api-team"
+
+    # the index is rebuilt when the rule is updated
+    rule.rows = [{"name": "Test Alert", "service": "api", "team": "new-team"}]
+    rule.last_updated_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=1)
+    enrichment_bl.run_mapping_rules(mock_alert_dto)
+    assert mock_alert_dto.team == "new-team"
+
+
+def test_run_mapping_rule_by_id(mock_session):
+    rule = MappingRule(
+        id=3,
+        tenant_id="test_tenant",
+        priority=1,
+        matchers=["name"],
+        rows=[
+            {"name": "John", "age": 30},
+            {"name": "Jane", "age": 25},
+            {"name": "John", "age": 40},
+            {"name": "*", "age": 0},
+        ],
+    )
+    enrichment_bl = EnrichmentsBl(tenant_id="test_tenant", db=mock_session)
+    with patch(
+        "keep.api.bl.enrichments.get_mapping_rule_by_id", return_value=rule
+    ) as get_rule_mock:
+        result = enrichment_bl.run_mapping_rule_by_id(
+            3,
+            [
+                {"firstName": "John"},
+                {"firstName": "Jane"},
+                {"firstName": "Jim"},
+                {"lastName": "Doe"},
+            ],
+            "firstName",
+            "name",
+            "age",
+        )
+    get_rule_mock.assert_called_once_with("test_tenant", 3)
+    # no wildcards for mapping by id
+    assert result == [30, 25]
+
+
+def test_extraction_rules_are_loaded_once(mock_session, mock_alert_dto):
+    rule = ExtractionRule(
+        id=4,
+        tenant_id="test_tenant",
+        priority=1,
+        attribute="{{ name }}",
+        regex="(?P<first_word>\\w+) Alert",
+        disabled=False,
+        condition='severity == "high"',
+    )
+    mock_session.query.return_value.filter.return_value.filter.return_value.order_by.return_value.all.return_value = [
+        rule
+    ]
+
+    for _ in range(2):
+        enriched_event = EnrichmentsBl(
+            tenant_id="test_tenant", db=mock_session
+        ).run_extraction_rules(mock_alert_dto)
+        assert enriched_event.first_word == "Test"
+    # the rules are queried and compiled once
+    assert mock_session.query.call_count == 1
+
+    ExtractionRulesEngine.get_instance().invalidate("test_tenant")
+    EnrichmentsBl(tenant_id="test_tenant", db=mock_session).run_extraction_rules(
+        mock_alert_dto
+    )
+    assert mock_session.query.call_count == 2
+
+
+def test_to_json_value(mock_alert_dto):
+    event = mock_alert_dto.dict()
+    event["nested"] = {1: ("a", None), None: datetime.datetime(2024, 1, 1)}
+    event["enum"] = AlertStatus.FIRING
+    assert to_json_value(event) == json.loads(json.dumps(event, default=str))
+    # enums are converted to their value
+    assert not isinstance(to_json_value(event)["enum"], enum.Enum)
+
+
+def test_validate_extraction_rule():
+    validate_extraction_rule("(?P<service>\\w+)", "name", 'severity == "high"')
+    validate_extraction_rule("(?P<service>\\w+)", "{{ name }}", None)
+    with pytest.raises(ValueError, match="Invalid regex"):
+        validate_extraction_rule("(?P<service>\\w+", "name", None)
+    with pytest.raises(ValueError, match="Invalid condition"):
+        validate_extraction_rule(".*", "name", 'severity == "high')
@@ -3,11 +3,13 @@ Test the io handler
 """
 
 import datetime
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
 from keep.api.models.alert import AlertDto
-from keep.iohandler.iohandler import IOHandler
+from keep.iohandler.iohandler import IOHandler, RenderException, _compile_template
 
 
 def test_vanilla(context_manager):
@@ -732,3 +734,44 @@ def test_escaped_quotes_with_with_newlines(context_manager):
     assert (
         len(extracted_functions) == 1
     ), "Expected one function to be extracted with escaped quotes inside arguments."
+
+
+def test_safe_render_missing_keys(mocked_context_manager):
+    mocked_context_manager.get_full_context.return_value = {
+        "alert": {"name": "this is a test", "labels": [{"team": "core"}]}
+    }
+    iohandler = IOHandler(mocked_context_manager)
+    stderr = sys.stderr
+    with pytest.raises(RenderException) as excinfo:
+        iohandler.render("{{ alert.name }} {{ alert.missing }}", safe=True)
+    assert str(excinfo.value) == "Could not find key 'alert.missing' in the context."
+    with pytest.raises(RenderException) as excinfo:
+        iohandler.render("{{ alert.a }} {{ alert.b }} {{ alert.a }}", safe=True)
+    assert "Could not find keys: 'alert.a', 'alert.b'" in str(excinfo.value)
+    # keys of the outer scopes are found inside sections
+    rendered = iohandler.render(
+        "{{#alert.labels}}{{team}}-{{alert.name}}{{/alert.labels}}", safe=True
+    )
+    assert rendered == "core-this is a test"
+    assert iohandler.render("{{ alert.missing }}", default="default") == "default"
+    assert sys.stderr is stderr
+
+
+def test_render_concurrently(mocked_context_manager):
+    mocked_context_manager.get_full_context.return_value = {
+        "alert": {"name": "this is a test"}
+    }
+    iohandler = IOHandler(mocked_context_manager)
+    _compile_template.cache_clear()
+
+    def render(i):
+        if i % 2:
+            return iohandler.render("{{ alert.name }} keep.len('{{ alert.name }}')")
+        with pytest.raises(RenderException):
+            iohandler.render("{{ alert.missing }}", safe=True)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(render, range(200)))
+    assert results[1::2] == ["this is a test 14"] * 100
+    # each template is tokenized once
+    assert _compile_template.cache_info().misses == 2
@@ -0,0 +1,159 @@
+import json
+
+from kafka.consumer.fetcher import ConsumerRecord
+from kafka.structs import TopicPartition
+
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.db.alert import Alert
+from keep.providers.providers_factory import ProvidersFactory
+
+TOPIC_PARTITION = TopicPartition("alerts", 0)
+
+
+def _build_record(offset, value):
+    return ConsumerRecord(
+        TOPIC_PARTITION.topic,
+        TOPIC_PARTITION.partition,
+        offset,
+        0,
+        0,
+        None,
+        value,
+        [],
+        None,
+        -1,
+        len(value),
+        -1,
+    )
+
+
+class FakeConsumer:
+    def __init__(self, values, highwater):
+        self.records = [_build_record(i, value) for i, value in enumerate(values)]
+        self._highwater = highwater
+        self._position = 0
+        self.committed = None
+        self.polls = []
+
+    def poll(self, timeout_ms=0, max_records=None):
+        self.polls.append((timeout_ms, max_records))
+        records = self.records[self._position : self._position + max_records]
+        self._position += len(records)
+        return {TOPIC_PARTITION: records} if records else {}
+
+    def commit(self):
+        self.committed = self._position
+
+    def seek(self, tp, offset):
+        self._position = offset
+
+    def assignment(self):
+        return {TOPIC_PARTITION}
+
+    def highwater(self, tp):
+        return self._highwater
+
+    def position(self, tp):
+        return self._position
+
+
+def _get_provider(context_manager, consumer):
+    provider = ProvidersFactory.get_provider(
+        context_manager,
+        "kafka-test",
+        "kafka",
+        {"authentication": {"host": "localhost:9092", "topic": "alerts"}},
+    )
+    provider.CONSUMER_MODE = "batch"
+    provider.BATCH_MAX_RECORDS = 2
+    provider.BATCH_RETRY_INTERVAL = 0
+    provider.consumer = consumer
+    return provider
+
+
+def test_consume_batch(db_session, context_manager):
+    consumer = FakeConsumer(
+        [
+            json.dumps({"name": "alert-0", "fingerprint": "fingerprint-0"}),
+            "not an alert",
+            json.dumps({"name": "alert-2", "fingerprint": "fingerprint-2"}),
+        ],
+        highwater=10,
+    )
+    provider = _get_provider(context_manager, consumer)
+
+    # the record that is not an alert is dismissed
+    assert provider._consume_batch() == 1
+    assert consumer.committed == 2
+    assert provider._consume_batch() == 1
+    assert consumer.committed == 3
+    assert provider._consume_batch() == 0
+    assert consumer.polls[0] == (provider.BATCH_MAX_WAIT_MS, 2)
+
+    db_alerts = (
+        db_session.query(Alert).filter(Alert.tenant_id == SINGLE_TENANT_UUID).all()
+    )
+    assert sorted(alert.fingerprint for alert in db_alerts) == [
+        "fingerprint-0",
+        "fingerprint-2",
+    ]
+    assert db_alerts[0].provider_id == "kafka-test"
+    metrics = provider.status()["metrics"]
+    assert metrics["batches"] == 2
+    assert metrics["records"] == 2
+    assert metrics["max_batch_size"] == 1
+    assert metrics["lag"] == {"alerts-0": 7}
+
+
+def test_consume_batch_failure_is_retried(db_session, context_manager, monkeypatch):
+    consumer = FakeConsumer(
+        [json.dumps({"name": "alert", "fingerprint": "fingerprint"})], highwater=1
+    )
+    provider = _get_provider(context_manager, consumer)
+
+    def failing_ingest(alerts, pusher_client=None):
+        raise Exception("database is down")
+
+    monkeypatch.setattr(provider, "_ingest_alerts", failing_ingest)
+    assert provider._consume_batch() == 0
+    # the offsets are not committed and the batch is polled again
+    assert consumer.committed is None
+    assert provider.metrics["failed_batches"] == 1
+
+    monkeypatch.undo()
+    assert provider._consume_batch() == 1
+    assert consumer.committed == 1
+    assert provider.metrics["lag"] == {"alerts-0": 0}
+
+
+def test_consume_batch_skips_failing_records(db_session, context_manager, monkeypatch):
+    consumer = FakeConsumer(
+        [
+            json.dumps({"name": "alert-0", "fingerprint": "fingerprint-0"}),
+            json.dumps({"name": "poison", "fingerprint": "poison"}),
+        ],
+        highwater=2,
+    )
+    provider = _get_provider(context_manager, consumer)
+    provider.BATCH_MAX_RETRIES = 2
+    ingest_alerts = provider._ingest_alerts
+
+    def poisoned_ingest(alerts, pusher_client=None):
+        if any(alert.fingerprint == "poison" for alert in alerts):
+            raise Exception("cannot ingest poison")
+        return ingest_alerts(alerts, pusher_client)
+
+    monkeypatch.setattr(provider, "_ingest_alerts", poisoned_ingest)
+    for _ in range(provider.BATCH_MAX_RETRIES):
+        assert provider._consume_batch() == 0
+        assert consumer.committed is None
+    # the retries are exhausted, the batch is ingested in halves and the
+    #   failing record is skipped
+    assert provider._consume_batch() == 1
+    assert consumer.committed == 2
+    assert provider.metrics["failed_batches"] == 2
+    assert provider.metrics["skipped_records"] == 1
+    db_alerts = (
+        db_session.query(Alert).filter(Alert.tenant_id == SINGLE_TENANT_UUID).all()
+    )
+    assert [alert.fingerprint for alert in db_alerts] == ["fingerprint-0"]
@@ -0,0 +1,54 @@
+import logging
+import time
+
+from keep.api.logging import WorkflowDBHandler
+from keep.api.models.db.workflow import WorkflowExecutionLog
+
+
+def _create_logger(handler: WorkflowDBHandler) -> logging.Logger:
+    logger = logging.getLogger("test-workflow-logs")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def _get_logs(db_session, workflow_execution_id):
+    return (
+        db_session.query(WorkflowExecutionLog)
+        .filter(WorkflowExecutionLog.workflow_execution_id == workflow_execution_id)
+        .all()
+    )
+
+
+def test_workflow_logs_per_execution(db_session):
+    handler = WorkflowDBHandler(batch_size=100, flush_interval=60)
+    logger = _create_logger(handler)
+    logger.info("not a workflow log")
+    logger.info("log of %s", "a", extra={"workflow_execution_id": "a"})
+    logger.info("log of b", extra={"workflow_execution_id": "b", "context": {"x": 1}})
+    # dumping an execution writes only its logs
+    handler.push_logs_to_db("b", wait=True)
+    logs = _get_logs(db_session, "b")
+    assert [log.message for log in logs] == ["log of b"]
+    assert logs[0].context == {"x": 1}
+    assert _get_logs(db_session, "a") == []
+    handler.push_logs_to_db(wait=True)
+    assert [log.message for log in _get_logs(db_session, "a")] == ["log of a"]
+    assert db_session.query(WorkflowExecutionLog).count() == 2
+
+
+def test_workflow_logs_flush_on_size_and_time(db_session):
+    handler = WorkflowDBHandler(
+        batch_size=10, flush_interval=0.2, max_message_length=1000
+    )
+    logger = _create_logger(handler)
+    for i in range(25):
+        logger.info(f"log {i}", extra={"workflow_execution_id": "a"})
+    # long messages are no longer cut at 255 characters
+    logger.info("x" * 2000, extra={"workflow_execution_id": "a"})
+    # the full batches are written right away and the rest after the flush interval
+    time.sleep(1)
+    logs = _get_logs(db_session, "a")
+    assert len(logs) == 26
+    assert max(len(log.message) for log in logs) == 1000
@@ -0,0 +1,127 @@
+import io
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session
+from starlette.datastructures import UploadFile
+
+from keep.api.bl.enrichments import EnrichmentsBl
+from keep.api.core.db import get_mapping_rule_rows, migrate_mapping_rules_rows
+from keep.api.core.dependencies import SINGLE_TENANT_UUID, AuthenticatedEntity
+from keep.api.models.alert import AlertDto
+from keep.api.models.db.mapping import (
+    MappingRule,
+    MappingRuleDtoIn,
+    MappingRuleDtoUpdate,
+    MappingRuleRow,
+)
+from keep.api.routes.mapping import (
+    create_rule,
+    delete_rule,
+    get_rules,
+    update_rule,
+    upload_rule_rows,
+)
+
+AUTHENTICATED_ENTITY = AuthenticatedEntity(SINGLE_TENANT_UUID, "test@keephq.dev")
+
+
+def _run_mapping_rules(db_session, alert: AlertDto):
+    with Session(db_session.get_bind()) as session:
+        EnrichmentsBl(SINGLE_TENANT_UUID, session).run_mapping_rules(alert)
+
+
+def _upload(db_session, rule_id, content: str):
+    return upload_rule_rows(
+        rule_id,
+        UploadFile(io.BytesIO(content.encode()), filename="services.csv"),
+        AUTHENTICATED_ENTITY,
+        db_session,
+    )
+
+
+def test_mapping_rule_rows_out_of_row(db_session, monkeypatch):
+    # insert in small chunks to go through the chunking
+    monkeypatch.setattr("keep.api.core.db.MAPPING_RULE_ROWS_CHUNK_SIZE", 2)
+    rule = create_rule(
+        MappingRuleDtoIn(
+            name="services",
+            matchers=["service"],
+            rows=[
+                {"service": "api", "team": "a"},
+                {"service": "db", "team": "b"},
+                {"service": "api", "team": "c"},
+            ],
+        ),
+        AUTHENTICATED_ENTITY,
+        db_session,
+    )
+    # the rows are not stored in the rule
+    assert db_session.query(MappingRule).get(rule.id).rows == []
+    assert [row["team"] for row in get_mapping_rule_rows(rule)] == ["a", "b", "c"]
+
+    rules = get_rules(AUTHENTICATED_ENTITY, db_session)
+    assert [(r.name, r.attributes) for r in rules] == [("services", ["team"])]
+
+    alert = AlertDto(
+        id="1",
+        name="alert",
+        service="api",
+        source=["test"],
+        lastReceived="2024-01-01T00:00:00Z",
+        fingerprint="fingerprint",
+    )
+    _run_mapping_rules(db_session, alert)
+    assert alert.team == "a"
+
+    # upload a CSV file with a different column (saved with a BOM, like Excel does)
+    response = _upload(
+        db_session,
+        rule.id,
+        "\ufeffservice,owner\napi,alice\ndb,bob\nqueue,carol\nweb,dave\nci,erin\n",
+    )
+    assert response.attributes == ["owner"]
+    assert response.file_name == "services.csv"
+    assert db_session.query(MappingRuleRow).count() == 5
+    _run_mapping_rules(db_session, alert)
+    assert alert.owner == "alice"
+
+    with pytest.raises(HTTPException) as e:
+        _upload(db_session, rule.id, "name,owner\napi,alice\n")
+    assert e.value.status_code == 400
+    db_session.rollback()
+
+    response = update_rule(
+        MappingRuleDtoUpdate(
+            id=rule.id, name="services", matchers=["service"], rows=[]
+        ),
+        AUTHENTICATED_ENTITY,
+        db_session,
+    )
+    assert db_session.query(MappingRuleRow).count() == 0
+
+    delete_rule(rule.id, AUTHENTICATED_ENTITY, db_session)
+    assert db_session.query(MappingRule).count() == 0
+
+
+def test_migrate_mapping_rules_rows(db_session):
+    rule = MappingRule(
+        tenant_id=SINGLE_TENANT_UUID,
+        name="legacy",
+        matchers=["service"],
+        rows=[{"service": "api", "team": "a"}, {"service": "db", "team": "b"}],
+    )
+    db_session.add(rule)
+    db_session.commit()
+    rules = get_rules(AUTHENTICATED_ENTITY, db_session)
+    assert rules[0].attributes == ["team"]
+
+    migrate_mapping_rules_rows()
+    db_session.expire_all()
+    rule = db_session.query(MappingRule).get(rule.id)
+    assert rule.rows == []
+    assert get_mapping_rule_rows(rule) == [
+        {"service": "api", "team": "a"},
+        {"service": "db", "team": "b"},
+    ]
+    assert get_rules(AUTHENTICATED_ENTITY, db_session)[0].attributes == ["team"]
@@ -0,0 +1,184 @@
+import datetime
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from keep.api.bl.presets_counters import PresetsCounters
+from keep.api.core.db import get_last_alerts
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
+from keep.api.models.db.alert import Alert
+from keep.api.models.db.preset import Preset, StaticPresetsId
+from keep.api.routes.alerts import convert_db_alerts_to_dto_alerts
+from keep.rulesengine.rulesengine import RulesEngine
+
+
+def _create_alert_dto(
+    fingerprint, source, severity, status=AlertStatus.FIRING, **kwargs
+):
+    return AlertDto(
+        id=str(uuid.uuid4()),
+        name=f"alert-{fingerprint}",
+        source=[source],
+        severity=severity,
+        status=status,
+        lastReceived=datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+        fingerprint=fingerprint,
+        **kwargs,
+    )
+
+
+def _create_preset(name, cel, is_noisy=False):
+    return Preset(
+        tenant_id=SINGLE_TENANT_UUID,
+        name=name,
+        created_by="test@keephq.dev",
+        is_noisy=is_noisy,
+        options=[{"label": "CEL", "value": cel}],
+    )
+
+
+def test_presets_counters(db_session):
+    alerts_dto = [
+        _create_alert_dto("fp-1", "grafana", AlertSeverity.CRITICAL),
+        _create_alert_dto("fp-2", "grafana", AlertSeverity.INFO),
+        _create_alert_dto(
+            "fp-3", "sentry", AlertSeverity.CRITICAL, status=AlertStatus.RESOLVED
+        ),
+    ]
+    db_session.add_all(
+        [
+            Alert(
+                tenant_id=SINGLE_TENANT_UUID,
+                provider_type="test",
+                provider_id="test",
+                event=alert.dict(),
+                fingerprint=alert.fingerprint,
+            )
+            for alert in alerts_dto
+        ]
+    )
+    db_session.commit()
+    presets = [
+        _create_preset("grafana", '(source == "grafana")'),
+        _create_preset("critical", '(severity == "critical")', is_noisy=True),
+        _create_preset("sentry", '(source == "sentry")', is_noisy=True),
+    ]
+    presets_counters = PresetsCounters.get_instance()
+
+    presets_dto = presets_counters.get_presets_dto(SINGLE_TENANT_UUID, presets)
+    counts = {preset.name: preset.alerts_count for preset in presets_dto}
+    # same counts as filtering all the alerts
+    all_alerts_dto = convert_db_alerts_to_dto_alerts(
+        get_last_alerts(tenant_id=SINGLE_TENANT_UUID)
+    )
+    for preset in presets:
+        assert counts[preset.name] == len(
+            RulesEngine.filter_alerts(all_alerts_dto, preset.options[0]["value"])
+        )
+    assert counts == {
+        "grafana": 2,
+        "critical": 2,
+        "sentry": 1,
+        "feed": 3,
+        "dismissed": 0,
+        "groups": 0,
+    }
+    noise = {preset.name: preset.should_do_noise_now for preset in presets_dto}
+    # only the noisy preset with a firing alert should do noise
+    assert noise["critical"] is True
+    assert noise["sentry"] is False
+
+    # a new alert and a dismissed one
+    updated_presets = presets_counters.update_alerts(
+        SINGLE_TENANT_UUID,
+        [
+            _create_alert_dto("fp-4", "sentry", AlertSeverity.WARNING),
+            _create_alert_dto("fp-2", "grafana", AlertSeverity.INFO, dismissed=True),
+        ],
+        presets,
+    )
+    # the critical preset is not related to the changed alerts, the counts
+    #   of the updated presets are the changes
+    assert {preset.name: preset.alerts_count for preset in updated_presets} == {
+        "grafana": 0,
+        "sentry": 1,
+    }
+    presets_dto = presets_counters.get_presets_dto(SINGLE_TENANT_UUID, presets)
+    counts = {preset.name: preset.alerts_count for preset in presets_dto}
+    assert counts == {
+        "grafana": 2,
+        "critical": 2,
+        "sentry": 2,
+        "feed": 3,
+        "dismissed": 1,
+        "groups": 0,
+    }
+    noise = {preset.name: preset.should_do_noise_now for preset in presets_dto}
+    assert noise["sentry"] is True
+
+    # the preset query changed, so it's filtered again
+    presets[0].options = [{"label": "CEL", "value": '(severity == "info")'}]
+    presets_dto = presets_counters.get_presets_dto(SINGLE_TENANT_UUID, presets)
+    assert presets_dto[0].alerts_count == 1
+    assert presets_dto[-3].id == uuid.UUID(StaticPresetsId.FEED_PRESET_ID.value)
+
+
+def test_presets_counters_deleted_presets(db_session):
+    presets = [
+        _create_preset("grafana", '(source == "grafana")'),
+        _create_preset("sentry", '(source == "sentry")'),
+    ]
+    presets_counters = PresetsCounters.get_instance()
+    presets_counters.get_presets_dto(SINGLE_TENANT_UUID, presets)
+    state = presets_counters.get_state(SINGLE_TENANT_UUID)
+    assert set(state.presets) == {str(preset.id) for preset in presets}
+
+    # the sentry preset was deleted
+    updated_presets = presets_counters.update_alerts(
+        SINGLE_TENANT_UUID,
+        [_create_alert_dto("fp-1", "grafana", AlertSeverity.CRITICAL)],
+        presets[:1],
+    )
+    assert [preset.alerts_count for preset in updated_presets] == [1]
+    assert set(state.presets) == {str(presets[0].id)}
+
+
+def test_presets_counters_pulled_alerts(db_session):
+    presets = [
+        _create_preset("grafana", '(source == "grafana")', is_noisy=True),
+        _create_preset("sentry", '(source == "sentry")'),
+    ]
+    presets_counters = PresetsCounters.get_instance()
+    presets_dto = presets_counters.get_pulled_presets_dto(
+        [_create_alert_dto("fp-1", "grafana", AlertSeverity.CRITICAL)], presets
+    )
+    # the pulled alerts make noise but are not counted
+    assert [
+        (preset.name, preset.alerts_count, preset.should_do_noise_now)
+        for preset in presets_dto
+    ] == [("grafana", 0, True)]
+    state = presets_counters.get_state(SINGLE_TENANT_UUID)
+    assert "fp-1" not in state.alerts
+
+
+def test_presets_counters_single_reload(db_session, monkeypatch):
+    presets_counters = PresetsCounters.get_instance()
+    load_state = presets_counters._load_state
+    loads = []
+
+    def slow_load_state(tenant_id):
+        loads.append(tenant_id)
+        time.sleep(0.2)
+        return load_state(tenant_id)
+
+    monkeypatch.setattr(presets_counters, "_load_state", slow_load_state)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        states = list(
+            executor.map(
+                lambda _: presets_counters.get_state(SINGLE_TENANT_UUID), range(4)
+            )
+        )
+    # the concurrent callers waited for the same reload
+    assert loads == [SINGLE_TENANT_UUID]
+    assert all(state is states[0] for state in states)
@@ -1,7 +1,19 @@
+import datetime
 import inspect
 from typing import Optional, Union
+from unittest.mock import patch
 
+from fastapi.encoders import jsonable_encoder
+
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.db.provider import Provider
+from keep.api.models.provider import Provider as ProviderDto
+from keep.providers.installed_providers_registry import (
+    InstalledProvidersRegistry,
+    LazyProviderConfig,
+)
 from keep.providers.providers_factory import ProvidersFactory
+from keep.secretmanager.secretmanagerfactory import SecretManagerFactory
 
 
 class TestProviderFactoryMethodParam:
@@ -38,3 +50,103 @@ class TestProviderFactoryMethodParam:
     def test_get_method_param_type_without_annotation(self):
         param = inspect.Parameter("test", inspect.Parameter.POSITIONAL_ONLY)
         assert ProvidersFactory._get_method_param_type(param) == "str"
+
+
+def test_installed_providers_registry(
+    db_session, context_manager, monkeypatch, tmp_path
+):
+    monkeypatch.setenv("SECRET_MANAGER_DIRECTORY", str(tmp_path))
+    db_session.add(
+        Provider(
+            id="1234",
+            tenant_id=SINGLE_TENANT_UUID,
+            name="my-console",
+            type="console",
+            installed_by="tests@keephq.dev",
+            installation_time=datetime.datetime.now(),
+            configuration_key=f"{SINGLE_TENANT_UUID}_console_1234",
+            validatedScopes={},
+        )
+    )
+    db_session.commit()
+    (tmp_path / f"{SINGLE_TENANT_UUID}_console_1234").write_text(
+        '{"authentication": {}}'
+    )
+    registry = InstalledProvidersRegistry.get_instance()
+    with patch.object(
+        SecretManagerFactory,
+        "get_secret_manager",
+        wraps=SecretManagerFactory.get_secret_manager,
+    ) as get_secret_manager:
+        installed_providers = registry.get_installed_providers(SINGLE_TENANT_UUID)
+        assert [p.name for p in installed_providers] == ["my-console"]
+        provider_config = registry.get_provider_config(
+            SINGLE_TENANT_UUID, installed_providers[0]
+        )
+        assert isinstance(provider_config, LazyProviderConfig)
+        # listing the providers doesn't read their secrets
+        get_secret_manager.assert_not_called()
+        provider = ProvidersFactory.get_provider(
+            context_manager=context_manager,
+            provider_id="1234",
+            provider_type="console",
+            provider_config=provider_config,
+        )
+        assert provider.config.authentication == {}
+        assert dict(provider_config) == {
+            "name": "my-console",
+            "authentication": {},
+        }
+        get_secret_manager.assert_called_once()
+
+    # the installed providers are cached until the tenant is invalidated
+    db_session.delete(db_session.get(Provider, "1234"))
+    db_session.commit()
+    assert len(registry.get_installed_providers(SINGLE_TENANT_UUID)) == 1
+    registry.invalidate(SINGLE_TENANT_UUID)
+    assert registry.get_installed_providers(SINGLE_TENANT_UUID) == []
+
+
+def test_get_installed_providers_lazy_details(db_session, monkeypatch, tmp_path):
+    monkeypatch.setenv("SECRET_MANAGER_DIRECTORY", str(tmp_path))
+    db_session.add(
+        Provider(
+            id="1234",
+            tenant_id=SINGLE_TENANT_UUID,
+            name="my-console",
+            type="console",
+            installed_by="tests@keephq.dev",
+            installation_time=datetime.datetime.now(),
+            configuration_key=f"{SINGLE_TENANT_UUID}_console_1234",
+            validatedScopes={},
+        )
+    )
+    db_session.commit()
+    (tmp_path / f"{SINGLE_TENANT_UUID}_console_1234").write_text(
+        '{"authentication": {}}'
+    )
+    with patch.object(
+        SecretManagerFactory,
+        "get_secret_manager",
+        wraps=SecretManagerFactory.get_secret_manager,
+    ) as get_secret_manager:
+        installed_providers = ProvidersFactory.get_installed_providers(
+            SINGLE_TENANT_UUID,
+            all_providers=[
+                ProviderDto(
+                    display_name="Console",
+                    type="console",
+                    can_notify=True,
+                    can_query=False,
+                )
+            ],
+        )
+        assert [p.id for p in installed_providers] == ["1234"]
+        assert isinstance(installed_providers[0].details, LazyProviderConfig)
+        # the secret is read only when the details are used
+        get_secret_manager.assert_not_called()
+        assert jsonable_encoder(installed_providers[0])["details"] == {
+            "name": "my-console",
+            "authentication": {},
+        }
+        get_secret_manager.assert_called_once()
@@ -0,0 +1,77 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from keep.providers.base.http_session import create_http_session
+from keep.providers.providers_factory import ProvidersFactory
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # path -> status codes to answer with before answering 200
+    failures = {}
+    # path -> number of requests
+    requests = {}
+
+    def do_GET(self):
+        StubHandler.requests[self.path] = StubHandler.requests.get(self.path, 0) + 1
+        if self.path == "/slow":
+            time.sleep(1)
+        failures = StubHandler.failures.get(self.path)
+        status = failures.pop(0) if failures else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "session=1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    StubHandler.failures = {}
+    StubHandler.requests = {}
+
+
+def test_provider_reuses_connections(stub_server, context_manager):
+    provider = ProvidersFactory.get_provider(
+        context_manager, "http", "http", {"authentication": {}}
+    )
+    for _ in range(3):
+        result = provider.query(url=f"{stub_server}/alerts", method="GET")
+        assert result["status_code"] == 200
+        assert result["body"] == {"ok": True}
+    assert provider.get_http_session_stats() == {
+        stub_server: {"connections": 1, "requests": 3, "idle": 1}
+    }
+    # cookies are not kept between the calls
+    assert not provider.http_session.cookies
+    provider.close_http_session()
+    assert provider.get_http_session_stats() == {}
+
+
+def test_http_session_retries_and_timeout(stub_server):
+    StubHandler.failures = {"/flaky": [503, 502]}
+    session = create_http_session(read_timeout=0.2, retries=2)
+    session.adapters["http://"].max_retries.backoff_factor = 0
+    response = session.get(f"{stub_server}/flaky")
+    assert response.status_code == 200
+    # the default timeout applies when the call doesn't set one, and the
+    #   timed out call is not retried
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session.get(f"{stub_server}/slow")
+    assert StubHandler.requests["/slow"] == 1
+    assert session.get(f"{stub_server}/slow", timeout=5).status_code == 200
@@ -0,0 +1,57 @@
+import json
+
+from keep.api.utils.pusher_utils import PusherBatchBuilder, trigger_batches
+
+
+def test_batches_are_split_at_the_size_limit():
+    items = [{"id": i, "name": "x" * (i % 7) * 10} for i in range(200)]
+    payloads = PusherBatchBuilder.build(items, max_size=1000)
+    batches = [json.loads(payload) for payload in payloads]
+    # nothing is lost or reordered
+    assert [item for batch in batches for item in batch] == items
+    for i, (payload, batch) in enumerate(zip(payloads, batches)):
+        # the payload is the same as serializing the whole batch
+        assert payload == json.dumps(batch)
+        assert len(payload) <= 1000
+        # the batch is as big as it can be, the next item didn't fit
+        if i + 1 < len(batches):
+            assert len(json.dumps(batch + [batches[i + 1][0]])) > 1000
+
+
+def test_exact_limit_and_oversized_items():
+    item = {"a": "b"}
+    item_size = len(json.dumps(item))
+    # two items are exactly max_size bytes
+    max_size = 2 * item_size + 4
+    assert PusherBatchBuilder.build([item] * 3, max_size=max_size) == [
+        json.dumps([item, item]),
+        json.dumps([item]),
+    ]
+    # an item that can't fit in any message is skipped
+    assert PusherBatchBuilder.build([{"a": "b" * 100}, item], max_size=50) == [
+        json.dumps([item])
+    ]
+    assert PusherBatchBuilder.build([]) == []
+
+
+def test_trigger_batches():
+    class FakePusher:
+        def __init__(self):
+            self.messages = []
+
+        def trigger(self, channel, event_name, payload):
+            if len(self.messages) == 1:
+                self.messages.append(None)
+                raise Exception("pusher is down")
+            self.messages.append((channel, event_name, payload))
+
+    pusher_client = FakePusher()
+    items = [{"id": i, "data": "x" * 4000} for i in range(5)]
+    # 2 items per message, the second message fails
+    assert trigger_batches(pusher_client, "private-t", "async-alerts", items) == 2
+    assert pusher_client.messages[0] == (
+        "private-t",
+        "async-alerts",
+        json.dumps(items[:2]),
+    )
+    assert pusher_client.messages[2][2] == json.dumps(items[4:])
@@ -3,6 +3,7 @@ import hashlib
 import json
 import time
 import uuid
+from unittest.mock import patch
 
 from sqlalchemy.orm import subqueryload
 
@@ -11,6 +12,9 @@ from keep.api.core.db import get_rules as get_rules_db
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
 from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
 from keep.api.models.db.alert import Alert
+from keep.api.models.db.rule import Rule
+from keep.rulesengine.cel_program_cache import CELProgramCache
+from keep.rulesengine.rule_index import RulesIndex
 from keep.rulesengine.rulesengine import RulesEngine
 
 
@@ -412,6 +416,101 @@ def test_expired_group(db_session):
     assert expired_group.alert_enrichment.enrichments.get("group_expired")
 
 
+def test_filter_alerts_program_cache():
+    cel_program_cache = CELProgramCache(max_size=1)
+    alerts = [
+        AlertDto(
+            id=str(uuid.uuid4()),
+            source=["grafana"],
+            name="grafana-test-alert",
+            status=AlertStatus.FIRING,
+            severity=AlertSeverity.CRITICAL,
+            lastReceived=datetime.datetime.now().isoformat(),
+        ),
+        AlertDto(
+            id=str(uuid.uuid4()),
+            source=["datadog"],
+            name="datadog-test-alert",
+            status=AlertStatus.FIRING,
+            severity=AlertSeverity.INFO,
+            lastReceived=datetime.datetime.now().isoformat(),
+        ),
+    ]
+    with patch.object(CELProgramCache, "_instance", cel_program_cache, create=True):
+        for _ in range(3):
+            filtered = RulesEngine.filter_alerts(alerts, 'source == "grafana"')
+            assert [alert.name for alert in filtered] == ["grafana-test-alert"]
+        # compiled once, the other calls are served from the cache
+        assert cel_program_cache.stats()["misses"] == 1
+        assert cel_program_cache.stats()["hits"] == 2
+        # the cache is bounded, a new expression evicts the least recently used one
+        RulesEngine.filter_alerts(alerts, "severity > 'info'")
+        RulesEngine.filter_alerts(alerts, 'source == "grafana"')
+        assert cel_program_cache.stats()["misses"] == 3
+        assert cel_program_cache.stats()["size"] == 1
+
+
+def test_rules_index_same_results_as_all_rules():
+    definitions = [
+        '(source == "grafana")',
+        '(source == "sentry") && (source == "grafana" && severity == "critical")',
+        '("critical" == severity && labels.queue == "q1")',
+        '(labels.queue in ["q1", "q2"])',
+        '(name.contains("cpu"))',
+        '(source == "grafana" || severity == "info")',
+        '(service == "backend" && name.startsWith("db"))',
+        '(labels.missing == "x")',
+        '(severity == "high") && (name.contains("mq"))',
+    ]
+    rules = [
+        Rule(
+            tenant_id=SINGLE_TENANT_UUID,
+            name=f"rule-{i}",
+            definition={"sql": "N/A", "params": {}},
+            definition_cel=definition,
+            timeframe=600,
+            created_by="test@keephq.dev",
+        )
+        for i, definition in enumerate(definitions)
+    ]
+    events = [
+        AlertDto(
+            id=str(uuid.uuid4()),
+            source=[source],
+            name=name,
+            status=AlertStatus.FIRING,
+            severity=severity,
+            lastReceived=datetime.datetime.now().isoformat(),
+            labels=labels,
+            service=service,
+        )
+        for source, name, severity, labels, service in [
+            ("grafana", "cpu-high", AlertSeverity.CRITICAL, {"queue": "q1"}, None),
+            ("sentry", "mq-full", AlertSeverity.HIGH, {"queue": "q3"}, "backend"),
+            ("datadog", "db-down", AlertSeverity.INFO, {}, "backend"),
+            ("datadog", "disk", AlertSeverity.LOW, {"queue": "q2"}, None),
+        ]
+    ]
+    rules_engine = RulesEngine(tenant_id=SINGLE_TENANT_UUID)
+    rules_index = RulesIndex(rules, rules_engine._extract_subrules)
+    # only the rules with a non equality sub rule can't be indexed
+    assert rules_index._unindexed == {str(rules[i].id) for i in (4, 5, 8)}
+    pruned = 0
+    for event in events:
+        payload = rules_engine._get_event_payload(event)
+        candidate_rule_ids = rules_index.get_candidate_rule_ids(payload)
+        for rule in rules:
+            try:
+                rule_result = rules_engine._check_if_rule_apply(rule, event)
+            except Exception:
+                rule_result = False
+            if rule_result:
+                assert str(rule.id) in candidate_rule_ids
+            if str(rule.id) not in candidate_rule_ids:
+                pruned += 1
+    assert pruned > 0
+
+
 # Next steps:
 #   - test that alerts in the same group are being updated correctly
 #   - test group are being updated correctly
@@ -1,5 +1,10 @@
 import pytest
 
+from keep.secretmanager.secretmanagerfactory import (
+    SecretManagerFactory,
+    SecretManagerTypes,
+)
+from keep.secretmanager.secretscache import SecretsCache
 from keep.secretmanager.vaultsecretmanager import VaultSecretManager
 
 
@@ -57,3 +62,37 @@ def test_delete_secret(vault_secret_manager):
     secret_name = "test_secret"
     vault_secret_manager.delete_secret(secret_name)
     # You might want to assert logs or other side effects if necessary
+
+
+def test_secrets_cache_with_file_secret_manager(monkeypatch, tmp_path, context_manager):
+    monkeypatch.setenv("SECRET_MANAGER_DIRECTORY", str(tmp_path))
+    secrets_cache = SecretsCache(ttl=60)
+    monkeypatch.setattr(SecretsCache, "_instance", secrets_cache, raising=False)
+    secret_manager = SecretManagerFactory.get_secret_manager(
+        context_manager, SecretManagerTypes.FILE
+    )
+    secret_manager.write_secret("provider", '{"api_key": "1"}')
+    assert secret_manager.read_secret("provider", is_json=True) == {"api_key": "1"}
+    # the file is read once
+    (tmp_path / "provider").write_text('{"api_key": "changed outside"}')
+    secret = SecretManagerFactory.get_secret_manager(
+        context_manager, SecretManagerTypes.FILE
+    ).read_secret("provider", is_json=True)
+    assert secret == {"api_key": "1"}
+    # the cached secret can't be changed by the callers
+    secret["api_key"] = "2"
+    assert secret_manager.read_secret("provider", is_json=True) == {"api_key": "1"}
+    # writing invalidates the secret
+    secret_manager.write_secret("provider", '{"api_key": "3"}')
+    assert secret_manager.read_secret("provider", is_json=True) == {"api_key": "3"}
+    assert secret_manager.read_secret("provider") == '{"api_key": "3"}'
+    secret_manager.delete_secret("provider")
+    with pytest.raises(FileNotFoundError):
+        secret_manager.read_secret("provider")
+    assert secrets_cache.stats() == {
+        "size": 0,
+        "hits": 2,
+        "misses": 4,
+        "invalidations": 3,
+        "ttl": 60,
+    }
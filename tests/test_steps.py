@@ -3,6 +3,9 @@ from unittest.mock import Mock
 
 import pytest
 
+from keep.contextmanager.contextmanager import ContextManager
+from keep.providers.console_provider.console_provider import ConsoleProvider
+from keep.providers.providers_pool import ProvidersPool
 from keep.step.step import Step, StepError, StepType
 
 # constants for on-failure->retry mechanism
@@ -74,3 +77,47 @@ def test_run_single_exception(sample_step):
 
     # _run_single should take around RETRY_COUNT*RETRT_INTERVAL time due to retries
     assert execution_time >= RETRY_COUNT * RETRY_INTERVAL
+
+
+def test_run_with_pooled_provider(monkeypatch):
+    pool = ProvidersPool(max_size=1, ttl=600)
+    disposed = []
+    monkeypatch.setattr(
+        ConsoleProvider, "dispose", lambda self: disposed.append(self), raising=True
+    )
+    config = {"name": "print", "provider": {"type": "console"}, "throttle": False}
+    provider_config = {"authentication": {}}
+    providers = []
+    for workflow_id in ["run-1", "run-2"]:
+        context_manager = ContextManager(tenant_id="tenant", workflow_id=workflow_id)
+        provider = pool.get_provider(
+            context_manager, "console", "console", provider_config
+        )
+        step = Step(
+            context_manager,
+            "print",
+            config,
+            StepType.ACTION,
+            provider,
+            {"message": workflow_id},
+        )
+        assert step.run()
+        # the step results are kept after the instance went back to the pool
+        assert provider.results == [workflow_id]
+        providers.append(pool._idle[next(iter(pool._idle))][0][0])
+    # the instance is built once and bound to the context manager of each run
+    assert providers[0] is providers[1]
+    assert providers[1].context_manager is context_manager
+    assert pool.stats()["misses"] == 1
+    assert pool.stats()["hits"] == 1
+    # a changed config is a new revision with a new instance
+    step_provider = pool.get_provider(
+        context_manager, "console", "console", {"authentication": {"a": "b"}}
+    )
+    assert step_provider.acquire() is not providers[0]
+    step_provider.release()
+    # the pool holds one instance, the least recently used is disposed
+    assert disposed == [providers[0]]
+    pool.invalidate("tenant", "console")
+    assert len(disposed) == 2
+    assert pool.stats()["size"] == 0
@@ -0,0 +1,126 @@
+import datetime
+import uuid
+from unittest.mock import Mock, patch
+
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
+from keep.parser.parser import Parser
+from keep.workflowmanager.workflow_definitions_cache import WorkflowDefinitionsCache
+from keep.workflowmanager.workflowmanager import WorkflowManager
+from keep.workflowmanager.workflowscheduler import WorkflowsQueueType
+
+WORKFLOW = {
+    "id": "grafana-alerts",
+    "description": "run on grafana alerts",
+    "triggers": [{"type": "alert", "filters": [{"key": "source", "value": "grafana"}]}],
+    "actions": [
+        {
+            "name": "print",
+            "provider": {"type": "console", "with": {"message": "alert"}},
+        }
+    ],
+}
+
+
+def _create_alert_dto(source):
+    return AlertDto(
+        id=str(uuid.uuid4()),
+        name="test-alert",
+        source=[source],
+        severity=AlertSeverity.CRITICAL,
+        status=AlertStatus.FIRING,
+        lastReceived=datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+    )
+
+
+def test_insert_events_doesnt_parse_workflows(db_session):
+    workflow_manager = WorkflowManager()
+    workflow_manager.scheduler.queue_type = WorkflowsQueueType.MEMORY
+    workflow_store = workflow_manager.workflow_store
+    workflow_model = workflow_store.create_workflow(
+        SINGLE_TENANT_UUID, "test@keephq.dev", dict(WORKFLOW)
+    )
+    definitions_cache = WorkflowDefinitionsCache.get_instance()
+    events = [_create_alert_dto("datadog") for _ in range(5)]
+    events.append(_create_alert_dto("grafana"))
+
+    # the parsing itself (providers loading etc.) is covered by the parser tests
+    with patch.object(Parser, "parse", return_value=[Mock()]) as parse:
+        workflow_manager.insert_events(SINGLE_TENANT_UUID, events)
+        workflow_manager.insert_events(SINGLE_TENANT_UUID, events)
+    # the workflow is materialized by the scheduler that runs it
+    assert parse.call_count == 0
+    workflows_to_run = workflow_manager.scheduler.workflows_to_run
+    assert len(workflows_to_run) == 2
+    assert all(w["workflow_id"] == workflow_model.id for w in workflows_to_run)
+    assert (SINGLE_TENANT_UUID, workflow_model.id, 1) in definitions_cache._definitions
+
+    # updating the workflow bumps the revision, so the new definition is used
+    updated_workflow = dict(WORKFLOW)
+    updated_workflow["triggers"] = [
+        {"type": "alert", "filters": [{"key": "source", "value": "datadog"}]}
+    ]
+    workflow_model = workflow_store.create_workflow(
+        SINGLE_TENANT_UUID, "test@keephq.dev", updated_workflow
+    )
+    assert workflow_model.revision == 2
+    assert (
+        SINGLE_TENANT_UUID,
+        workflow_model.id,
+        1,
+    ) not in definitions_cache._definitions
+    workflow_manager.scheduler.workflows_to_run.clear()
+    with patch.object(Parser, "parse", return_value=[Mock()]):
+        workflow_manager.insert_events(SINGLE_TENANT_UUID, events)
+    assert len(workflow_manager.scheduler.workflows_to_run) == 5
+
+
+def test_triggers_index(db_session):
+    triggers = [
+        [{"key": "source", "value": "grafana"}],
+        [{"key": "source", "value": 'r"sentry|datadog"'}],
+        [{"key": "name", "value": "test-alert"}, {"key": "source", "value": "x"}],
+        [{"key": "labels.team", "value": "core"}],
+        [],
+    ]
+    workflow_manager = WorkflowManager()
+    workflow_manager.scheduler.queue_type = WorkflowsQueueType.MEMORY
+    workflow_store = workflow_manager.workflow_store
+    for i, filters in enumerate(triggers):
+        workflow = dict(WORKFLOW, id=f"workflow-{i}")
+        workflow["triggers"] = [{"type": "alert", "filters": filters}]
+        workflow_store.create_workflow(SINGLE_TENANT_UUID, "test@keephq.dev", workflow)
+    all_workflow_models = workflow_store.get_all_workflows(SINGLE_TENANT_UUID)
+    triggers_index = workflow_manager._get_triggers_index(
+        SINGLE_TENANT_UUID, all_workflow_models
+    )
+    # the index is reused as long as the workflows don't change
+    assert triggers_index is workflow_manager._get_triggers_index(
+        SINGLE_TENANT_UUID, all_workflow_models
+    )
+    all_triggers = triggers_index._unindexed + [
+        alert_trigger
+        for alert_triggers in triggers_index._index.values()
+        for alert_trigger in alert_triggers
+    ]
+    events = [_create_alert_dto(source) for source in ["grafana", "sentry", "x"]]
+    events.append(_create_alert_dto("grafana"))
+    events[-1].labels = {"team": "core"}
+    for event in events:
+        candidates = triggers_index.get_candidates(event)
+        matching = [
+            alert_trigger
+            for alert_trigger in all_triggers
+            if alert_trigger.matches(event)
+        ]
+        assert all(alert_trigger in candidates for alert_trigger in matching)
+        assert len(candidates) < len(all_triggers)
+
+    # the enrichment is fetched once per alert, not once per matching workflow
+    with patch(
+        "keep.workflowmanager.workflowmanager.get_enrichment", return_value=None
+    ) as get_enrichment, patch.object(Parser, "parse", return_value=[Mock()]):
+        workflow_manager.insert_events(SINGLE_TENANT_UUID, events)
+    assert get_enrichment.call_count == len(events)
+    # grafana (2), sentry (1), x (1), labels.team (1) and the one without filters (4)
+    assert len(workflow_manager.scheduler.workflows_to_run) == 9
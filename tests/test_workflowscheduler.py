@@ -0,0 +1,167 @@
+import datetime
+import threading
+import time
+import uuid
+from unittest.mock import Mock, patch
+
+from keep.api.core.db import (
+    claim_workflow_runs,
+    delete_workflow_run,
+    release_workflow_run,
+)
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
+from keep.api.models.db.workflow import QueuedWorkflowRun
+from keep.workflowmanager.workflow import WorkflowStrategy
+from keep.workflowmanager.workflow_runs_executor import (
+    QueuePolicy,
+    WorkflowRunsExecutor,
+)
+from keep.workflowmanager.workflowscheduler import (
+    WorkflowScheduler,
+    WorkflowsQueueType,
+)
+
+
+def _create_alert_dto():
+    return AlertDto(
+        id=str(uuid.uuid4()),
+        name="test-alert",
+        source=["grafana"],
+        severity=AlertSeverity.CRITICAL,
+        status=AlertStatus.FIRING,
+        lastReceived=datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+        fingerprint=str(uuid.uuid4()),
+    )
+
+
+def test_workflow_runs_executor_bounded():
+    executor = WorkflowRunsExecutor(max_workers=2, max_queue_size=3)
+    release = threading.Event()
+    # two runs keep the workers busy, three more fill the queue
+    assert executor.submit("tenant", release.wait)
+    assert executor.submit("tenant", release.wait)
+    time.sleep(0.1)
+    results = [executor.submit("tenant", release.wait) for _ in range(4)]
+    assert results == [True, True, True, False]
+    stats = executor.stats()
+    assert stats["active"] == 2
+    assert stats["queued"] == 3
+    assert stats["rejected"] == 1
+    assert stats["workers"] == 2
+    # forced runs are queued even if the queue is full
+    assert executor.submit("tenant", release.wait, force=True)
+    release.set()
+    executor.shutdown()
+    stats = executor.stats()
+    assert stats["active"] == 0
+    assert stats["queued"] == 0
+    assert stats["completed"] == 6
+
+
+def test_workflow_runs_executor_fairness():
+    executor = WorkflowRunsExecutor(max_workers=1, max_queue_size=100)
+    release = threading.Event()
+    order = []
+    # block the single worker so the queue is built before it runs
+    executor.submit("blocker", release.wait)
+    time.sleep(0.1)
+    for i in range(3):
+        executor.submit("noisy", order.append, f"noisy-{i}")
+    executor.submit("quiet", order.append, "quiet-0")
+    release.set()
+    executor.shutdown()
+    # the quiet tenant doesn't wait for all the runs of the noisy one
+    assert order == ["noisy-0", "quiet-0", "noisy-1", "noisy-2"]
+
+
+def test_scheduler_backpressure():
+    scheduler = WorkflowScheduler(workflow_manager=None)
+    scheduler.queue_type = WorkflowsQueueType.MEMORY
+    scheduler.executor = WorkflowRunsExecutor(
+        max_workers=1, max_queue_size=0, policy=QueuePolicy.BACKPRESSURE
+    )
+    workflows_to_run = [{"workflow_id": f"workflow-{i}"} for i in range(3)]
+    scheduler.workflows_to_run = list(workflows_to_run)
+    scheduler._handle_event_workflows()
+    # nothing could run, so the workflows wait for the next iteration
+    assert scheduler.workflows_to_run == workflows_to_run
+
+
+def test_durable_queue_claim_and_lease(db_session):
+    scheduler = WorkflowScheduler(workflow_manager=None)
+    scheduler.queue_type = WorkflowsQueueType.DB
+    for _ in range(3):
+        scheduler.add_workflow_run(
+            SINGLE_TENANT_UUID, "workflow", "alert", _create_alert_dto()
+        )
+    # a run is claimed by a single worker
+    assert len(claim_workflow_runs("worker-1", 2, 60)) == 2
+    claimed = claim_workflow_runs("worker-2", 10, -1)
+    assert len(claimed) == 1
+    assert claimed[0].claimed_by == "worker-2"
+    # until its lease expires (e.g. the worker died)
+    reclaimed = claim_workflow_runs("worker-3", 10, 60)
+    assert [r.id for r in reclaimed] == [claimed[0].id]
+    assert claim_workflow_runs("worker-3", 10, 60) == []
+    # or it's released back to the queue
+    release_workflow_run(claimed[0].id, retry=True)
+    reclaimed = claim_workflow_runs("worker-3", 10, 60)
+    assert [r.id for r in reclaimed] == [claimed[0].id]
+    assert reclaimed[0].retry
+    delete_workflow_run(claimed[0].id)
+    assert db_session.query(QueuedWorkflowRun).count() == 2
+
+
+def test_durable_queue_runs_on_another_worker(db_session):
+    # the run is queued by one worker and run by another (or after a restart)
+    event = _create_alert_dto()
+    queueing_scheduler = WorkflowScheduler(workflow_manager=None)
+    queueing_scheduler.queue_type = WorkflowsQueueType.DB
+    queueing_scheduler.add_workflow_run(SINGLE_TENANT_UUID, "workflow", "alert", event)
+    scheduler = WorkflowScheduler(workflow_manager=None)
+    scheduler.queue_type = WorkflowsQueueType.DB
+    workflow = Mock(workflow_strategy=WorkflowStrategy.PARALLEL.value)
+    with patch.object(
+        scheduler.workflow_store, "get_workflow", return_value=workflow
+    ), patch.object(scheduler, "_run_workflow") as run_workflow:
+        scheduler._handle_event_workflows()
+        scheduler.executor.shutdown()
+    run_workflow.assert_called_once()
+    tenant_id, workflow_id, _, _, run_event = run_workflow.call_args.args
+    assert (tenant_id, workflow_id) == (SINGLE_TENANT_UUID, "workflow")
+    assert run_event.fingerprint == event.fingerprint
+    # the run is removed from the queue once it's done
+    assert db_session.query(QueuedWorkflowRun).count() == 0
+
+
+def test_durable_queue_renews_leases(db_session):
+    scheduler = WorkflowScheduler(workflow_manager=None)
+    scheduler.queue_type = WorkflowsQueueType.DB
+    scheduler.queue_lease_seconds = 60
+    for _ in range(2):
+        scheduler.add_workflow_run(
+            SINGLE_TENANT_UUID, "workflow", "alert", _create_alert_dto()
+        )
+    workflows_to_run = scheduler._get_workflows_to_run()
+    assert len(workflows_to_run) == 2
+    # the first run finished, the second one is still queued or running when
+    #   its lease would expire
+    scheduler._complete_workflow_run(workflows_to_run[0]["queued_run_id"])
+    queued_run = db_session.query(QueuedWorkflowRun).one()
+    queued_run.lease_expires_at = datetime.datetime.utcnow() - datetime.timedelta(
+        seconds=1
+    )
+    db_session.commit()
+    # not renewed before a third of the lease passed
+    scheduler._renew_leases()
+    db_session.refresh(queued_run)
+    assert queued_run.lease_expires_at < datetime.datetime.utcnow()
+    scheduler._leases_renewed_at -= scheduler.queue_lease_seconds
+    scheduler._renew_leases()
+    db_session.refresh(queued_run)
+    assert queued_run.lease_expires_at > datetime.datetime.utcnow()
+    # so other workers don't claim it
+    assert claim_workflow_runs("worker-2", 10, 60) == []
+    scheduler._complete_workflow_run(queued_run.id)
+    assert scheduler._claimed_runs == set()